@@ -5,18 +5,81 @@ This is not designed for quick access, it's designed for being able to roundtrip
 and splice between files.
 """
 
+import codecs
+import contextlib
+import io
+import mmap
+import os
 import re
-from typing import Any, Optional, Sequence, Tuple
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
 
-from .types import ConfigEntry, ConfigFile, ConfigSection, ParseError, ValueLine
+from .edits import Batch, Conflict, Delete, Edit, InsertBefore, SetValue
+from .events import (
+    EndEvent,
+    EntryEvent,
+    Event,
+    SectionEvent,
+    ValueEvent,
+    WhitespaceEvent,
+)
+from .flatten import Table, to_dict, to_table
+from .stats import ParseStats
+from .types import (
+    ConfigEntry,
+    ConfigFile,
+    ConfigSection,
+    LazyText,
+    ParseError,
+    SpanEntry,
+    SpanEntryList,
+    SpanSection,
+    SpanText,
+    ValueLine,
+    ValueList,
+)
 
 __all__ = [
     "ConfigFile",
     "ConfigSection",
     "ConfigEntry",
     "ValueLine",
+    "Batch",
+    "Edit",
+    "SetValue",
+    "Delete",
+    "InsertBefore",
+    "Conflict",
+    "Table",
+    "to_dict",
+    "to_table",
+    "Event",
+    "WhitespaceEvent",
+    "SectionEvent",
+    "EntryEvent",
+    "ValueEvent",
+    "EndEvent",
     "Parser",
     "ParseError",
+    "ParseStats",
+    "iter_events",
+    "parse_bytes",
+    "parse_file",
+    "parse_path",
     "parse_string",
 ]
 
@@ -26,6 +89,106 @@ LEADING_WHITESPACE = re.compile(
 # These do not need to handle leading or trailing whitespace, that's handled
 # above.
 SECTION = re.compile(r"^(\[)([^\]]+)(\])(.*)")
+# For lazy parsing: a line starting with "[" is always a section header no
+# matter what came before it, but an indented one might be a continuation line.
+LAZY_SECTION = re.compile(r"^\[[^\]\n]+\]", re.MULTILINE)
+INDENTED_SECTION = re.compile(
+    r"^[ \t\r\x1f\x1e\x1d\x1c\x0c\x0b]+\[[^\]\n]+\]", re.MULTILINE
+)
+# For span parsing: the same groups as LEADING_WHITESPACE, but for every line of
+# a whole text, and a SECTION that can be used with pos/endpos.
+LINE_PARTS = re.compile(r"([ \t\r\x1f\x1e\x1d\x1c\x0c\x0b]*)(.*?)([ \t]*)(\r?\n|\Z)")
+SECTION_AT = re.compile(r"\[[^\]]+\]")
+# What Parser._scan yields
+SECTION_LINE, ENTRY_LINE, VALUE_LINE, END = range(4)
+
+BytesLike = Union[bytes, bytearray, memoryview, mmap.mmap]
+# Codec name -> the byte order marks it might start with, and the codec to
+# decode the rest with
+BOMS = {
+    "utf-8": ((codecs.BOM_UTF8, "utf-8"),),
+    "utf-8-sig": ((codecs.BOM_UTF8, "utf-8"),),
+    "utf-16": (
+        (codecs.BOM_UTF16_LE, "utf-16-le"),
+        (codecs.BOM_UTF16_BE, "utf-16-be"),
+    ),
+    "utf-32": (
+        (codecs.BOM_UTF32_LE, "utf-32-le"),
+        (codecs.BOM_UTF32_BE, "utf-32-be"),
+    ),
+}
+
+# Codecs that aren't ASCII-compatible, so surrogateescape can't keep the bytes
+# that don't decode
+WIDE_CODECS = ("utf-16", "utf-32")
+
+
+def split_bom(head: bytes, encoding: str) -> Tuple[bytes, str]:
+    """
+    Returns the byte order mark `head` starts with (only looking for the ones
+    `encoding` uses), and the codec for the data after it.
+    """
+    name = codecs.lookup(encoding).name
+    for bom, codec in BOMS.get(name, ()):
+        if head.startswith(bom):
+            return bom, codec
+    if name == "utf-8-sig":
+        return b"", "utf-8"
+    elif name in ("utf-16", "utf-32"):
+        # Without a BOM, these codecs use the native byte order
+        return b"", f"{name}-{sys.byteorder[0]}e"
+    return b"", encoding
+
+
+def decode(data: BytesLike, encoding: str) -> Tuple[str, bytes, str]:
+    """
+    Returns the text of `data` after any BOM, the BOM, and the codec used.
+
+    Bytes that don't decode are kept as surrogates, except in UTF-16 and UTF-32,
+    where they can't be (an odd byte at the end, or half a surrogate pair), so
+    those raise ParseError instead.
+    """
+    with memoryview(data) as view:
+        bom, codec = split_bom(bytes(view[:4]), encoding)
+        # Decoded straight from the buffer, without copying it to bytes first
+        with view[len(bom) :] as body:
+            if not codecs.lookup(codec).name.startswith(WIDE_CODECS):
+                return str(body, codec, "surrogateescape"), bom, codec
+            try:
+                return str(body, codec), bom, codec
+            except UnicodeDecodeError as e:
+                raise ParseError(
+                    f"Not valid {codec} at byte {len(bom) + e.start}: {e.reason}"
+                ) from e
+
+
+@contextlib.contextmanager
+def mapped(path: Union[str, "os.PathLike[str]"]) -> Iterator[BytesLike]:
+    """
+    The contents of a file, mapped rather than read.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files can't be mapped
+            yield b""
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                yield m
+
+
+@contextlib.contextmanager
+def opened(
+    path: Union[str, "os.PathLike[str]"], encoding: str
+) -> Iterator[Tuple[TextIO, bytes, str]]:
+    r"""
+    A file opened to be read as text after any BOM, with ``newline="\n"``, and
+    the BOM and codec (as `decode` gives them).
+    """
+    with open(path, "rb") as raw:
+        bom, codec = split_bom(raw.read(4), encoding)
+        raw.seek(len(bom))
+        with io.TextIOWrapper(raw, encoding=codec, newline="\n") as f:
+            yield f, bom, codec
 
 
 def split_prefix(line: str) -> Tuple[str, str, str, str]:
@@ -37,10 +200,25 @@ def split_prefix(line: str) -> Tuple[str, str, str, str]:
     return m.group(1), m.group(2), m.group(3), m.group(4) or ""
 
 
+_intern = sys.intern
+
 LINE_RE = re.compile(r".*?(?:\n|$)", re.DOTALL)
 UNDECIDED = object()
 
 
+def iter_lines(text: str) -> Iterator[str]:
+    r"""
+    Given 'a\r\nb\n' gives 'a\r\n', 'b\n' one at a time.
+
+    This splits like ``list(io)`` for a file opened with ``newline="\n"``, which
+    is to say only on ``\n``.
+    """
+    for m in LINE_RE.finditer(text):
+        line = m.group(0)
+        if line:
+            yield line
+
+
 class Parser:
     # These regexes and comments come directly from configparser.py which is
     # available under the MIT license at https://github.com/jaraco/configparser
@@ -87,6 +265,9 @@ class Parser:
         comment_prefixes: Sequence[str] = ("#", ";"),
         inline_comment_prefixes: Optional[Sequence[str]] = None,
         empty_lines_in_values: bool = True,
+        lazy: bool = False,
+        spans: bool = False,
+        observer: Optional[Callable[[ParseStats], None]] = None,
     ) -> None:
         self._delimeters = tuple(delimiters)
         if delimiters == ("=", ":"):
@@ -101,53 +282,568 @@ class Parser:
         self._inline_comment_prefixes = tuple(inline_comment_prefixes or ())
         self._allow_no_value = allow_no_value
         self._empty_lines_in_values = empty_lines_in_values
+        self._lazy = lazy
+        # Doesn't support allow_no_value, which doesn't roundtrip anyway
+        self._spans = spans and not allow_no_value
+        # Called with a ParseStats after each parse
+        self._observer = observer
 
     def parse_string(self, text: str) -> ConfigFile:
+        if self._observer is not None:
+            return self._observe(text, ParseStats())
+        if self._lazy:
+            return self._parse_lazy(text)
+        return self._parse_eager(text)
+
+    def _observe(
+        self,
+        text: str,
+        stats: ParseStats,
+        lines: Optional[List[str]] = None,
+    ) -> ConfigFile:
+        """
+        `parse_string` (or `parse_lines`, given `lines`) timing each phase
+        separately, then calling the observer.
+        """
+        assert self._observer is not None
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            before = tracemalloc.get_traced_memory()[0]
+        stats.chars = len(text)
+        stats.lines = text.count("\n") + (not text.endswith("\n") and bool(text))
+        # "(?!)" never matches
+        prefixes = "|".join(re.escape(p) for p in self._comment_prefixes) or "(?!)"
+        comment_line = re.compile(
+            r"^[ \t\r\x1f\x1e\x1d\x1c\x0c\x0b]*(?:" + prefixes + ")", re.MULTILINE
+        )
+        stats.comment_lines = len(comment_line.findall(text))
+
+        t0 = time.perf_counter()
+        if lines is None and self._lazy:
+            root = self._parse_lazy(text)
+            t1 = time.perf_counter()
+            sections, entries, values, value_nodes = len(root.sections), 0, 0, 0
+        elif lines is not None or self._allow_no_value:
+            events = list(
+                self._line_events(iter_lines(text) if lines is None else lines)
+            )
+            t1 = time.perf_counter()
+            root = self._build(events)
+            counts = Counter(type(e) for e in events)
+            sections, entries, values = (
+                counts[SectionEvent],
+                counts[EntryEvent],
+                counts[ValueEvent],
+            )
+            value_nodes = values
+            del events
+        else:
+            scanned = list(self._scan(text))
+            t1 = time.perf_counter()
+            if self._spans:
+                root = self._parse_spans(text, scanned)
+            else:
+                root = self._parse_scanned(text, scanned)
+            kinds = Counter(t[0] for t in scanned)
+            sections, entries, values = (
+                kinds[SECTION_LINE],
+                kinds[ENTRY_LINE],
+                kinds[VALUE_LINE] + kinds[ENTRY_LINE],
+            )
+            value_nodes = 0 if self._spans else values
+            del scanned
+        stats.scan_time = t1 - t0
+        stats.build_time = time.perf_counter() - t1
+
+        stats.sections = sections
+        stats.entries = entries
+        # Each entry's first line is a value line too
+        stats.continuation_lines = values - entries
+        stats.nodes = sections + entries + value_nodes
+        if tracing:
+            stats.allocated = tracemalloc.get_traced_memory()[0] - before
+        self._observer(stats)
+        return root
+
+    def _parse_eager(self, text: str) -> ConfigFile:
+        if self._spans:
+            return self._parse_spans(text)
+        if self._allow_no_value:
+            return self._build(self.iter_events(text))
+        return self._parse_scanned(text)
+
+    def _parse_lazy(self, text: str) -> ConfigFile:
+        """
+        Finds the section headers, leaving the rest for when it's used.
+        """
+        starts = [m.start() for m in LAZY_SECTION.finditer(text)]
+        if len(starts) < 2 or INDENTED_SECTION.search(text):
+            return self._parse_eager(text)
+
+        lazy = LazyText(text, self._parse_eager)
+        for start in starts:
+            body_start = text.find("\n", start) + 1 or len(text)
+            header = next(self.iter_events(text[start:body_start]))
+            lazy.add(start, body_start, header)
+        root = ConfigFile()
+        lazy.finish(root)
+        return root
+
+    def _scan(self, text: str) -> Iterator[Tuple[int, ...]]:
+        """
+        Classifies every line of `text` in one pass, yielding positions instead of
+        strings.  This follows the same rules as the line loop in `iter_events`.
+
+        Yields one of these per section, entry, or value line:
+
+            (SECTION_LINE, ws_start, text_start, close_end, newline_start, end)
+            (ENTRY_LINE, ws_start, text_start, option_end, ws1_end, delimiter_end,
+                value_start, text_end, newline_start, end)
+            (VALUE_LINE, start, text_start, text_end, newline_start, end)
+
+        where whitespace and comments since the previous one start at `ws_start`,
+        then finally (END, ws_start).
+        """
+        entry_indent: Optional[int] = None
+        seen_section = False
+        # Where the comments and whitespace for the next node began
+        ws_start = 0
+
+        for m in LINE_PARTS.finditer(text):
+            line_start, line_end = m.span()
+            if line_start == line_end:
+                break
+            text_start, text_end = m.span(2)
+
+            if entry_indent is not None and text_start - line_start > entry_indent:
+                if ws_start < line_start:
+                    yield from self._skipped_value_lines(text, ws_start, line_start)
+                if text.startswith(self._comment_prefixes, text_start, text_end):
+                    # Like iter_events, a comment's text is its whitespace
+                    yield (
+                        VALUE_LINE,
+                        line_start,
+                        text_end,
+                        text_end,
+                        line_end,
+                        line_end,
+                    )
+                else:
+                    yield (
+                        VALUE_LINE,
+                        line_start,
+                        text_start,
+                        text_end,
+                        m.start(4),
+                        line_end,
+                    )
+                ws_start = line_end
+                continue
+            elif text.startswith(("#", ";"), text_start, text_end):
+                continue
+
+            sm = SECTION_AT.match(text, text_start, text_end)
+            if sm:
+                yield (
+                    SECTION_LINE,
+                    ws_start,
+                    text_start,
+                    sm.end(),
+                    m.start(4),
+                    line_end,
+                )
+                seen_section = True
+                entry_indent = None
+                ws_start = line_end
+                continue
+
+            om = self._optcre.match(text, text_start, text_end)
+            if om:
+                if not seen_section:
+                    raise ParseError("Entry outside a section")
+                yield (
+                    ENTRY_LINE,
+                    ws_start,
+                    text_start,
+                    # option, ws1, vi, ws2
+                    om.end(1),
+                    om.end(2),
+                    om.end(3),
+                    om.end(4),
+                    text_end,
+                    m.start(4),
+                    line_end,
+                )
+                entry_indent = text_start - line_start
+                ws_start = line_end
+                continue
+
+            # Neither, so it stays in the whitespace
+
+        yield (END, ws_start)
+
+    def _skipped_value_lines(
+        self, text: str, start: int, end: int
+    ) -> Iterator[Tuple[int, ...]]:
+        """
+        Like `_skipped_value_events`, for `_scan`.
+        """
+        for m in LINE_PARTS.finditer(text, start, end):
+            line_start, line_end = m.span()
+            if line_start == line_end:
+                break
+            text_start, text_end = m.span(2)
+            if text_start < text_end or not self._empty_lines_in_values:
+                yield (VALUE_LINE, line_start, text_end, text_end, line_end, line_end)
+            else:
+                yield (
+                    VALUE_LINE,
+                    line_start,
+                    text_start,
+                    text_start,
+                    m.start(4),
+                    line_end,
+                )
+
+    def _text_events(self, text: str) -> Iterator[Event]:
+        """
+        `iter_events` for a whole string, using `_scan`.
+        """
+        for t in self._scan(text):
+            kind = t[0]
+            # Ordered by how common they are
+            if kind == VALUE_LINE:
+                _, start, text_start, text_end, newline_start, end = t
+                yield ValueEvent(
+                    _intern(text[start:text_start]),
+                    text[text_start:text_end],
+                    _intern(text[text_end:newline_start]),
+                    _intern(text[newline_start:end]),
+                )
+            elif kind == ENTRY_LINE:
+                (
+                    _,
+                    ws_start,
+                    text_start,
+                    option_end,
+                    ws1_end,
+                    delimiter_end,
+                    value_start,
+                    text_end,
+                    newline_start,
+                    end,
+                ) = t
+                if ws_start < text_start:
+                    yield WhitespaceEvent(_intern(text[ws_start:text_start]))
+                yield EntryEvent(
+                    text[text_start:option_end],
+                    _intern(text[option_end:ws1_end]),
+                    text[ws1_end:delimiter_end],
+                    _intern(text[delimiter_end:value_start]),
+                )
+                yield ValueEvent(
+                    "",
+                    text[value_start:text_end],
+                    _intern(text[text_end:newline_start]),
+                    _intern(text[newline_start:end]),
+                )
+            elif kind == SECTION_LINE:
+                _, ws_start, text_start, close_end, newline_start, end = t
+                if ws_start < text_start:
+                    yield WhitespaceEvent(_intern(text[ws_start:text_start]))
+                yield SectionEvent(
+                    "[",
+                    text[text_start + 1 : close_end - 1],
+                    "]",
+                    text[close_end:newline_start],
+                    _intern(text[newline_start:end]),
+                )
+            else:
+                ws_start = t[1]
+                if ws_start < len(text):
+                    yield WhitespaceEvent(text[ws_start:])
+        yield EndEvent()
+
+    def _parse_scanned(
+        self, text: str, scanned: Optional[Iterable[Tuple[int, ...]]] = None
+    ) -> ConfigFile:
+        """
+        Builds the same tree as `_build` would from `_text_events`, but without
+        making the events.  `scanned` is `_scan(text)`, if that's already done.
+        """
+        root = ConfigFile()
+        sections = root.sections
+        entries: List[ConfigEntry] = []
+        value = ValueList()
+
+        for t in self._scan(text) if scanned is None else scanned:
+            kind = t[0]
+            if kind == VALUE_LINE:
+                _, start, text_start, text_end, newline_start, end = t
+                # Nothing to invalidate yet
+                list.append(
+                    value,
+                    ValueLine(
+                        _intern(text[start:text_start]),
+                        text[text_start:text_end],
+                        _intern(text[text_end:newline_start]),
+                        _intern(text[newline_start:end]),
+                    ),
+                )
+            elif kind == ENTRY_LINE:
+                (
+                    _,
+                    ws_start,
+                    text_start,
+                    option_end,
+                    ws1_end,
+                    delimiter_end,
+                    value_start,
+                    text_end,
+                    newline_start,
+                    end,
+                ) = t
+                value = ValueList(
+                    (
+                        ValueLine(
+                            "",
+                            text[value_start:text_end],
+                            _intern(text[text_end:newline_start]),
+                            _intern(text[newline_start:end]),
+                        ),
+                    )
+                )
+                entries.append(
+                    ConfigEntry(
+                        text[text_start:option_end],
+                        text[ws1_end:delimiter_end],
+                        value,
+                        _intern(text[ws_start:text_start]),
+                        _intern(text[option_end:ws1_end]),
+                        _intern(text[delimiter_end:value_start]),
+                    )
+                )
+            elif kind == SECTION_LINE:
+                _, ws_start, text_start, close_end, newline_start, end = t
+                section = ConfigSection(
+                    _intern(text[ws_start:text_start]),
+                    "[",
+                    text[text_start + 1 : close_end - 1],
+                    "]",
+                    text[close_end:newline_start],
+                    _intern(text[newline_start:end]),
+                )
+                entries = section.entries
+                sections.append(section)
+            elif t[1] < len(text):
+                root.final_comment = text[t[1] :]
+        return root
+
+    def _parse_spans(
+        self, text: str, scanned: Optional[Iterable[Tuple[int, ...]]] = None
+    ) -> ConfigFile:
+        """
+        Builds a tree of nodes that point into `text` instead of copying from it.
+        """
+        spans = SpanText(text)
+        o = spans.offsets
+        root = ConfigFile()
+        entries: Optional[SpanEntryList] = None
+        # The section and entry being parsed, by the position of their records
+        section = -1
+        entry = -1
+        entry_lines = 0
+        ws_start = 0
+
+        for t in self._scan(text) if scanned is None else scanned:
+            kind = t[0]
+            if kind == VALUE_LINE:
+                o.extend(t[2:])
+                entry_lines += 1
+                continue
+
+            if entry >= 0:
+                o[entry] = entry_lines
+                entry = -1
+            if kind == ENTRY_LINE:
+                assert entries is not None
+                entry = len(o)
+                entry_lines = 1
+                value_start = t[6]
+                o.extend((0, section) + t[1:6] + (value_start, value_start) + t[7:])
+                # Not entries.append, which would note a change
+                list.append(entries, SpanEntry._create(spans, entry))
+                continue
+
+            if section >= 0:
+                o[section + 7] = t[1]
+            if kind == SECTION_LINE:
+                _, ws_start, text_start, close_end, newline_start, end = t
+                section = len(o)
+                entries = SpanEntryList._create(spans, section)
+                root.sections.append(SpanSection._create(spans, section, entries))
+                # The last is the end of the section, once it's known
+                o.extend(
+                    (
+                        ws_start,
+                        text_start,
+                        text_start + 1,
+                        close_end - 1,
+                        close_end,
+                        newline_start,
+                        end,
+                        end,
+                    )
+                )
+            else:
+                ws_start = t[1]
+                if ws_start < len(text):
+                    root.final_comment = text[ws_start:]
+        return root
+
+    def parse_file(self, fp: TextIO) -> ConfigFile:
+        r"""
+        Parse an open file, reading it one line at a time (or all at once for
+        `lazy` or `spans`, which need the whole text).
+
+        The file should be opened with ``newline="\n"`` (as ``parse_path`` does)
+        or universal newlines will translate ``\r\n`` and it won't roundtrip.
+        """
+        if self._lazy or self._spans:
+            return self.parse_string(fp.read())
+        return self.parse_lines(fp)
+
+    def parse_bytes(self, data: BytesLike, encoding: str = "utf-8") -> ConfigFile:
+        """
+        Parse encoded data, such as an mmap of a file.  `ConfigFile.build_bytes`
+        (or `.data`) gives back the same bytes, including a BOM and any that
+        don't decode.
+        """
+        if self._observer is not None:
+            t0 = time.perf_counter()
+            text, bom, codec = decode(data, encoding)
+            stats = ParseStats(bytes=len(data), decode_time=time.perf_counter() - t0)
+            root = self._observe(text, stats)
+        else:
+            text, bom, codec = decode(data, encoding)
+            root = self.parse_string(text)
+        root.encoding = codec
+        root.bom = bom
+        return root
+
+    def parse_path(
+        self,
+        path: Union[str, "os.PathLike[str]"],
+        encoding: str = "utf-8",
+        mode: str = "text",
+    ) -> ConfigFile:
+        """
+        In "binary" mode the file is mapped rather than read, and parsed with
+        `parse_bytes`.
+        """
+        if mode == "binary":
+            with mapped(path) as data:
+                return self.parse_bytes(data, encoding)
+        elif mode != "text":
+            raise ValueError(f"Unknown mode {mode!r}")
+        with opened(path, encoding) as (f, bom, codec):
+            root = self.parse_file(f)
+        # So that saving writes what was read
+        root.encoding = codec
+        root.bom = bom
+        return root
+
+    def parse_lines(self, lines: Iterable[str]) -> ConfigFile:
+        """
+        Parse from an iterable of lines, each including its trailing newline.
+        """
+        if self._observer is not None:
+            lines = list(lines)
+            return self._observe("".join(lines), ParseStats(), lines)
+        return self._build(self.iter_events(lines))
+
+    def _build(self, events: Iterable[Event]) -> ConfigFile:
         # Note that default_section param isn't included; it doesn't have a name in
         # this tree so it doesn't matter.
 
         root = ConfigFile()
-        sect = None
-        entry = None
-        entry_indent = None
+        sect: Optional[ConfigSection] = None
+        entry: Optional[ConfigEntry] = None
+        wsbuf = ""
+
+        for event in events:
+            # Ordered by how common they are
+            if type(event) is ValueEvent:
+                assert entry is not None
+                entry.value.append(ValueLine(*event))
+            elif type(event) is EntryEvent:
+                assert sect is not None
+                entry = ConfigEntry(
+                    whitespace_before_key=wsbuf,
+                    key=event.key,
+                    whitespace_before_equals=event.whitespace_before_equals,
+                    equals=event.equals,
+                    whitespace_before_value=event.whitespace_before_value,
+                    whitespace_after_value="",
+                )
+                sect.entries.append(entry)
+                wsbuf = ""
+            elif type(event) is WhitespaceEvent:
+                wsbuf = event.text
+            elif type(event) is SectionEvent:
+                sect = ConfigSection(wsbuf, *event)
+                root.sections.append(sect)
+                wsbuf = ""
+
+        # TODO: Try to figure out somewhere to put it...
+        if wsbuf:
+            root.final_comment = wsbuf
+
+        return root
+
+    def iter_events(self, source: Union[str, Iterable[str]]) -> Iterator[Event]:
+        """
+        Yields events for `source` (a string, or an iterable of lines) without
+        building any nodes.
+
+        This is what the parser is built on; a consumer that only wants a few
+        keys can stop early.
+        """
+        if isinstance(source, str):
+            if not self._allow_no_value:
+                return self._text_events(source)
+            source = iter_lines(source)
+        return self._line_events(source)
+
+    def _line_events(self, lines: Iterable[str]) -> Iterator[Event]:
+        """
+        `iter_events` one line at a time, for files and `allow_no_value`.
+        """
+        seen_section = False
+        entry_indent: Optional[int] = None
 
         wsbuf = ""
 
-        # print("top")
-        for line in LINE_RE.findall(text):
+        for line in lines:
             parts = split_prefix(line)
-            # print(repr(line), parts)
-
-            # print("loop", repr(line), repr(parts), entry_indent)
-
-            if isinstance(entry_indent, int) and len(parts[0]) > entry_indent:
-                # print("continuation")
-                if self._empty_lines_in_values:
-                    if wsbuf and wsbuf.count("\n") == len(wsbuf):
-                        # This will need a refactoring when inline comments work.
-                        for char in wsbuf:
-                            value = ValueLine(
-                                whitespace_before_text="",
-                                text="",
-                                whitespace_after_text="",
-                                newline=char,
-                            )
-                            entry.value.append(value)
-                if parts[1].startswith(self._comment_prefixes):
-                    parts = list(parts)
+
+            # The whitespace and newlines repeat on nearly every line; share them
+            # (the single characters already are) instead of keeping a copy per
+            # node.
+            parts = (_intern(parts[0]), parts[1], _intern(parts[2]), _intern(parts[3]))
+
+            if entry_indent is not None and len(parts[0]) > entry_indent:
+                if wsbuf:
+                    yield from self._skipped_value_events(wsbuf)
+                ws_before, text, ws_after, newline = parts
+                if text.startswith(self._comment_prefixes):
                     # This is a comment line, put comment in whitespace
-                    parts[0] += parts[1]
-                    parts[1] = ""
+                    ws_before += text
+                    text = ""
                     # This is a comment line, pull newline out
-                    parts[2] += parts[3]
-                    parts[3] = ""
-                value = ValueLine(
-                    whitespace_before_text=parts[0],
-                    text=parts[1],
-                    whitespace_after_text=parts[2],
-                    newline=parts[3],
-                )
-                entry.value.append(value)
+                    ws_after += newline
+                    newline = ""
+                yield ValueEvent(ws_before, text, ws_after, newline)
                 wsbuf = ""
                 continue
             elif parts[1].startswith(("#", ";")):
@@ -158,53 +854,72 @@ class Parser:
             wsbuf += parts[0]
             m = SECTION.match(parts[1])
             if m:
-                sect = ConfigSection(
-                    leading_whitespace=wsbuf,
-                    leading_square_bracket=m.group(1),
-                    name=m.group(2),
-                    trailing_square_bracket=m.group(3),
-                    trailing_whitespace=m.group(4) + parts[2],
-                    newline=parts[3],
+                if wsbuf:
+                    yield WhitespaceEvent(wsbuf)
+                yield SectionEvent(
+                    m.group(1), m.group(2), m.group(3), m.group(4) + parts[2], parts[3]
                 )
-                # print("Add section", sect)
-                root.sections.append(sect)
+                seen_section = True
                 wsbuf = ""
                 entry_indent = None
                 continue
 
             m = self._optcre.match(parts[1])
             if m:
+                if not seen_section:
+                    raise ParseError("Entry outside a section")
                 d = m.groupdict()
-                entry = ConfigEntry(
-                    whitespace_before_key=wsbuf,
-                    key=d["option"],
-                    whitespace_before_equals=d["ws1"],
-                    equals=d["vi"],
-                    whitespace_before_value=d["ws2"] or "",
-                    whitespace_after_value="",
+                if wsbuf:
+                    yield WhitespaceEvent(wsbuf)
+                yield EntryEvent(
+                    d["option"], _intern(d["ws1"]), d["vi"], _intern(d["ws2"] or "")
                 )
-                value = ValueLine(
-                    whitespace_before_text="",
-                    text=d["value"],
-                    whitespace_after_text=parts[2],
-                    newline=parts[3],
-                )
-                entry.value.append(value)
-                if sect is None:
-                    raise ParseError("Entry outside a section")
-                sect.entries.append(entry)
+                yield ValueEvent("", d["value"], parts[2], parts[3])
                 entry_indent = len(parts[0])
                 wsbuf = ""
                 continue
 
-            wsbuf += line
+            # Already have the indent
+            wsbuf += parts[1] + parts[2] + parts[3]
 
-        # TODO: Try to figure out somewhere to put it...
         if wsbuf:
-            root.final_comment = wsbuf
+            yield WhitespaceEvent(wsbuf)
+        yield EndEvent()
 
-        return root
+    def _skipped_value_events(self, wsbuf: str) -> Iterator[ValueEvent]:
+        """
+        Blank lines and comments that turned out to be in the middle of a value.
+        """
+        for line in iter_lines(wsbuf):
+            ws_before, text, ws_after, newline = split_prefix(line)
+            if text or not self._empty_lines_in_values:
+                # Comments don't add to the value, so no newline.  This will need a
+                # refactoring when inline comments work.
+                yield ValueEvent(ws_before + text, "", ws_after + newline, "")
+            else:
+                yield ValueEvent(ws_before, "", ws_after, newline)
 
 
 def parse_string(text: str, **kwargs: Any) -> ConfigFile:
     return Parser(**kwargs).parse_string(text)
+
+
+def iter_events(source: Union[str, Iterable[str]], **kwargs: Any) -> Iterator[Event]:
+    return Parser(**kwargs).iter_events(source)
+
+
+def parse_bytes(data: BytesLike, encoding: str = "utf-8", **kwargs: Any) -> ConfigFile:
+    return Parser(**kwargs).parse_bytes(data, encoding=encoding)
+
+
+def parse_file(fp: TextIO, **kwargs: Any) -> ConfigFile:
+    return Parser(**kwargs).parse_file(fp)
+
+
+def parse_path(
+    path: Union[str, "os.PathLike[str]"],
+    encoding: str = "utf-8",
+    mode: str = "text",
+    **kwargs: Any,
+) -> ConfigFile:
+    return Parser(**kwargs).parse_path(path, encoding=encoding, mode=mode)
@@ -0,0 +1,138 @@
+"""
+Loading, editing and saving many files from asyncio.
+
+Parsing and writing run in an executor (the loop's default thread pool unless
+one is given), so the event loop isn't blocked, and the ``*_many`` functions
+work on at most `limit` files at once.  Files are read in binary mode and saved
+with `ConfigFile.data`, so the encoding, BOM and line endings come back as
+they were.
+"""
+
+import asyncio
+import functools
+import inspect
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from . import parse_path
+from .files import Path, write_if_changed
+from .types import ConfigFile
+
+T = TypeVar("T")
+
+# Files in flight at once, by default
+LIMIT = 32
+
+
+@dataclass
+class EditResult:
+    path: Path
+    # Whether the file was written; unchanged files aren't
+    written: bool = False
+    error: Optional[BaseException] = None
+
+
+async def _run(executor: Optional[Executor], fn: Callable[[], T]) -> T:
+    return await asyncio.get_running_loop().run_in_executor(executor, fn)
+
+
+def _save(conf: ConfigFile, path: Path) -> bool:
+    return write_if_changed(path, conf.data)
+
+
+async def load(
+    path: Path,
+    encoding: str = "utf-8",
+    executor: Optional[Executor] = None,
+    **kwargs: Any,
+) -> ConfigFile:
+    """
+    `parse_path` in binary mode, in `executor`.  Keyword arguments are for the
+    `Parser`.
+    """
+    return await _run(
+        executor, functools.partial(parse_path, path, encoding, "binary", **kwargs)
+    )
+
+
+async def save(
+    conf: ConfigFile, path: Path, executor: Optional[Executor] = None
+) -> bool:
+    """
+    Atomically writes `conf` to `path` unless that's what it already holds, in
+    `executor`.  Returns whether it wrote.
+    """
+    return await _run(executor, functools.partial(_save, conf, path))
+
+
+async def _limited(limit: int, coros: Iterable[Awaitable[T]]) -> List[T]:
+    semaphore = asyncio.Semaphore(limit)
+
+    async def one(coro: Awaitable[T]) -> T:
+        async with semaphore:
+            return await coro
+
+    return await asyncio.gather(*(one(c) for c in coros))
+
+
+async def load_many(
+    paths: Sequence[Path],
+    limit: int = LIMIT,
+    encoding: str = "utf-8",
+    executor: Optional[Executor] = None,
+    **kwargs: Any,
+) -> List[ConfigFile]:
+    """
+    Loads every path, in order; the first error is raised.
+    """
+    return await _limited(limit, (load(p, encoding, executor, **kwargs) for p in paths))
+
+
+async def save_many(
+    items: Iterable[Tuple[Path, ConfigFile]],
+    limit: int = LIMIT,
+    executor: Optional[Executor] = None,
+) -> List[bool]:
+    """
+    Saves each ``(path, conf)``, returning whether each was written.
+    """
+    return await _limited(limit, (save(c, p, executor) for p, c in items))
+
+
+async def edit_many(
+    paths: Sequence[Path],
+    edit: Callable[[ConfigFile], Union[None, Awaitable[None]]],
+    limit: int = LIMIT,
+    encoding: str = "utf-8",
+    executor: Optional[Executor] = None,
+    **kwargs: Any,
+) -> List[EditResult]:
+    """
+    Loads each file, calls (or awaits) `edit` on it, and saves it if the text
+    changed.  An error with one file is recorded in its result and doesn't stop
+    the others.
+    """
+
+    async def one(path: Path) -> EditResult:
+        try:
+            conf = await load(path, encoding, executor, **kwargs)
+            result = edit(conf)
+            if inspect.isawaitable(result):
+                await result
+            return EditResult(path, await save(conf, path, executor))
+        except Exception as e:
+            return EditResult(path, error=e)
+
+    return await _limited(limit, (one(p) for p in paths))
@@ -0,0 +1,262 @@
+"""
+Timing and memory benchmarks for the parse, build, lookup and edit paths.
+
+Corpora are generated from a fixed seed so runs are comparable; `scale` shrinks
+or grows all of them together.
+"""
+
+import configparser
+import gc
+import random
+import string
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from .. import flatten, iter_lines, parse_string, Parser
+from ..types import ConfigFile
+
+# Seconds may vary this much before it's called a regression (run-to-run noise
+# is over 25%); memory is much more stable between runs.
+TIME_TOLERANCE = 0.5
+MEMORY_TOLERANCE = 0.05
+# Smaller changes than these are noise, whatever the ratio
+MIN_SECONDS = 0.005
+MIN_BYTES = 64 * 1024
+
+T = TypeVar("T")
+
+_WORDS = ("alpha", "beta", "gamma", "delta", "name", "version", "path", "url")
+_WHITESPACE = ("", " ", "  ", "\t")
+
+
+@dataclass
+class Measurement:
+    seconds: float
+    peak_bytes: int
+
+
+@dataclass
+class Regression:
+    name: str
+    metric: str
+    baseline: float
+    current: float
+
+
+def _key(rng: random.Random, i: int) -> str:
+    return f"{rng.choice(_WORDS)}_{i}"
+
+
+def _entry(rng: random.Random, i: int, lines: int = 1) -> str:
+    ws = rng.choice(_WHITESPACE)
+    text = f"{_key(rng, i)}{ws}={ws}{rng.choice(_WORDS)} {rng.randrange(10**6)}\n"
+    for _ in range(lines - 1):
+        text += f"    {rng.choice(_WORDS)} = {rng.randrange(10**6)}\n"
+    if rng.random() < 0.1:
+        text = f"# {rng.choice(_WORDS)}\n" + text
+    return text
+
+
+def _file(rng: random.Random, sections: int, entries: int, lines: int = 1) -> str:
+    parts = []
+    for s in range(sections):
+        parts.append(f"\n[{_key(rng, s)}]\n")
+        parts.extend(_entry(rng, i, lines) for i in range(entries))
+    return "".join(parts)
+
+
+def _odd_file(rng: random.Random) -> str:
+    # Along the lines of the strategies in tests/imperfect_hypothesis.py: odd
+    # whitespace, continuation lines and delimiters, kept if configparser can
+    # read it.
+    def ws() -> str:
+        return "".join(rng.choices(string.whitespace, k=rng.randrange(3)))
+
+    def word() -> str:
+        return "".join(rng.choices("ab#;=:[] ", k=rng.randrange(4)))
+
+    while True:
+        lines = []
+        for i in range(rng.randrange(2, 12)):
+            # A section, then at least one entry
+            r = rng.random() if i > 1 else 0.5 * i
+            if r < 0.2:
+                lines.append(f"{ws()}[{ws()}{_key(rng, i)}{ws()}]{ws()}")
+            elif r < 0.8:
+                eq = rng.choice("=:")
+                lines.append(f"{ws()}{_key(rng, i)}{ws()}{eq}{ws()}{word()}{ws()}")
+            else:
+                lines.append(ws() + word())
+        text = "\n".join(lines)
+        try:
+            configparser.RawConfigParser(strict=True).read_string(text)
+        except configparser.Error:
+            continue
+        return text
+
+
+def corpora(scale: float = 1.0, seed: int = 0) -> Dict[str, List[str]]:
+    """
+    Returns name -> the texts of each file in that corpus.
+    """
+    rng = random.Random(seed)
+
+    def n(count: int) -> int:
+        return max(1, int(count * scale))
+
+    return {
+        "small_files": [_file(rng, 3, 5) for _ in range(n(2000))],
+        "huge_file": [_file(rng, n(2000), 20)],
+        "wide_section": [_file(rng, 1, n(50000))],
+        "multiline_values": [_file(rng, n(200), 5, lines=30)],
+        "hypothesis": [_odd_file(rng) for _ in range(n(2000))],
+    }
+
+
+def _names(conf: ConfigFile) -> List[Tuple[str, str]]:
+    return [(s.name, e.key) for s in conf.sections for e in s.entries]
+
+
+def _operations(
+    texts: List[str],
+) -> Dict[str, Tuple[Callable[[], Any], Callable[[Any], object]]]:
+    """
+    Returns op name -> (setup, fn).  Only `fn(setup())` is measured, and setup
+    is called again before each repeat so edits start from the same state.
+    """
+    confs = [parse_string(t) for t in texts]
+    names = [_names(c) for c in confs]
+
+    def parse(texts: List[str]) -> object:
+        return [parse_string(t) for t in texts]
+
+    def parse_lines(texts: List[str]) -> object:
+        # The line-at-a-time path, which files and iterables still use
+        parser = Parser()
+        return [parser.parse_lines(iter_lines(t)) for t in texts]
+
+    def parse_spans(texts: List[str]) -> object:
+        return [parse_string(t, spans=True) for t in texts]
+
+    def build(confs: List[ConfigFile]) -> object:
+        return [c.text for c in confs]
+
+    def edit_build(confs: List[ConfigFile]) -> object:
+        # One edit, then write the whole file, as in an edit-then-save loop
+        for conf, pairs in zip(confs, names):
+            section, key = pairs[len(pairs) // 2]
+            conf.set_value(section, key, "changed")
+            conf.text
+        return None
+
+    def lookup(confs: List[ConfigFile]) -> object:
+        for conf, pairs in zip(confs, names):
+            for section, key in pairs:
+                conf[section][key]
+        return None
+
+    def to_dict(confs: List[ConfigFile]) -> object:
+        return [flatten.to_dict(conf) for conf in confs]
+
+    def set_value(confs: List[ConfigFile]) -> object:
+        for conf, pairs in zip(confs, names):
+            for section, key in pairs[::10]:
+                conf.set_value(section, key, "changed")
+                conf.set_value(section, key + "_new", "added")
+        return None
+
+    def fresh() -> List[ConfigFile]:
+        return [parse_string(t) for t in texts]
+
+    def fresh_spans() -> List[ConfigFile]:
+        return [parse_string(t, spans=True) for t in texts]
+
+    return {
+        "parse": (lambda: texts, parse),
+        "parse_lines": (lambda: texts, parse_lines),
+        "parse_spans": (lambda: texts, parse_spans),
+        "build": (lambda: confs, build),
+        "build_spans": (fresh_spans, build),
+        "edit_build": (fresh, edit_build),
+        "edit_build_spans": (fresh_spans, edit_build),
+        "lookup": (lambda: confs, lookup),
+        "to_dict": (lambda: confs, to_dict),
+        "set_value": (fresh, set_value),
+    }
+
+
+def measure(
+    setup: Callable[[], T], fn: Callable[[T], object], repeat: int = 3
+) -> Measurement:
+    """
+    Best-of-`repeat` wall time, and the peak memory allocated by one more call.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        arg = setup()
+        gc.collect()
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+
+    # Run separately, tracemalloc slows allocation down a lot
+    arg = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(arg)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return Measurement(best, peak)
+
+
+def run(
+    scale: float = 1.0,
+    repeat: int = 3,
+    only: Optional[str] = None,
+    progress: Optional[Callable[[str, Measurement], None]] = None,
+) -> Dict[str, Measurement]:
+    """
+    Returns "corpus/op" -> its measurement, for names containing `only`.
+    """
+    results: Dict[str, Measurement] = {}
+    for corpus, texts in corpora(scale).items():
+        for op, (setup, fn) in _operations(texts).items():
+            name = f"{corpus}/{op}"
+            if only and only not in name:
+                continue
+            results[name] = measure(setup, fn, repeat)
+            if progress:
+                progress(name, results[name])
+    return results
+
+
+def compare(
+    baseline: Dict[str, Measurement],
+    current: Dict[str, Measurement],
+    time_tolerance: float = TIME_TOLERANCE,
+    memory_tolerance: float = MEMORY_TOLERANCE,
+) -> List[Regression]:
+    """
+    Returns the measurements that got worse than `baseline` by more than the
+    tolerance (and the noise floor).  Names only in one of them are ignored.
+    """
+    regressions: List[Regression] = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if cur.seconds > max(
+            base.seconds * (1 + time_tolerance), base.seconds + MIN_SECONDS
+        ):
+            regressions.append(Regression(name, "seconds", base.seconds, cur.seconds))
+        if cur.peak_bytes > max(
+            base.peak_bytes * (1 + memory_tolerance), base.peak_bytes + MIN_BYTES
+        ):
+            regressions.append(
+                Regression(name, "peak_bytes", base.peak_bytes, cur.peak_bytes)
+            )
+    return regressions
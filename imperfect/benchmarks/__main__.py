@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import sys
+from dataclasses import asdict
+from typing import Dict, List, Optional, Tuple
+
+from . import compare, Measurement, MEMORY_TOLERANCE, run, TIME_TOLERANCE
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def _load(path: str) -> Tuple[float, Dict[str, Measurement]]:
+    with open(path) as f:
+        data = json.load(f)
+    results = {k: Measurement(**v) for k, v in data["results"].items()}
+    return data["scale"], results
+
+
+def _save(path: str, scale: float, results: Dict[str, Measurement]) -> None:
+    data = {"scale": scale, "results": {k: asdict(v) for k, v in results.items()}}
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def _report(name: str, m: Measurement) -> None:
+    print(f"{name:32} {m.seconds * 1000:10.1f}ms {m.peak_bytes / 2**20:10.1f}MiB")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m imperfect.benchmarks")
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Corpus size multiplier"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", help="Only run benchmarks containing this")
+    parser.add_argument(
+        "--baseline",
+        default=DEFAULT_BASELINE,
+        help="Compare against this file (default %(default)s)",
+    )
+    parser.add_argument("--save", metavar="PATH", help="Write results here")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = run(args.scale, args.repeat, args.only, progress=_report)
+    regressions = []
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}")
+    else:
+        scale, baseline = _load(args.baseline)
+        if scale != args.scale:
+            print(f"Baseline is for --scale {scale}, not comparing")
+        else:
+            regressions = compare(
+                baseline, results, args.time_tolerance, args.memory_tolerance
+            )
+    for r in regressions:
+        ratio = f" ({r.current / r.baseline:.2f}x)" if r.baseline else ""
+        print(
+            f"REGRESSION {r.name} {r.metric}: {r.baseline:.6g} -> {r.current:.6g}"
+            + ratio
+        )
+
+    # After comparing, so the baseline can be updated in place
+    if args.save:
+        _save(args.save, args.scale, results)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+An on-disk cache of parsed trees, for tools that parse the same files each run.
+
+Entries are keyed by a hash of the content and the parser options, and hold
+only what the span parser (``spans=True``) works out about the text: the
+offsets of every node, and how many entries each section has.  A hit makes the
+nodes straight from those, so the text isn't scanned at all, and the tree
+roundtrips exactly like any span tree.
+
+Files are written to a temporary name and renamed into place, so processes
+sharing a directory only ever see whole entries; anything that doesn't check
+out is treated as a miss.
+"""
+
+import hashlib
+import os
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from . import BytesLike, decode, mapped, opened, Parser
+from .types import ConfigFile, SpanSection, SpanText
+
+# Bump when the offsets change meaning
+VERSION = 1
+MAGIC = b"imperfect-spans\0"
+# Entry counts, offsets, and the crc32 of both
+HEADER = struct.Struct("<QQI")
+SUFFIX = ".spans"
+# Leftovers from a writer that died; live ones are renamed within milliseconds
+TEMP_AGE = 3600.0
+# Between scans of the directory, unless this process's writes may be over
+# the limit; catches entries that got old, and other processes' writes
+PRUNE_INTERVAL = 60.0
+# Parser arguments that don't change what's parsed, and so aren't in the key
+UNKEYED = ("observer",)
+
+
+def default_directory() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "imperfect")
+
+
+class ParseCache:
+    """
+    Parses through a cache directory, evicting the least recently used entries
+    beyond `max_bytes` in total, and any unused for `max_age` seconds.
+
+    Trees always come back as span trees; `lazy` and `spans` are ignored, and
+    `allow_no_value` (which spans don't support) isn't cached.  An `observer` is
+    only called when the text is actually parsed, on a miss.
+
+    The directory is only scanned for eviction when the entries written since
+    the last scan may have taken it over `max_bytes`, or `PRUNE_INTERVAL` has
+    passed; call `prune` to do it sooner.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_age: Optional[float] = None,
+    ) -> None:
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        # As of the last prune, plus what's been written since
+        self._size = 0
+        self._pruned: Optional[float] = None
+
+    def parse_string(self, text: str, **kwargs: Any) -> ConfigFile:
+        return self._parse(text, text.encode("utf-8", "surrogatepass"), None, kwargs)
+
+    def parse_bytes(
+        self, data: BytesLike, encoding: str = "utf-8", **kwargs: Any
+    ) -> ConfigFile:
+        text, bom, codec = decode(data, encoding)
+        root = self._parse(text, data, encoding, kwargs)
+        root.encoding = codec
+        root.bom = bom
+        return root
+
+    def parse_path(
+        self,
+        path: Union[str, "os.PathLike[str]"],
+        encoding: str = "utf-8",
+        mode: str = "text",
+        **kwargs: Any,
+    ) -> ConfigFile:
+        if mode == "binary":
+            with mapped(path) as data:
+                return self.parse_bytes(data, encoding, **kwargs)
+        elif mode != "text":
+            raise ValueError(f"Unknown mode {mode!r}")
+        with opened(path, encoding) as (f, bom, codec):
+            root = self.parse_string(f.read(), **kwargs)
+        root.encoding = codec
+        root.bom = bom
+        return root
+
+    def _parse(
+        self,
+        text: str,
+        data: BytesLike,
+        encoding: Optional[str],
+        kwargs: Dict[str, Any],
+    ) -> ConfigFile:
+        kwargs.pop("lazy", None)
+        kwargs.pop("spans", None)
+        parser = Parser(spans=True, **kwargs)
+        if kwargs.get("allow_no_value"):
+            return parser.parse_string(text)
+
+        h = hashlib.sha256()
+        keyed = sorted((k, v) for k, v in kwargs.items() if k not in UNKEYED)
+        options = (VERSION, sys.byteorder, encoding, keyed)
+        h.update(repr(options).encode())
+        h.update(data)
+        path = os.path.join(self.directory, h.hexdigest() + SUFFIX)
+
+        loaded = self._load(path, text)
+        if loaded is not None:
+            self.hits += 1
+            return loaded
+
+        self.misses += 1
+        root = parser.parse_string(text)
+        if root.sections:
+            spans = root.sections[0]
+            assert isinstance(spans, SpanSection)
+            counts = array("q", [len(s.entries) for s in root.sections])
+            self._store(path, counts, spans._spans.offsets)
+        return root
+
+    def _load(self, path: str, text: str) -> Optional[ConfigFile]:
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        n = len(MAGIC) + HEADER.size
+        if data[: len(MAGIC)] != MAGIC or len(data) < n:
+            return None
+        ncounts, noffsets, crc = HEADER.unpack_from(data, len(MAGIC))
+        if len(data) != n + 8 * (ncounts + noffsets) or zlib.crc32(data[n:]) != crc:
+            return None
+
+        counts = array("q")
+        counts.frombytes(data[n : n + 8 * ncounts])
+        spans = SpanText(text)
+        spans.offsets.frombytes(data[n + 8 * ncounts :])
+        try:
+            # Used, for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return spans.tree(counts)
+
+    def _store(self, path: str, counts: "array[int]", offsets: "array[int]") -> None:
+        payload = counts.tobytes() + offsets.tobytes()
+        header = MAGIC + HEADER.pack(len(counts), len(offsets), zlib.crc32(payload))
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(header + payload)
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except OSError:
+            # The cache is only an optimization
+            return
+        self._size += len(header) + len(payload)
+        if (
+            self._pruned is None
+            or self._size > self.max_bytes
+            or time.monotonic() - self._pruned > PRUNE_INTERVAL
+        ):
+            self.prune()
+
+    def _files(self) -> List[Tuple[float, int, str]]:
+        files = []
+        try:
+            it = os.scandir(self.directory)
+        except OSError:
+            return []
+        with it:
+            for e in it:
+                if e.name.endswith((SUFFIX, ".tmp")):
+                    try:
+                        st = e.stat()
+                    except OSError:
+                        # Removed by someone else
+                        continue
+                    files.append((st.st_mtime, st.st_size, e.path))
+        return files
+
+    def prune(self) -> None:
+        """
+        Evicts entries (oldest use first) until the limits are met.
+        """
+        now = time.time()
+        keep = []
+        for mtime, size, path in sorted(self._files()):
+            age = now - mtime
+            if (self.max_age is not None and age > self.max_age) or (
+                path.endswith(".tmp") and age > TEMP_AGE
+            ):
+                _remove(path)
+            else:
+                keep.append((size, path))
+        total = sum(size for size, _ in keep)
+        for size, path in keep:
+            if total <= self.max_bytes:
+                break
+            _remove(path)
+            total -= size
+        self._size = total
+        self._pruned = time.monotonic()
+
+    def clear(self) -> None:
+        for _, _, path in self._files():
+            _remove(path)
+        self._size = 0
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        # Likely already evicted by another process
+        pass
@@ -0,0 +1,450 @@
+"""
+Structural diffs between two ConfigFile trees, as edit scripts.
+
+Sections, and entries within a section, are matched by case-insensitive name.
+A name that repeats is matched up in order, so each node is known by a `Key`,
+its lowercase name and which occurrence of that name it is.  Everything is done
+with dicts in one pass over each file, except for finding the fewest moves
+(``n log n`` in the number of nodes that moved, and linear when none did).
+
+`merge` is a three-way merge built on these.
+"""
+
+import copy
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import (
+    Dict,
+    Generic,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .types import ConfigEntry, ConfigFile, ConfigSection, SpanEntry, SpanSection
+
+N = TypeVar("N", ConfigSection, ConfigEntry)
+
+# Lowercase name, and how many times it appeared before
+Key = Tuple[str, int]
+
+HEADER = (
+    "leading_whitespace",
+    "leading_square_bracket",
+    "name",
+    "trailing_square_bracket",
+    "trailing_whitespace",
+    "newline",
+)
+
+
+@dataclass
+class AddSection:
+    section: Key
+    new: ConfigSection
+    # Goes first when None
+    after: Optional[Key]
+
+
+@dataclass
+class DeleteSection:
+    section: Key
+    old: ConfigSection
+
+
+@dataclass
+class MoveSection:
+    section: Key
+    after: Optional[Key]
+
+
+@dataclass
+class ChangeSection:
+    # Only the header; entries are changed separately
+    section: Key
+    old: ConfigSection
+    new: ConfigSection
+
+
+@dataclass
+class AddEntry:
+    section: Key
+    key: Key
+    new: ConfigEntry
+    after: Optional[Key]
+
+
+@dataclass
+class DeleteEntry:
+    section: Key
+    key: Key
+    old: ConfigEntry
+
+
+@dataclass
+class MoveEntry:
+    section: Key
+    key: Key
+    after: Optional[Key]
+
+
+@dataclass
+class ChangeEntry:
+    # The value, or anything else about the entry including comments before it
+    section: Key
+    key: Key
+    old: ConfigEntry
+    new: ConfigEntry
+
+
+@dataclass
+class ChangeComments:
+    # (initial_comment, final_comment)
+    old: Tuple[str, str]
+    new: Tuple[str, str]
+
+
+Change = Union[
+    AddSection,
+    DeleteSection,
+    MoveSection,
+    ChangeSection,
+    AddEntry,
+    DeleteEntry,
+    MoveEntry,
+    ChangeEntry,
+    ChangeComments,
+]
+
+
+@dataclass
+class Conflict:
+    change: Change
+    reason: str
+
+
+def keys(names: Iterable[str]) -> List[Key]:
+    seen: Dict[str, int] = {}
+    result: List[Key] = []
+    for name in names:
+        lower = name.lower()
+        n = seen.get(lower, 0)
+        seen[lower] = n + 1
+        result.append((lower, n))
+    return result
+
+
+def _header(section: ConfigSection) -> Tuple[str, ...]:
+    return tuple(getattr(section, f) for f in HEADER)
+
+
+def _comments(conf: ConfigFile) -> Tuple[str, str]:
+    return (conf.initial_comment, conf.final_comment)
+
+
+def _same_text(
+    a: Union[ConfigSection, ConfigEntry], b: Union[ConfigSection, ConfigEntry]
+) -> bool:
+    """
+    Whether `a` and `b` are unchanged span nodes with the same text, which
+    means they're equal without making their fields.
+    """
+    span_types = (SpanSection, SpanEntry)
+    if not (isinstance(a, span_types) and isinstance(b, span_types)):
+        return False
+    ra = a._span_range()
+    rb = b._span_range()
+    if ra is None or rb is None:
+        return False
+    if ra[0] is rb[0] and ra[1:] == rb[1:]:
+        return True
+    return bool(
+        ra[2] - ra[1] == rb[2] - rb[1]
+        and ra[0].text[ra[1] : ra[2]] == rb[0].text[rb[1] : rb[2]]
+    )
+
+
+def _moved(old: Dict[Key, int], new: Sequence[Key]) -> Set[Key]:
+    """
+    Returns the fewest keys in both to move so the others are in `new`'s order.
+    """
+    common = [k for k in new if k in old]
+    positions = [old[k] for k in common]
+    if all(a < b for a, b in zip(positions, positions[1:])):
+        return set()
+
+    # Longest increasing subsequence of positions, which stay put
+    tails: List[int] = []
+    tail_index: List[int] = []
+    previous: List[int] = []
+    for i, p in enumerate(positions):
+        j = bisect_left(tails, p)
+        previous.append(tail_index[j - 1] if j else -1)
+        if j == len(tails):
+            tails.append(p)
+            tail_index.append(i)
+        else:
+            tails[j] = p
+            tail_index[j] = i
+    kept: Set[int] = set()
+    i = tail_index[-1]
+    while i >= 0:
+        kept.add(i)
+        i = previous[i]
+    return {k for i, k in enumerate(common) if i not in kept}
+
+
+def diff(a: ConfigFile, b: ConfigFile) -> List[Change]:
+    """
+    Returns the changes that turn `a` into `b`, in `b`'s order after any
+    deletions.  The changes refer to nodes of both trees rather than copies.
+    """
+    changes: List[Change] = []
+    if _comments(a) != _comments(b):
+        changes.append(ChangeComments(_comments(a), _comments(b)))
+
+    old = dict(zip(keys(s.name for s in a.sections), a.sections))
+    new = keys(s.name for s in b.sections)
+    remaining = set(new)
+    for k, s in old.items():
+        if k not in remaining:
+            changes.append(DeleteSection(k, s))
+
+    moved = _moved({k: i for i, k in enumerate(old)}, new)
+    after: Optional[Key] = None
+    for k, s in zip(new, b.sections):
+        o = old.get(k)
+        if o is None:
+            changes.append(AddSection(k, s, after))
+        else:
+            if k in moved:
+                changes.append(MoveSection(k, after))
+            if _same_text(o, s):
+                pass
+            else:
+                if _header(o) != _header(s):
+                    changes.append(ChangeSection(k, o, s))
+                _diff_entries(k, o, s, changes)
+        after = k
+    return changes
+
+
+def _diff_entries(
+    section: Key, a: ConfigSection, b: ConfigSection, changes: List[Change]
+) -> None:
+    old = dict(zip(keys(e.key for e in a.entries), a.entries))
+    new = keys(e.key for e in b.entries)
+    remaining = set(new)
+    for k, e in old.items():
+        if k not in remaining:
+            changes.append(DeleteEntry(section, k, e))
+
+    moved = _moved({k: i for i, k in enumerate(old)}, new)
+    after: Optional[Key] = None
+    for k, e in zip(new, b.entries):
+        o = old.get(k)
+        if o is None:
+            changes.append(AddEntry(section, k, e, after))
+        else:
+            if k in moved:
+                changes.append(MoveEntry(section, k, after))
+            if not _same_text(o, e) and o != e:
+                changes.append(ChangeEntry(section, k, o, e))
+        after = k
+
+
+class _Nodes(Generic[N]):
+    """
+    A list of sections or entries by key, which puts its changes back in one
+    pass.
+    """
+
+    def __init__(self, nodes: List[N]) -> None:
+        self.nodes: List[N] = nodes
+        self.by_key: Dict[Key, N] = dict(zip(keys(_name(n) for n in nodes), nodes))
+        self.deleted: Set[Key] = set()
+        self.replaced: Dict[Key, N] = {}
+        # Added and moved nodes, in order, by the key they go after
+        self.placed: Dict[Optional[Key], List[Tuple[Key, N]]] = {}
+        self.placed_keys: Set[Key] = set()
+
+    def place(self, key: Key, node: N, after: Optional[Key]) -> None:
+        self.placed.setdefault(after, []).append((key, node))
+        self.placed_keys.add(key)
+
+    def rebuild(self) -> None:
+        if not (self.deleted or self.replaced or self.placed):
+            return
+        result: List[N] = []
+        placed = self.placed
+        replaced = self.replaced
+
+        def emit(key: Optional[Key]) -> None:
+            stack = list(reversed(placed.pop(key, ())))
+            while stack:
+                k, node = stack.pop()
+                result.append(replaced.get(k, node))
+                stack.extend(reversed(placed.pop(k, ())))
+
+        emit(None)
+        for k, node in self.by_key.items():
+            if k in self.deleted or k in self.placed_keys:
+                continue
+            result.append(replaced.get(k, node))
+            emit(k)
+        # After something that isn't there any more
+        for anchor in list(placed):
+            emit(anchor)
+        self.nodes[:] = result
+
+
+def _name(node: Union[ConfigSection, ConfigEntry]) -> str:
+    return node.name if isinstance(node, ConfigSection) else node.key
+
+
+class _Target:
+    """
+    The file a diff is applied to, with its entries by key made on first use.
+    """
+
+    def __init__(self, conf: ConfigFile) -> None:
+        self.conf = conf
+        self.sections = _Nodes(conf.sections)
+        self._entries: Dict[Key, _Nodes[ConfigEntry]] = {}
+
+    def entries(self, section: Key) -> _Nodes[ConfigEntry]:
+        nodes = self._entries.get(section)
+        if nodes is None:
+            s = self.sections.by_key[section]
+            nodes = self._entries[section] = _Nodes(s.entries)
+        return nodes
+
+    def check(self, change: Change) -> Optional[str]:
+        """
+        Returns why `change` conflicts, if it does.
+        """
+        if isinstance(change, ChangeComments):
+            if _comments(self.conf) not in (change.old, change.new):
+                return "comments changed"
+            return None
+
+        s = self.sections.by_key.get(change.section)
+        if isinstance(change, AddSection):
+            if s is not None and s != change.new:
+                return "section already exists"
+            return None
+        elif isinstance(change, DeleteSection):
+            if s is not None and s != change.old:
+                return "section changed"
+            return None
+        elif s is None:
+            if isinstance(change, DeleteEntry):
+                return None
+            return "missing section"
+        elif isinstance(change, MoveSection):
+            return None
+        elif isinstance(change, ChangeSection):
+            if _header(s) not in (_header(change.old), _header(change.new)):
+                return "section header changed"
+            return None
+
+        e = self.entries(change.section).by_key.get(change.key)
+        if isinstance(change, AddEntry):
+            if e is not None and e != change.new:
+                return "key already exists"
+        elif isinstance(change, DeleteEntry):
+            if e is not None and e != change.old:
+                return "key changed"
+        elif e is None:
+            return "missing key"
+        elif isinstance(change, ChangeEntry):
+            if e not in (change.old, change.new):
+                return "key changed"
+        return None
+
+    def apply(self, change: Change) -> None:
+        if isinstance(change, ChangeComments):
+            self.conf.initial_comment, self.conf.final_comment = change.new
+            return
+
+        sections = self.sections
+        current = sections.by_key.get(change.section)
+        if isinstance(change, AddSection):
+            if current is None:
+                sections.place(change.section, copy.deepcopy(change.new), change.after)
+        elif isinstance(change, DeleteSection):
+            if current is not None:
+                sections.deleted.add(change.section)
+        elif current is None:
+            # Deleting an entry from a section that's gone
+            pass
+        elif isinstance(change, MoveSection):
+            sections.place(change.section, current, change.after)
+        elif isinstance(change, ChangeSection):
+            for f in HEADER:
+                setattr(current, f, getattr(change.new, f))
+        else:
+            nodes = self.entries(change.section)
+            e = nodes.by_key.get(change.key)
+            if isinstance(change, AddEntry):
+                if e is None:
+                    nodes.place(change.key, copy.deepcopy(change.new), change.after)
+            elif isinstance(change, DeleteEntry):
+                if e is not None:
+                    nodes.deleted.add(change.key)
+            elif isinstance(change, MoveEntry):
+                assert e is not None
+                nodes.place(change.key, e, change.after)
+            elif e != change.new:
+                nodes.replaced[change.key] = copy.deepcopy(change.new)
+
+    def rebuild(self) -> None:
+        for nodes in self._entries.values():
+            nodes.rebuild()
+        self.sections.rebuild()
+
+
+def apply_diff(
+    changes: Iterable[Change], conf: ConfigFile, partial: bool = False
+) -> List[Conflict]:
+    """
+    Applies `changes` (from `diff`) to `conf`, returning any conflicts.
+
+    A change conflicts when what it changes is different in `conf` from where
+    the diff started, unless it's already the way the change would leave it.
+    Like `Batch.apply`, nothing is changed if there are conflicts unless
+    `partial` is set.  Added nodes are copies.
+    """
+    target = _Target(conf)
+    conflicts: List[Conflict] = []
+    ok: List[Change] = []
+    for change in changes:
+        reason = target.check(change)
+        if reason is None:
+            ok.append(change)
+        else:
+            conflicts.append(Conflict(change, reason))
+    if conflicts and not partial:
+        return conflicts
+
+    for change in ok:
+        target.apply(change)
+    target.rebuild()
+    return conflicts
+
+
+def merge(base: ConfigFile, ours: ConfigFile, theirs: ConfigFile) -> List[Conflict]:
+    """
+    Three-way merge: applies the changes from `base` to `theirs` to `ours`, in
+    place, returning the ones that conflict with changes in `ours`.
+
+    A node changed on only one side is taken from that side, including its
+    whitespace and the comments before it.  Where both sides changed the same
+    node differently, `ours` is left as it was.
+    """
+    return apply_diff(diff(base, theirs), ours, partial=True)
@@ -0,0 +1,214 @@
+"""
+Applying many edits to a ConfigFile at once.
+
+Edits are grouped by section and key first, so each touched section's entries
+are walked only once however many edits there are.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from .types import ConfigEntry, ConfigFile, ConfigSection
+
+
+@dataclass
+class SetValue:
+    section: str
+    key: str
+    value: str
+
+
+@dataclass
+class Delete:
+    section: str
+    # The whole section when None
+    key: Optional[str] = None
+
+
+@dataclass
+class InsertBefore:
+    # Inserted at the end of the section if `before` doesn't exist
+    section: str
+    key: str
+    value: str
+    before: str
+
+
+Edit = Union[SetValue, Delete, InsertBefore]
+
+
+@dataclass
+class Conflict:
+    edit: Edit
+    reason: str
+    # The edit this one disagrees with, if any
+    other: Optional[Edit] = None
+
+
+@dataclass
+class _SectionPlan:
+    name: str
+    delete: Optional[Delete] = None
+    # Lowercase key -> the one edit for it
+    keys: Dict[str, Edit] = field(default_factory=dict)
+
+
+class Batch:
+    """
+    A set of edits that are checked against each other, then applied together.
+
+    Names are case-insensitive and refer to the first match, like `.index`.
+    New entries and sections follow the same whitespace rules as `set_value`.
+    """
+
+    def __init__(self, edits: Optional[List[Edit]] = None) -> None:
+        self.edits: List[Edit] = list(edits or ())
+
+    def set_value(self, section: str, key: str, value: str) -> None:
+        self.edits.append(SetValue(section, key, value))
+
+    def delete(self, section: str, key: Optional[str] = None) -> None:
+        self.edits.append(Delete(section, key))
+
+    def insert_before(self, section: str, key: str, value: str, before: str) -> None:
+        self.edits.append(InsertBefore(section, key, value, before))
+
+    def conflicts(self, conf: ConfigFile) -> List[Conflict]:
+        """
+        Returns the edits that disagree with each other, or with `conf`.
+        """
+        return self._plan(conf)[1]
+
+    def apply(self, conf: ConfigFile, partial: bool = False) -> List[Conflict]:
+        """
+        Applies the edits to `conf`, returning any conflicts.
+
+        If there are conflicts nothing is changed, unless `partial` is set, in
+        which case every edit that doesn't conflict is applied.
+        """
+        plans, conflicts = self._plan(conf)
+        if conflicts and not partial:
+            return conflicts
+
+        deleted: Set[int] = set()
+        for plan in plans.values():
+            try:
+                i = conf.index(plan.name)
+            except KeyError:
+                if not plan.keys:
+                    continue
+                section = ConfigSection.create(plan.name, first=not conf.sections)
+                conf.sections.append(section)
+                _apply_to_section(section, plan)
+                continue
+            if plan.delete:
+                deleted.add(i)
+            else:
+                _apply_to_section(conf.sections[i], plan)
+
+        if deleted:
+            conf.sections[:] = [
+                s for i, s in enumerate(conf.sections) if i not in deleted
+            ]
+        return conflicts
+
+    def _plan(
+        self, conf: Optional[ConfigFile]
+    ) -> Tuple[Dict[str, _SectionPlan], List[Conflict]]:
+        # Without `conf` the edits are only checked against each other
+        plans: Dict[str, _SectionPlan] = {}
+        conflicts: List[Conflict] = []
+        # Edits refused because of `conf`, so a repeat of one is only reported
+        # once, as it is when the edits are only checked against each other
+        refused: Dict[Tuple[str, Optional[str]], List[Edit]] = {}
+
+        def refuse(edit: Edit, reason: str) -> None:
+            key = (edit.section.lower(), edit.key and edit.key.lower())
+            if edit not in refused.setdefault(key, []):
+                refused[key].append(edit)
+                conflicts.append(Conflict(edit, reason))
+
+        for edit in self.edits:
+            plan = plans.get(edit.section.lower())
+            existing: Optional[ConfigSection] = None
+            if conf is not None:
+                try:
+                    existing = conf[edit.section]
+                except KeyError:
+                    pass
+
+            if isinstance(edit, Delete) and edit.key is None:
+                if existing is None and conf is not None:
+                    refuse(edit, "missing section")
+                elif plan is None:
+                    plans[edit.section.lower()] = _SectionPlan(edit.section, edit)
+                elif plan.keys:
+                    other = next(iter(plan.keys.values()))
+                    conflicts.append(Conflict(edit, "section is also edited", other))
+                elif plan.delete is None:
+                    plan.delete = edit
+                continue
+
+            if plan is None:
+                plan = plans[edit.section.lower()] = _SectionPlan(edit.section)
+            elif plan.delete:
+                conflicts.append(Conflict(edit, "section is deleted", plan.delete))
+                continue
+
+            assert edit.key is not None
+            key = edit.key.lower()
+            previous = plan.keys.get(key)
+            if previous is not None:
+                if previous != edit:
+                    conflicts.append(Conflict(edit, "key is already edited", previous))
+                continue
+
+            if conf is None:
+                plan.keys[key] = edit
+                continue
+            present = existing is not None and edit.key in existing
+            if isinstance(edit, Delete) and not present:
+                refuse(edit, "missing key")
+            elif isinstance(edit, InsertBefore) and present:
+                refuse(edit, "key already exists")
+            else:
+                plan.keys[key] = edit
+
+        return plans, conflicts
+
+
+def _apply_to_section(section: ConfigSection, plan: _SectionPlan) -> None:
+    new: Dict[str, ConfigEntry] = {}
+    # Lowercase key to insert before -> lowercase keys of new entries
+    inserts: Dict[str, List[str]] = {}
+    for key, edit in plan.keys.items():
+        if isinstance(edit, InsertBefore):
+            new[key] = ConfigEntry.create(edit.key, edit.value)
+            inserts.setdefault(edit.before.lower(), []).append(key)
+
+    entries: List[ConfigEntry] = []
+    seen: Set[str] = set()
+    for e in section.entries:
+        key = e.key.lower()
+        if key in seen:
+            # Only the first match is edited
+            entries.append(e)
+            continue
+        seen.add(key)
+        for inserted in inserts.pop(key, ()):
+            entries.append(new.pop(inserted))
+        change = plan.keys.get(key)
+        if isinstance(change, Delete):
+            continue
+        elif isinstance(change, SetValue):
+            e.set_value(change.value)
+        entries.append(e)
+
+    # Anything left goes at the end, in the order it was given
+    for key, edit in plan.keys.items():
+        if isinstance(edit, SetValue) and key not in seen:
+            entries.append(ConfigEntry.create(edit.key, edit.value))
+        elif key in new:
+            entries.append(new[key])
+
+    section.entries[:] = entries
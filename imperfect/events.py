@@ -0,0 +1,44 @@
+"""
+Lightweight events produced while parsing, for consumers that don't need a tree.
+
+These are plain tuples of strings; joining the fields of every event in order
+gives back the original text.
+"""
+
+from typing import NamedTuple, Union
+
+
+class WhitespaceEvent(NamedTuple):
+    # Comments, blank lines, and indentation that belong to the next section or
+    # entry (or the end of the file).
+    text: str
+
+
+class SectionEvent(NamedTuple):
+    leading_square_bracket: str
+    name: str
+    trailing_square_bracket: str
+    trailing_whitespace: str
+    newline: str
+
+
+class EntryEvent(NamedTuple):
+    # Always followed by at least one ValueEvent
+    key: str
+    whitespace_before_equals: str
+    equals: str
+    whitespace_before_value: str
+
+
+class ValueEvent(NamedTuple):
+    whitespace_before_text: str
+    text: str
+    whitespace_after_text: str
+    newline: str
+
+
+class EndEvent(NamedTuple):
+    pass
+
+
+Event = Union[WhitespaceEvent, SectionEvent, EntryEvent, ValueEvent, EndEvent]
@@ -0,0 +1,107 @@
+"""
+Writing files so that readers only ever see the old or the new content.
+"""
+
+import contextlib
+import os
+import secrets
+import stat
+from typing import List, Tuple, Union
+
+Path = Union[str, "os.PathLike[str]"]
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """
+    Replaces the file at `path` (or the one it links to) with `data`.
+
+    The data is written to a temporary file in the same directory, synced, and
+    renamed over the original, which keeps its permissions.  New files get the
+    usual permissions for the umask.
+    """
+    path = os.path.realpath(path)
+    directory, name = os.path.split(path)
+    tmp = os.path.join(directory, f".{name}.{secrets.token_hex(4)}.tmp")
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    fd = os.open(tmp, flags, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            pass
+        else:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+# Patches are found and written in blocks of this many bytes
+BLOCK = 4096
+# Patching has to save at least this fraction of the bytes a full write would
+# take, otherwise the file is replaced
+PATCH_RATIO = 0.5
+
+
+def _patches(old: bytes, new: bytes) -> List[Tuple[int, bytes]]:
+    """
+    Returns ``(offset, data)`` for the blocks of `new` that differ from `old`,
+    or for everything after the first difference if the lengths differ.
+    """
+    a = memoryview(old)
+    b = memoryview(new)
+    ranges: List[List[int]] = []
+    for i in range(0, len(new), BLOCK):
+        if a[i : i + BLOCK] != b[i : i + BLOCK]:
+            if len(old) != len(new):
+                return [(i, new[i:])]
+            if ranges and ranges[-1][1] == i:
+                # Next to the last one
+                ranges[-1][1] = i + BLOCK
+            else:
+                ranges.append([i, i + BLOCK])
+    return [(start, new[start:end]) for start, end in ranges]
+
+
+def write_if_changed(path: Path, data: bytes, patch: bool = False) -> bool:
+    """
+    Like `write_atomic`, but leaves the file (and its mtime) alone if it already
+    holds `data`.  Returns whether it wrote.
+
+    With `patch`, a file that only changed in a few places is written in place,
+    only the blocks that differ (or the changed suffix, if the length changed),
+    which is less I/O but means a reader could see it half written.
+    """
+    try:
+        with open(path, "rb") as f:
+            if not patch and os.fstat(f.fileno()).st_size != len(data):
+                # Different sizes don't need reading
+                old = None
+            else:
+                old = f.read()
+    except FileNotFoundError:
+        old = None
+    else:
+        if old == data:
+            return False
+
+    if patch and old is not None:
+        patches = _patches(old, data)
+        if sum(len(p) for _, p in patches) <= len(data) * PATCH_RATIO:
+            with open(path, "r+b") as f:
+                for offset, p in patches:
+                    f.seek(offset)
+                    f.write(p)
+                f.truncate(len(data))
+                f.flush()
+                os.fsync(f.fileno())
+            return True
+
+    write_atomic(path, data)
+    return True
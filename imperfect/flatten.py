@@ -0,0 +1,117 @@
+"""
+Reading every value at once, instead of a key at a time.
+
+These follow the mapping methods: names are as written, and when several
+sections (or keys in a section) differ only in case, the first one wins.
+"""
+
+from dataclasses import dataclass, field
+from typing import cast, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .types import (
+    ConfigEntry,
+    ConfigFile,
+    ConfigSection,
+    SpanEntry,
+    SpanSection,
+    SpanText,
+)
+
+
+@dataclass
+class Table:
+    """
+    One row per value, as a column per field.
+    """
+
+    files: List[str] = field(default_factory=list)
+    sections: List[str] = field(default_factory=list)
+    keys: List[str] = field(default_factory=list)
+    values: List[str] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def rows(self) -> Iterator[Tuple[str, str, str, str]]:
+        return zip(self.files, self.sections, self.keys, self.values)
+
+
+def _sections(conf: ConfigFile) -> Iterator[ConfigSection]:
+    seen: Set[str] = set()
+    for s in conf.sections:
+        name = s.name.lower()
+        if name not in seen:
+            seen.add(name)
+            yield s
+
+
+def _items(section: ConfigSection) -> Iterator[Tuple[str, str]]:
+    if type(section) is SpanSection:
+        r = section._span_range()
+        if r is not None:
+            # Untouched, so every entry is still a SpanEntry; skip the properties
+            return _span_items(section, r[0])
+    return _node_items(section)
+
+
+def _span_items(section: SpanSection, spans: SpanText) -> Iterator[Tuple[str, str]]:
+    text = spans.text
+    o = spans.offsets
+    seen: Set[str] = set()
+    for e in cast(List[SpanEntry], section.entries):
+        s = e._span
+        key = text[o[s + 3] : o[s + 4]]
+        lower = key.lower()
+        if lower in seen:
+            continue
+        seen.add(lower)
+        if o[s] == 1:
+            yield key, text[o[s + 8] : o[s + 9]]
+        else:
+            yield key, e.interpret_value()
+
+
+def _node_items(section: ConfigSection) -> Iterator[Tuple[str, str]]:
+    seen: Set[str] = set()
+    for e in section.entries:
+        key = e.key
+        lower = key.lower()
+        if lower in seen:
+            continue
+        seen.add(lower)
+        if type(e) is ConfigEntry and len(e.value) == 1:
+            # Nothing to join
+            yield key, e.value[0].text
+        else:
+            yield key, e.interpret_value()
+
+
+def to_dict(conf: ConfigFile) -> Dict[str, Dict[str, str]]:
+    """
+    Returns ``{section: {key: value}}`` for the whole file.
+    """
+    return {s.name: dict(_items(s)) for s in _sections(conf)}
+
+
+def to_table(
+    confs: Iterable[Tuple[str, ConfigFile]], table: Optional[Table] = None
+) -> Table:
+    """
+    Adds a row for every value in each ``(filename, conf)`` to `table` (or a new
+    one), for example from ``dict.items()``.
+    """
+    if table is None:
+        table = Table()
+    files = table.files
+    sections = table.sections
+    keys = table.keys
+    values = table.values
+    for filename, conf in confs:
+        for s in _sections(conf):
+            name = s.name
+            for key, value in _items(s):
+                files.append(filename)
+                sections.append(name)
+                keys.append(key)
+                values.append(value)
+    return table
@@ -0,0 +1,434 @@
+"""
+Differential fuzzing against RawConfigParser, and between our own parse paths.
+
+    python -m imperfect.fuzz --time 300 -j 8 --corpus fuzz-corpus
+
+Each worker mutates inputs from the corpus and checks every result: it has to
+roundtrip, parse the same way with `spans`, `lazy`, a line at a time and from
+bytes, and (when RawConfigParser accepts it) have the same sections, keys and
+values.  Inputs that reach a combination of line kinds and outcomes nothing
+has before are added to the corpus, and failures are minimized.  Both are
+written to the corpus directory (failures under ``failures/``), which is
+replayed before anything new is tried, so later runs start where this one
+stopped and old failures are checked first.
+"""
+
+import argparse
+import configparser
+import hashlib
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from . import iter_events, iter_lines, parse_bytes, ParseError, Parser, split_prefix
+from .types import ConfigFile
+
+# Workers report back this often, to share what they've found
+ROUND = 5.0
+
+TOKENS = (
+    " ",
+    "\t",
+    "\n",
+    "\r",
+    "\r\n",
+    "\x0c",
+    "\x1c",
+    "#",
+    ";",
+    "=",
+    ":",
+    "[",
+    "]",
+    "a",
+    "b",
+    "A",
+    "0",
+    "é",
+    "\xa0",
+    "\u2028",
+    "[a]\n",
+    "[DEFAULT]\n",
+    "a = 1\n",
+    "  b\n",
+    "# c\n",
+)
+
+SEEDS = (
+    "",
+    "[a]\nb=1",
+    "[a]\nb = 1\n  2\n\n  3\n# c\n[b]\n",
+    "# top\n[a]\r\nb : 1\r\n;x\r\n",
+    "[\r]\n 0=1",
+    "[0]\n 0=\n [ ]",
+    "[ ]\n0=\n[  ]\n [0]",
+    "[ ]\n0=\n  =\n =",
+)
+
+Shape = List[Tuple[str, List[Tuple[str, str]]]]
+
+
+def _shape(conf: ConfigFile) -> Shape:
+    return [
+        (s.name, [(e.key.lower(), e.interpret_value()) for e in s.entries])
+        for s in conf.sections
+    ]
+
+
+def _strip(value: str) -> str:
+    # configparser strips every line, and the whole value
+    return "\n".join(line.strip() for line in value.split("\n")).strip()
+
+
+def _known_difference(text: str) -> bool:
+    """
+    Whether `text` has something RawConfigParser is known to read differently:
+    whitespace that isn't ASCII, which it strips, and sections with more than
+    one ``]``, whose names it takes up to the last one (see "A note on
+    formats" in the README).
+    """
+    if any(c.isspace() and not c.isascii() for c in text):
+        return True
+    return any(
+        line.lstrip().startswith("[") and line.count("]") > 1
+        for line in text.split("\n")
+    )
+
+
+def _parse(parse: Callable[[str], ConfigFile], text: str) -> Optional[ConfigFile]:
+    try:
+        return parse(text)
+    except ParseError:
+        return None
+
+
+# Other ways of parsing, which should all agree with parse_string
+PATHS: Dict[str, Callable[[str], ConfigFile]] = {
+    "spans": Parser(spans=True).parse_string,
+    "lazy": Parser(lazy=True).parse_string,
+    "lines": lambda text: Parser().parse_lines(iter_lines(text)),
+    "bytes": lambda text: parse_bytes(text.encode("utf-8")),
+}
+
+
+def check(text: str) -> Optional[str]:
+    """
+    Returns what's wrong with how `text` is parsed, or None.
+    """
+    try:
+        conf = _parse(Parser().parse_string, text)
+        if conf is not None and conf.text != text:
+            return "roundtrip"
+        shape = None if conf is None else _shape(conf)
+        for name, parse in PATHS.items():
+            other = _parse(parse, text)
+            if other is None or conf is None:
+                if other is not conf:
+                    return f"{name} disagrees"
+            elif other.text != text or _shape(other) != shape:
+                return f"{name} differs"
+        try:
+            joined: Optional[str] = "".join("".join(e) for e in iter_events(text))
+        except ParseError:
+            joined = None
+        if joined != (None if conf is None else text):
+            return "events"
+    except Exception as e:
+        return f"crash {type(e).__name__}"
+
+    if _known_difference(text):
+        return None
+    # No section is named "\n", so there's no default section to merge in
+    rcp = configparser.RawConfigParser(strict=True, default_section="\n")
+    try:
+        rcp.read_string(text)
+    except Exception:
+        return None
+    if shape is None:
+        return "rejected"
+    theirs = [(s, rcp.items(s)) for s in rcp.sections()]
+    if [s for s, _ in shape] != [s for s, _ in theirs]:
+        return "section names"
+    for (_, ours), (_, items) in zip(shape, theirs):
+        if [k for k, _ in ours] != [k for k, _ in items]:
+            return "keys"
+        if [_strip(v) for _, v in ours] != [_strip(v) for _, v in items]:
+            return "values"
+    return None
+
+
+def features(text: str, failure: Optional[str]) -> FrozenSet[str]:
+    """
+    Pairs of adjacent line kinds, and the outcome; new ones make an input
+    interesting.
+    """
+    found = {f"outcome {failure}"}
+    prev = "start"
+    for line in iter_lines(text):
+        ws, rest, _, _ = split_prefix(line)
+        if not rest:
+            kind = "blank"
+        elif rest[0] in "#;":
+            kind = "comment"
+        elif rest[0] == "[":
+            kind = "section"
+        elif "=" in rest or ":" in rest:
+            kind = "entry"
+        else:
+            kind = "other"
+        kind += " indented" if ws else ""
+        # Including any "\r", which is whitespace
+        kind += " " + repr(line[len(line.rstrip("\r\n")) :])
+        found.add(f"{prev} -> {kind}")
+        prev = kind
+    return frozenset(found)
+
+
+def mutate(rng: random.Random, text: str, corpus: Sequence[str]) -> str:
+    for _ in range(rng.randint(1, 4)):
+        i = rng.randint(0, len(text))
+        j = min(len(text), i + rng.randint(1, 8))
+        op = rng.randrange(5)
+        if op == 0:
+            text = text[:i] + rng.choice(TOKENS) + text[i:]
+        elif op == 1:
+            text = text[:i] + text[j:]
+        elif op == 2:
+            text = text[:i] + rng.choice(TOKENS) + text[j:]
+        elif op == 3:
+            # Some of another input
+            other = rng.choice(corpus)
+            k = rng.randint(0, len(other))
+            text = text[:i] + other[k : k + rng.randint(1, 32)] + text[i:]
+        else:
+            lines = list(iter_lines(text))
+            if lines:
+                lines.insert(rng.randint(0, len(lines)), rng.choice(lines))
+            text = "".join(lines)
+    return text
+
+
+def minimize(text: str, failure: str) -> str:
+    """
+    A smaller input that fails the same way: lines and then characters are
+    removed, in halves down to one at a time, while it still does.
+    """
+    for split in (lambda t: list(iter_lines(t)), list):
+        parts: List[str] = split(text)
+        n = max(1, len(parts) // 2)
+        while n:
+            i = 0
+            while i < len(parts):
+                candidate = "".join(parts[:i] + parts[i + n :])
+                if check(candidate) == failure:
+                    parts = parts[:i] + parts[i + n :]
+                else:
+                    i += n
+            n //= 2
+        text = "".join(parts)
+    return text
+
+
+@dataclass
+class Found:
+    text: str
+    features: FrozenSet[str]
+    # And minimized, if it failed
+    failure: Optional[str] = None
+    minimized: Optional[str] = None
+
+
+@dataclass
+class Report:
+    executions: int = 0
+    # Inputs that failed on replay
+    replayed: List[Found] = field(default_factory=list)
+    # New this run
+    corpus: List[Found] = field(default_factory=list)
+    failures: List[Found] = field(default_factory=list)
+
+
+def _examine(text: str) -> Found:
+    failure = check(text)
+    found = Found(text, features(text, failure), failure)
+    if failure is not None:
+        found.minimized = minimize(text, failure)
+    return found
+
+
+def _work(
+    seed: int, corpus: List[str], seen: FrozenSet[str], seconds: float
+) -> Tuple[int, List[Found]]:
+    rng = random.Random(seed)
+    deadline = time.monotonic() + seconds
+    corpus = list(corpus)
+    known = set(seen)
+    found = []
+    # Minimized, like `run` does; the same kind of failure can be another bug
+    failures: Set[str] = set()
+    executions = 0
+    while time.monotonic() < deadline:
+        text = mutate(rng, rng.choice(corpus), corpus)
+        failure = check(text)
+        executions += 1
+        new = features(text, failure) - known
+        minimized = None if failure is None else minimize(text, failure)
+        if minimized is not None and minimized not in failures:
+            failures.add(minimized)
+            found.append(Found(text, new, failure, minimized))
+        elif new:
+            found.append(Found(text, new))
+        else:
+            continue
+        known |= new
+        corpus.append(text)
+    return executions, found
+
+
+class Corpus:
+    """
+    Inputs saved one per file, named by their hash.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.failures = os.path.join(directory, "failures")
+
+    def load(self) -> List[str]:
+        texts = []
+        for d in (self.failures, self.directory):
+            try:
+                names = sorted(os.listdir(d))
+            except FileNotFoundError:
+                continue
+            for name in names:
+                if name.endswith(".ini"):
+                    with open(os.path.join(d, name), encoding="utf-8", newline="") as f:
+                        texts.append(f.read())
+        return texts
+
+    def save(self, text: str, failure: bool = False) -> str:
+        d = self.failures if failure else self.directory
+        os.makedirs(d, exist_ok=True)
+        name = hashlib.sha1(text.encode("utf-8")).hexdigest()[:16] + ".ini"
+        path = os.path.join(d, name)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        return path
+
+
+def run(
+    directory: str,
+    seconds: float,
+    jobs: int = 1,
+    seed: Optional[int] = None,
+    report: Optional[Callable[[Found], None]] = None,
+) -> Report:
+    """
+    Replays the corpus in `directory`, then fuzzes for `seconds` in `jobs`
+    processes, saving what's found.  `report` is called with each failure as
+    it's found.
+    """
+    corpus = Corpus(directory)
+    rng = random.Random(seed)
+    result = Report()
+    texts = list(dict.fromkeys(corpus.load() + list(SEEDS)))
+    seen: Set[str] = set()
+    # Minimized failures, which are often found more than once
+    failed: Set[str] = set()
+
+    executor = ProcessPoolExecutor(jobs) if jobs > 1 else None
+    mapper = executor.map if executor else map
+    try:
+        for found in mapper(_examine, texts):
+            result.executions += 1
+            seen |= found.features
+            if found.failure is not None:
+                assert found.minimized is not None
+                if found.minimized in failed:
+                    continue
+                failed.add(found.minimized)
+                result.replayed.append(found)
+                if report:
+                    report(found)
+
+        deadline = time.monotonic() + seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            args = [
+                (rng.getrandbits(64), texts, frozenset(seen), min(ROUND, remaining))
+                for _ in range(jobs)
+            ]
+            for executions, new in mapper(_work, *zip(*args)):
+                result.executions += executions
+                for f in new:
+                    if f.failure is None and not f.features - seen:
+                        # Another worker got there first
+                        continue
+                    seen |= f.features
+                    texts.append(f.text)
+                    corpus.save(f.text)
+                    if f.failure is None:
+                        result.corpus.append(f)
+                        continue
+                    assert f.minimized is not None
+                    if f.minimized in failed:
+                        continue
+                    failed.add(f.minimized)
+                    corpus.save(f.minimized, failure=True)
+                    result.failures.append(f)
+                    if report:
+                        report(f)
+    finally:
+        if executor:
+            executor.shutdown()
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m imperfect.fuzz",
+        description="Fuzz the parser against RawConfigParser and itself.",
+    )
+    parser.add_argument(
+        "--corpus",
+        default="fuzz-corpus",
+        help="Directory of saved inputs (default fuzz-corpus)",
+    )
+    parser.add_argument(
+        "--time",
+        type=float,
+        default=60.0,
+        help="Seconds to fuzz for after replaying the corpus (default 60)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of worker processes (default all CPUs)",
+    )
+    parser.add_argument("--seed", type=int, help="For a repeatable run, with -j1")
+    args = parser.parse_args(argv)
+
+    def show(found: Found) -> None:
+        print(f"{found.failure}: {found.minimized!r}", flush=True)
+
+    result = run(args.corpus, args.time, args.jobs, args.seed, show)
+    print(
+        f"{result.executions} executions, {len(result.corpus)} new inputs, "
+        f"{len(result.replayed)} failed on replay, {len(result.failures)} new "
+        "failures"
+    )
+    # 0 if nothing failed, 1 if anything did (2 is argparse's usage error)
+    return 1 if result.replayed or result.failures else 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
@@ -0,0 +1,353 @@
+"""
+configparser's ``%(name)s`` and ``${section:key}`` interpolation over a tree.
+
+Every value's references are parsed once, into a graph from each key (as read
+in a section, since the same default can refer to different keys in each) to
+the keys it refers to.  Values are expanded at most once until something they
+depend on is edited, and every key is checked when the graph is built, so a
+missing reference, bad syntax, a cycle or a chain deeper than `MAX_DEPTH` is in
+`errors` before anything is read.  The errors are configparser's, with the
+same arguments it would give (a cycle is an `InterpolationDepthError` there
+too).
+
+Names are case-insensitive and the first match wins, like the mapping methods,
+so unlike configparser, section names in ``${section:key}`` are too.  The
+default section's keys can be read from every section, like configparser's.
+"""
+
+import re
+from configparser import (
+    InterpolationDepthError,
+    InterpolationError,
+    InterpolationMissingOptionError,
+    InterpolationSyntaxError,
+)
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+from .types import ConfigFile, ConfigSection
+
+# configparser.MAX_INTERPOLATION_DEPTH
+MAX_DEPTH = 10
+
+# (lowercase section, lowercase key), for the key as read in that section
+Node = Tuple[str, str]
+
+
+@dataclass(slots=True)
+class _Ref:
+    node: Node
+    # As written, for errors
+    name: str
+
+
+@dataclass(slots=True)
+class _Bad:
+    message: str
+
+
+Part = Union[str, _Ref, _Bad]
+
+# What went wrong, and where: the error type, section, key, and a reference
+# or message
+Failure = Tuple[type, str, str, str]
+
+
+class BasicInterpolation:
+    """
+    Reads values from `conf` with ``%(name)s`` references expanded, like
+    ``configparser.BasicInterpolation``.
+
+    Edits made through `set_value` are noticed; after editing the tree
+    directly, call `invalidate` with the section (and key) that changed.
+    """
+
+    # The character that starts a reference
+    _marker = "%"
+    _KEYCRE = re.compile(r"%\(([^)]+)\)s")
+    # Whether errors are about the key where they happen, or the one being read
+    _nested_errors = False
+
+    def __init__(self, conf: ConfigFile, default_section: str = "DEFAULT") -> None:
+        self.conf = conf
+        self.default_section = default_section.lower()
+        # What `get` would raise for each key that has a problem
+        self.errors: Dict[Node, InterpolationError] = {}
+        # None when the key doesn't exist
+        self._parts: Dict[Node, Optional[List[Part]]] = {}
+        self._dependents: Dict[Node, Set[Node]] = {}
+        self._values: Dict[Node, str] = {}
+        self._failures: Dict[Tuple[Node, int], Optional[Failure]] = {}
+        self._names: Dict[str, str] = {}
+
+        self._known = self._sections()
+        for s in self._known:
+            self._check_section(s)
+
+    def _sections(self) -> Set[str]:
+        seen = set()
+        for s in self.conf.sections:
+            lower = s.name.lower()
+            self._names.setdefault(lower, s.name)
+            seen.add(lower)
+        return seen
+
+    def _check_section(self, section: str) -> None:
+        for key in self._keys(section):
+            self._check((section, key))
+
+    def _keys(self, section: str) -> List[str]:
+        keys: Dict[str, None] = {}
+        for name in (self.default_section, section):
+            s = self._section(name)
+            if s is not None:
+                keys.update(dict.fromkeys(s.keys()))
+        return list(keys)
+
+    def _section(self, name: str) -> Optional[ConfigSection]:
+        try:
+            return self.conf[name]
+        except KeyError:
+            return None
+
+    def _raw(self, node: Node) -> Optional[str]:
+        section, key = node
+        for name in (section, self.default_section):
+            s = self._section(name)
+            if s is not None:
+                try:
+                    return s[key]
+                except KeyError:
+                    pass
+            elif name != self.default_section:
+                # configparser only has defaults for sections that exist
+                return None
+        return None
+
+    def _node_parts(self, node: Node) -> Optional[List[Part]]:
+        try:
+            return self._parts[node]
+        except KeyError:
+            pass
+        raw = self._raw(node)
+        parts = None if raw is None else self._parse(node[0], raw)
+        self._parts[node] = parts
+        for p in parts or ():
+            if isinstance(p, _Ref):
+                self._dependents.setdefault(p.node, set()).add(node)
+        return parts
+
+    def _parse(self, section: str, rest: str) -> List[Part]:
+        parts: List[Part] = []
+        while rest:
+            p = rest.find("%")
+            if p < 0:
+                parts.append(rest)
+                break
+            if p > 0:
+                parts.append(rest[:p])
+                rest = rest[p:]
+            c = rest[1:2]
+            if c == "%":
+                parts.append("%")
+                rest = rest[2:]
+            elif c == "(":
+                m = self._KEYCRE.match(rest)
+                if m is None:
+                    parts.append(_Bad("bad interpolation variable reference %r" % rest))
+                    break
+                name = m.group(1).lower()
+                parts.append(_Ref((section, name), name))
+                rest = rest[m.end() :]
+            else:
+                parts.append(
+                    _Bad("'%%' must be followed by '%%' or '(', found: %r" % (rest,))
+                )
+                break
+        return parts
+
+    def _name(self, section: str) -> str:
+        return self._names.get(section, section)
+
+    def _fail(self, node: Node, depth: int) -> Optional[Failure]:
+        """
+        What reading `node` at `depth` would raise first, if anything.
+        """
+        try:
+            return self._failures[node, depth]
+        except KeyError:
+            pass
+        section, key = node
+        where = (self._name(section), key)
+        result: Optional[Failure] = None
+        if depth > MAX_DEPTH:
+            result = (InterpolationDepthError, *where, "")
+        else:
+            for p in self._node_parts(node) or ():
+                if isinstance(p, _Bad):
+                    result = (InterpolationSyntaxError, *where, p.message)
+                elif isinstance(p, _Ref):
+                    raw = self._raw(p.node)
+                    if raw is None:
+                        result = (InterpolationMissingOptionError, *where, p.name)
+                    elif self._marker in raw:
+                        result = self._fail(p.node, depth + 1)
+                if result is not None:
+                    break
+        self._failures[node, depth] = result
+        return result
+
+    def _error(self, node: Node, failure: Failure) -> InterpolationError:
+        kind, section, key, detail = failure
+        if not self._nested_errors:
+            section, key = self._name(node[0]), node[1]
+        raw = self._raw((section.lower(), key)) or ""
+        if kind is InterpolationDepthError:
+            return InterpolationDepthError(key, section, raw)
+        elif kind is InterpolationMissingOptionError:
+            return InterpolationMissingOptionError(key, section, raw, detail)
+        return InterpolationSyntaxError(key, section, detail)
+
+    def _check(self, node: Node) -> None:
+        self.errors.pop(node, None)
+        failure = self._fail(node, 1)
+        if failure is not None:
+            self.errors[node] = self._error(node, failure)
+
+    def _value(self, node: Node) -> str:
+        try:
+            return self._values[node]
+        except KeyError:
+            pass
+        buf = []
+        for p in self._node_parts(node) or ():
+            if isinstance(p, str):
+                buf.append(p)
+            else:
+                # Checked already, so not _Bad
+                assert isinstance(p, _Ref)
+                buf.append(self._value(p.node))
+        value = self._values[node] = "".join(buf)
+        return value
+
+    def get(self, section: str, key: str) -> str:
+        """
+        The expanded value, or the default section's if `section` doesn't have
+        `key`.  Raises `KeyError` if neither does, or the `InterpolationError`
+        configparser would.
+        """
+        node = (section.lower(), key.lower())
+        self._names.setdefault(node[0], section)
+        if self._raw(node) is None:
+            raise KeyError(key)
+        failure = self._fail(node, 1)
+        if failure is not None:
+            raise self._error(node, failure)
+        return self._value(node)
+
+    def set_value(self, section: str, key: str, value: str) -> None:
+        """
+        `ConfigFile.set_value`, then `invalidate`.
+        """
+        self.conf.set_value(section, key, value)
+        self.invalidate(section, key)
+
+    def invalidate(self, section: str, key: Optional[str] = None) -> None:
+        """
+        Forgets what was worked out from `key` in `section` (or the whole
+        section), and from the keys that refer to it, and checks them again.
+        """
+        section = section.lower()
+        self._names.pop(section, None)
+        current = self._sections()
+        # A section coming or going changes every key read in it
+        changed = current ^ self._known
+        # Including ones that are only referred to
+        nodes = self._parts.keys() | self._dependents.keys()
+        if section == self.default_section:
+            sections = current | {s for s, k in nodes}
+        else:
+            sections = {section}
+        start = {
+            node
+            for node in nodes
+            if node[0] in changed
+            or (node[0] in sections and (key is None or node[1] == key.lower()))
+        }
+        if key is not None:
+            start.update((s, key.lower()) for s in sections)
+
+        affected: Set[Node] = set()
+        todo = list(start)
+        while todo:
+            node = todo.pop()
+            if node in affected:
+                continue
+            affected.add(node)
+            todo.extend(self._dependents.get(node, ()))
+
+        for node in affected:
+            # Only the changed keys' references can be different
+            if node in start:
+                for p in self._parts.pop(node, None) or ():
+                    if isinstance(p, _Ref):
+                        self._dependents[p.node].discard(node)
+            self._values.pop(node, None)
+            for depth in range(1, MAX_DEPTH + 2):
+                self._failures.pop((node, depth), None)
+        for node in affected:
+            self.errors.pop(node, None)
+            if self._raw(node) is not None:
+                self._check(node)
+        # New sections have all the defaults
+        for s in current - self._known:
+            self._check_section(s)
+        self._known = current
+
+
+class ExtendedInterpolation(BasicInterpolation):
+    """
+    Like `BasicInterpolation`, with ``${key}`` and ``${section:key}`` like
+    ``configparser.ExtendedInterpolation``.
+    """
+
+    _marker = "$"
+    _KEYCRE = re.compile(r"\$\{([^}]+)\}")
+    _nested_errors = True
+
+    def _parse(self, section: str, rest: str) -> List[Part]:
+        parts: List[Part] = []
+        while rest:
+            p = rest.find("$")
+            if p < 0:
+                parts.append(rest)
+                break
+            if p > 0:
+                parts.append(rest[:p])
+                rest = rest[p:]
+            c = rest[1:2]
+            if c == "$":
+                parts.append("$")
+                rest = rest[2:]
+            elif c == "{":
+                m = self._KEYCRE.match(rest)
+                if m is None:
+                    parts.append(_Bad("bad interpolation variable reference %r" % rest))
+                    break
+                path = m.group(1).split(":")
+                rest = rest[m.end() :]
+                if len(path) == 1:
+                    node = (section, path[0].lower())
+                elif len(path) == 2:
+                    node = (path[0].lower(), path[1].lower())
+                    self._names.setdefault(node[0], path[0])
+                else:
+                    parts.append(_Bad("More than one ':' found: %r" % (rest,)))
+                    break
+                parts.append(_Ref(node, ":".join(path)))
+            else:
+                parts.append(
+                    _Bad("'$' must be followed by '$' or '{', found: %r" % (rest,))
+                )
+                break
+        return parts
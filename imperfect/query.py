@@ -0,0 +1,220 @@
+"""
+Selecting sections and entries by name pattern, and optionally value.
+
+A selector is written like the lines it matches::
+
+    [env:*]                     sections
+    [env:*] *_timeout           entries in them
+    [env:*] *_timeout = 3?      entries whose value matches too
+    [/env:\\d+/] /.*_(ms|s)/     regular expressions between slashes
+
+Names are matched case-insensitively and values case-sensitively; globs and
+regular expressions must match all of the string.  Like the mapping methods,
+only the first of several sections (or keys in a section) that differ only in
+case is seen.  A literal name is looked up in the list's name index, and a
+pattern is matched once per distinct name in it, so queries over trees that
+have been queried before don't need to look at every node.
+"""
+
+import fnmatch
+import re
+from dataclasses import dataclass
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .types import ConfigEntry, ConfigFile, ConfigSection, IndexedList
+
+N = TypeVar("N", ConfigSection, ConfigEntry)
+
+NamePattern = Union[str, Pattern[str]]
+ValuePattern = Union[str, Pattern[str], Callable[[str], bool]]
+
+_MAGIC = re.compile(r"[*?\[]")
+
+
+@dataclass(slots=True)
+class Match:
+    conf: ConfigFile
+    section: ConfigSection
+    # None when the selector has no key
+    entry: Optional[ConfigEntry] = None
+
+
+# Names whose result a pattern remembers
+CACHE_SIZE = 4096
+
+
+class _Name:
+    __slots__ = ("literal", "regex", "_cache")
+
+    def __init__(self, pattern: NamePattern) -> None:
+        self.literal: Optional[str] = None
+        self.regex: Optional[Pattern[str]] = None
+        # Lowercase name -> whether it matches, since names repeat across files
+        self._cache: Dict[str, bool] = {}
+        if not isinstance(pattern, str):
+            self.regex = re.compile(pattern.pattern, pattern.flags | re.IGNORECASE)
+        elif _MAGIC.search(pattern):
+            self.regex = re.compile(fnmatch.translate(pattern.lower()))
+        else:
+            self.literal = pattern.lower()
+
+    def find(self, items: List[N]) -> List[N]:
+        if self.literal is not None and isinstance(items, IndexedList):
+            i = items.find(self.literal)
+            return [items[i]] if i >= 0 else []
+
+        if isinstance(items, IndexedList):
+            # One per name, and the first
+            return [
+                items[i] for lower, i in items._index().items() if self.matches(lower)
+            ]
+
+        found = []
+        seen: Set[str] = set()
+        for item in items:
+            lower = _name(item).lower()
+            if lower in seen:
+                continue
+            seen.add(lower)
+            if self.matches(lower):
+                found.append(item)
+        return found
+
+    def matches(self, lower: str) -> bool:
+        if self.regex is None:
+            return lower == self.literal
+        try:
+            return self._cache[lower]
+        except KeyError:
+            if len(self._cache) >= CACHE_SIZE:
+                self._cache.clear()
+            result = self._cache[lower] = self.regex.fullmatch(lower) is not None
+            return result
+
+
+def _name(node: Union[ConfigSection, ConfigEntry]) -> str:
+    return node.name if isinstance(node, ConfigSection) else node.key
+
+
+def _value_predicate(pattern: ValuePattern) -> Callable[[str], bool]:
+    if isinstance(pattern, str):
+        regex = re.compile(fnmatch.translate(pattern))
+        return lambda value: regex.fullmatch(value) is not None
+    elif isinstance(pattern, re.Pattern):
+        return lambda value: pattern.fullmatch(value) is not None
+    return pattern
+
+
+class Selector:
+    """
+    A compiled selector, which can be run against any number of trees.
+
+    `section` and `key` are globs or compiled regular expressions.  Without a
+    `key` this selects sections.  `value` is a glob, a regular expression, or a
+    function of the interpreted value.
+    """
+
+    def __init__(
+        self,
+        section: NamePattern = "*",
+        key: Optional[NamePattern] = None,
+        value: Optional[ValuePattern] = None,
+    ) -> None:
+        if key is None and value is not None:
+            raise ValueError("A value needs a key")
+        self._section = _Name(section)
+        self._key = None if key is None else _Name(key)
+        self._value = None if value is None else _value_predicate(value)
+
+    def run(self, conf: ConfigFile) -> List[Match]:
+        """
+        Returns the matches in `conf`, in order.  They're found before any are
+        returned, so editing the tree while going through them is fine.
+        """
+        sections = self._section.find(conf.sections)
+        if self._key is None:
+            return [Match(conf, s) for s in sections]
+
+        matches = []
+        value = self._value
+        for s in sections:
+            for e in self._key.find(s.entries):
+                if value is None or value(e.interpret_value()):
+                    matches.append(Match(conf, s, e))
+        return matches
+
+    def run_many(
+        self, confs: Iterable[Tuple[str, ConfigFile]]
+    ) -> List[Tuple[str, Match]]:
+        """
+        Runs against each ``(filename, conf)``, like `to_table`.
+        """
+        return [(name, m) for name, conf in confs for m in self.run(conf)]
+
+
+def _pattern(text: str) -> NamePattern:
+    text = text.strip()
+    if len(text) >= 2 and text[0] == "/" and text[-1] == "/":
+        return re.compile(text[1:-1])
+    return text
+
+
+def compile(selector: str) -> Selector:
+    """
+    Makes a `Selector` from its text form, described above.
+    """
+    text = selector.strip()
+    if not text.startswith("["):
+        raise ValueError(f"Selector must start with a section: {selector!r}")
+
+    # The "]" that closes the section, skipping glob character classes or a
+    # regular expression
+    if text.startswith("[/"):
+        end = text.find("/]", 2)
+        end = -1 if end < 0 else end + 1
+    else:
+        depth = 0
+        for end, c in enumerate(text):
+            if c == "[":
+                depth += 1
+            elif c == "]":
+                depth -= 1
+                if depth == 0:
+                    break
+        else:
+            end = -1
+    if end < 0:
+        raise ValueError(f"Unclosed section in selector: {selector!r}")
+
+    section = _pattern(text[1:end])
+    rest = text[end + 1 :].strip()
+    if not rest:
+        return Selector(section)
+
+    value: Optional[ValuePattern] = None
+    if rest.startswith("/"):
+        # The key can contain "=" here
+        close = rest.find("/", 1)
+        if close < 0:
+            raise ValueError(f"Unclosed key in selector: {selector!r}")
+        key, after = rest[: close + 1], rest[close + 1 :].strip()
+        if after:
+            if not after.startswith("="):
+                raise ValueError(f"Expected '=' in selector: {selector!r}")
+            value = _pattern(after[1:])
+    else:
+        key, equals, after = rest.partition("=")
+        if equals:
+            value = _pattern(after)
+    return Selector(section, _pattern(key), value)
@@ -0,0 +1,41 @@
+"""
+What a parse did, for ``Parser(observer=...)``.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class ParseStats:
+    """
+    Counts and times (in seconds) for one call to a `Parser` method.
+
+    The scanner finds line ends, splits off whitespace, and matches sections and
+    entries in one pass, so those are timed together as `scan_time`; with
+    `observer` the nodes are built from its saved results afterwards, so
+    `build_time` is only node construction.  A lazy parse only scans for section
+    headers, and counts nothing else.
+    """
+
+    # Of the decoded text
+    chars: int = 0
+    # For `parse_bytes` and binary `parse_path`, including any BOM
+    bytes: int = 0
+    lines: int = 0
+    sections: int = 0
+    entries: int = 0
+    # Value lines after an entry's first
+    continuation_lines: int = 0
+    # Lines starting with a comment prefix (after whitespace), including any
+    # that are continuation lines
+    comment_lines: int = 0
+    # Sections, entries, and value lines made, which span trees leave until
+    # they're needed
+    nodes: int = 0
+    # Memory still allocated afterwards, when `tracemalloc` is tracing
+    allocated: Optional[int] = None
+
+    decode_time: float = 0.0
+    scan_time: float = 0.0
+    build_time: float = 0.0
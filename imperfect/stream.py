@@ -0,0 +1,208 @@
+"""
+Applying a `Batch` to a file as it's copied, without building a tree.
+
+Only the comments and blank lines waiting for the next section or entry, and an
+entry that's being changed, are held at a time, so memory doesn't grow with
+the size of the file.  The exception is `InsertBefore`: the key could still
+turn up later in the section, so from the insertion point to the end of that
+section is kept in memory.  The output is what ``Batch.apply(conf,
+partial=True)`` would leave, with the same whitespace rules for new entries
+and sections.
+
+Whether a section or key exists is only known once the text has gone past, so
+edits are only checked against each other up front.  An edit that conflicts
+with another edit for a section that turns out to be missing is refused, where
+`Batch` would have applied it.
+"""
+
+import io
+from typing import Any, Dict, Iterable, List, Optional, Set, TextIO, Tuple
+
+from . import Parser
+from .edits import _SectionPlan, Batch, Conflict, Delete, InsertBefore, SetValue
+from .events import EntryEvent, SectionEvent, ValueEvent, WhitespaceEvent
+from .types import ConfigEntry, ConfigSection, ValueLine
+
+
+class _Rewriter:
+    def __init__(self, plans: Dict[str, _SectionPlan], dst: TextIO) -> None:
+        self.plans = plans
+        self.dst = dst
+        self.conflicts: List[Conflict] = []
+        self.had_section = False
+        # The section being copied, if it has edits
+        self.plan: Optional[_SectionPlan] = None
+        self.skipping = False
+        # Lowercase keys seen in the section
+        self.seen: Set[str] = set()
+        # Lowercase key to insert before -> edits, for the current section
+        self.inserts: Dict[str, List[InsertBefore]] = {}
+        # Once an entry has been inserted, the rest of the section goes to a
+        # buffer (and the real output here), since the key could still turn up
+        self.out: Optional[TextIO] = None
+        self.buffer: Optional[io.StringIO] = None
+        # Offsets in the buffer, and what goes there
+        self.held: List[Tuple[int, InsertBefore]] = []
+        # The entry whose value is being replaced, or None to copy value lines
+        self.entry: Optional[ConfigEntry] = None
+        self.value = ""
+        self.dropping = False
+
+    def start_section(self, event: SectionEvent, ws: str) -> None:
+        self.end_section()
+        self.had_section = True
+        plan = self.plans.pop(event.name.lower(), None)
+        if plan is not None and plan.delete:
+            self.skipping = True
+            return
+        self.dst.write(ws + "".join(event))
+        if plan is not None:
+            self.plan = plan
+            for edit in plan.keys.values():
+                if isinstance(edit, InsertBefore):
+                    self.inserts.setdefault(edit.before.lower(), []).append(edit)
+
+    def start_entry(self, event: EntryEvent, ws: str) -> None:
+        self.end_entry()
+        if self.skipping:
+            self.dropping = True
+            return
+        plan = self.plan
+        if plan is None:
+            self.dst.write(ws + "".join(event))
+            return
+
+        key = event.key.lower()
+        if key in self.seen:
+            # Only the first match is edited
+            self.dst.write(ws + "".join(event))
+            return
+        self.seen.add(key)
+        for edit in self.inserts.pop(key, ()):
+            # Otherwise it already exists, which was reported when it went past
+            if edit.key.lower() not in self.seen:
+                self.hold()
+                self.held.append((self.dst.tell(), edit))
+
+        change = plan.keys.get(key)
+        if isinstance(change, Delete):
+            self.dropping = True
+        elif isinstance(change, SetValue):
+            self.entry = ConfigEntry(
+                whitespace_before_key=ws,
+                key=event.key,
+                whitespace_before_equals=event.whitespace_before_equals,
+                equals=event.equals,
+                whitespace_before_value=event.whitespace_before_value,
+            )
+            self.value = change.value
+        else:
+            if isinstance(change, InsertBefore):
+                self.conflicts.append(Conflict(change, "key already exists"))
+                self.held = [(i, e) for i, e in self.held if e is not change]
+            self.dst.write(ws + "".join(event))
+
+    def add_value(self, event: ValueEvent) -> None:
+        if self.entry is not None:
+            self.entry.value.append(ValueLine(*event))
+        elif not self.dropping:
+            self.dst.write("".join(event))
+
+    def end_entry(self) -> None:
+        if self.entry is not None:
+            self.entry.set_value(self.value)
+            self.entry.build(self.dst)
+            self.entry = None
+        self.dropping = False
+
+    def hold(self) -> None:
+        if self.buffer is None:
+            self.out = self.dst
+            self.dst = self.buffer = io.StringIO()
+
+    def release(self) -> None:
+        out = self.out
+        if out is None or self.buffer is None:
+            return
+        text = self.buffer.getvalue()
+        start = 0
+        for i, edit in self.held:
+            out.write(text[start:i])
+            ConfigEntry.create(edit.key, edit.value).build(out)
+            start = i
+        out.write(text[start:])
+        self.dst = out
+        self.out = self.buffer = None
+        self.held = []
+
+    def end_section(self) -> None:
+        self.end_entry()
+        plan = self.plan
+        if plan is not None:
+            # Anything left goes at the end, in the order it was given
+            for key, edit in plan.keys.items():
+                if key in self.seen or any(e is edit for i, e in self.held):
+                    continue
+                if isinstance(edit, Delete):
+                    self.conflicts.append(Conflict(edit, "missing key"))
+                else:
+                    ConfigEntry.create(edit.key, edit.value).build(self.dst)
+        self.release()
+        self.plan = None
+        self.skipping = False
+        self.seen = set()
+        self.inserts = {}
+
+    def end(self, ws: str) -> None:
+        self.end_section()
+        # Sections that never turned up
+        for plan in self.plans.values():
+            if plan.delete:
+                self.conflicts.append(Conflict(plan.delete, "missing section"))
+                continue
+            section = ConfigSection.create(plan.name, first=not self.had_section)
+            for edit in plan.keys.values():
+                if isinstance(edit, Delete):
+                    self.conflicts.append(Conflict(edit, "missing key"))
+                else:
+                    section.entries.append(ConfigEntry.create(edit.key, edit.value))
+            if section.entries:
+                section.build(self.dst)
+                self.had_section = True
+        self.dst.write(ws)
+
+
+def rewrite(
+    batch: Batch, src: Iterable[str], dst: TextIO, **kwargs: Any
+) -> List[Conflict]:
+    """
+    Copies the lines of `src` (such as a file opened for reading) to `dst`,
+    applying every edit in `batch` that doesn't conflict, and returns the
+    conflicts in the order of the edits.  Keyword arguments are for the
+    `Parser`.
+
+    Open `src` with ``newline="\n"`` (as for `Parser.parse_file`) and `dst`
+    with ``newline=""``, or line endings will be translated.
+    """
+    plans, conflicts = batch._plan(None)
+    rewriter = _Rewriter(plans, dst)
+    # Comments and blank lines belong to whatever follows them
+    ws = ""
+    for event in Parser(**kwargs).iter_events(src):
+        if type(event) is ValueEvent:
+            rewriter.add_value(event)
+        elif type(event) is EntryEvent:
+            rewriter.start_entry(event, ws)
+            ws = ""
+        elif type(event) is WhitespaceEvent:
+            rewriter.end_entry()
+            ws = event.text
+        elif type(event) is SectionEvent:
+            rewriter.start_section(event, ws)
+            ws = ""
+    rewriter.end(ws)
+
+    order = {id(edit): i for i, edit in enumerate(batch.edits)}
+    conflicts.extend(rewriter.conflicts)
+    conflicts.sort(key=lambda c: order[id(c.edit)])
+    return conflicts
@@ -1,7 +1,41 @@
-from .editing import EditingTest
+from .aio import AioTest, FilesTest
+from .benchmarks import BenchmarksTest
+from .binary import BinaryTest
+from .cache import CacheTest
+from .diffs import DiffsTest
+from .editing import BatchTest, EditingTest
+from .events import EventsTest
+from .flatten import FlattenTest
+from .fuzz import FuzzTest
 from .imperfect import ImperfectTests
+from .interpolation import InterpolationTest
+from .lazy import LazyTest
+from .query import QueryTest
+from .spans import SpansTest
+from .stats import StatsTest
+from .stream import StreamTest
+from .verify import VerifyTest
+from .workspace import WorkspaceTest
 
 __all__ = [
+    "AioTest",
+    "BenchmarksTest",
+    "BatchTest",
+    "BinaryTest",
+    "CacheTest",
+    "DiffsTest",
     "EditingTest",
+    "EventsTest",
+    "FilesTest",
+    "FlattenTest",
+    "FuzzTest",
     "ImperfectTests",
+    "InterpolationTest",
+    "LazyTest",
+    "QueryTest",
+    "SpansTest",
+    "StatsTest",
+    "StreamTest",
+    "VerifyTest",
+    "WorkspaceTest",
 ]
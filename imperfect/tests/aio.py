@@ -0,0 +1,176 @@
+import asyncio
+import codecs
+import os
+import stat
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from unittest.mock import patch
+
+import imperfect
+from imperfect import aio
+from imperfect.files import write_atomic, write_if_changed
+
+EXAMPLE = b"[s]\r\na = 1\r\n"
+
+
+class FilesTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.path = os.path.join(self._tmp.name, "a.ini")
+
+    def test_write_if_changed(self) -> None:
+        self.assertTrue(write_if_changed(self.path, EXAMPLE))
+        os.utime(self.path, (1, 1))
+        self.assertFalse(write_if_changed(self.path, EXAMPLE))
+        self.assertEqual(1, os.stat(self.path).st_mtime)
+        # Same size
+        self.assertTrue(write_if_changed(self.path, EXAMPLE.replace(b"1", b"2")))
+        with open(self.path, "rb") as f:
+            self.assertEqual(b"[s]\r\na = 2\r\n", f.read())
+        self.assertEqual([], self.leftovers())
+
+    def test_mode_and_links(self) -> None:
+        write_atomic(self.path, b"")
+        os.chmod(self.path, 0o640)
+        link = os.path.join(self._tmp.name, "link.ini")
+        os.symlink(self.path, link)
+        write_atomic(link, EXAMPLE)
+        self.assertTrue(os.path.islink(link))
+        self.assertEqual(0o640, stat.S_IMODE(os.stat(self.path).st_mode))
+        with open(self.path, "rb") as f:
+            self.assertEqual(EXAMPLE, f.read())
+
+    def test_failure(self) -> None:
+        write_atomic(self.path, EXAMPLE)
+        with patch("imperfect.files.os.replace", side_effect=OSError):
+            with self.assertRaises(OSError):
+                write_atomic(self.path, b"new")
+        with open(self.path, "rb") as f:
+            self.assertEqual(EXAMPLE, f.read())
+        self.assertEqual([], self.leftovers())
+
+    def test_patch(self) -> None:
+        lines = [f"k{i} = {i}\n".encode() for i in range(5000)]
+        data = b"[s]\n" + b"".join(lines)
+
+        def check(new: bytes, in_place: bool) -> None:
+            write_atomic(self.path, data)
+            inode = os.stat(self.path).st_ino
+            self.assertTrue(write_if_changed(self.path, new, patch=True))
+            with open(self.path, "rb") as f:
+                self.assertEqual(new, f.read())
+            self.assertEqual(in_place, inode == os.stat(self.path).st_ino)
+
+        # Same length, two places
+        check(data.replace(b"k10 = 10", b"k10 = 99").replace(b"4998", b"9999"), True)
+        # Changed suffix, shorter and longer
+        check(data[:-100], True)
+        check(data + b"[t]\n", True)
+        # Most of the file
+        check(data.replace(b"[s]", b"[section]"), False)
+        check(data.replace(b"1", b"2"), False)
+        check(b"", True)
+
+        self.assertFalse(write_if_changed(self.path, b"", patch=True))
+        self.assertTrue(write_if_changed(self.path + ".new", b"", patch=True))
+
+    def test_save(self) -> None:
+        with open(self.path, "wb") as f:
+            f.write(EXAMPLE * 1000)
+        conf = imperfect.parse_path(self.path, mode="binary", spans=True)
+        os.utime(self.path, (1, 1))
+        self.assertFalse(conf.save(self.path))
+        self.assertEqual(1, os.stat(self.path).st_mtime)
+
+        inode = os.stat(self.path).st_ino
+        conf.sections[-1].entries[0].key = "b"
+        self.assertTrue(conf.save(self.path, patch=True))
+        self.assertEqual(inode, os.stat(self.path).st_ino)
+        with open(self.path, "rb") as f:
+            self.assertEqual(conf.data, f.read())
+        conf.sections[0].entries[0].key = "c"
+        self.assertTrue(conf.save(self.path))
+        self.assertNotEqual(inode, os.stat(self.path).st_ino)
+        with open(self.path, "rb") as f:
+            self.assertEqual(conf.data, f.read())
+
+    def leftovers(self) -> List[str]:
+        return [n for n in os.listdir(self._tmp.name) if n.endswith(".tmp")]
+
+
+class AioTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.paths = []
+        for i in range(10):
+            path = os.path.join(self._tmp.name, f"{i}.ini")
+            with open(path, "wb") as f:
+                f.write(EXAMPLE)
+            self.paths.append(path)
+
+    def read(self, path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    async def test_load_save(self) -> None:
+        data = codecs.BOM_UTF16_LE + EXAMPLE.decode().encode("utf-16-le")
+        with open(self.paths[0], "wb") as f:
+            f.write(data)
+        conf = await aio.load(self.paths[0], "utf-16")
+        self.assertEqual("1", conf["s"]["a"])
+        self.assertFalse(await aio.save(conf, self.paths[0]))
+
+        conf.set_value("s", "a", "2")
+        self.assertTrue(await aio.save(conf, self.paths[0]))
+        self.assertEqual(conf.data, self.read(self.paths[0]))
+        self.assertTrue(self.read(self.paths[0]).startswith(codecs.BOM_UTF16_LE))
+
+    async def test_many(self) -> None:
+        with ThreadPoolExecutor(2) as executor:
+            confs = await aio.load_many(self.paths, limit=3, executor=executor)
+        self.assertEqual(10, len(confs))
+        confs[3].set_value("s", "b", "new")
+        written = await aio.save_many(zip(self.paths, confs), limit=3)
+        self.assertEqual([i == 3 for i in range(10)], written)
+        self.assertEqual(b"[s]\r\na = 1\r\nb = new\n", self.read(self.paths[3]))
+
+        with self.assertRaises(FileNotFoundError):
+            await aio.load_many(self.paths + [self.paths[0] + ".missing"])
+
+    async def test_edit_many(self) -> None:
+        active = 0
+        most = 0
+
+        async def edit(conf: imperfect.ConfigFile) -> None:
+            nonlocal active, most
+            active += 1
+            most = max(most, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            if conf["s"]["a"] == "1":
+                conf.set_value("s", "a", "2")
+
+        results = await aio.edit_many(self.paths, edit, limit=4)
+        self.assertEqual(4, most)
+        self.assertEqual(self.paths, [r.path for r in results])
+        self.assertTrue(all(r.written and r.error is None for r in results))
+
+        # Already done, and a sync edit
+        results = await aio.edit_many(self.paths, lambda conf: None)
+        self.assertFalse(any(r.written for r in results))
+
+    async def test_edit_errors(self) -> None:
+        with open(self.paths[1], "wb") as f:
+            f.write(b"a = 1\n")
+
+        def edit(conf: imperfect.ConfigFile) -> None:
+            conf.set_value("s", "a", "2")
+
+        results = await aio.edit_many(self.paths[:3], edit)
+        self.assertEqual([True, False, True], [r.written for r in results])
+        self.assertIsInstance(results[1].error, imperfect.ParseError)
+        self.assertEqual(b"a = 1\n", self.read(self.paths[1]))
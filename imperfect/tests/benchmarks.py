@@ -0,0 +1,124 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from dataclasses import asdict
+from unittest.mock import patch
+
+from .. import parse_string
+from ..benchmarks import (
+    __main__ as benchmarks_main,
+    compare,
+    corpora,
+    Measurement,
+    Regression,
+    run,
+)
+from ..benchmarks.__main__ import main
+
+
+class BenchmarksTest(unittest.TestCase):
+    def test_corpora(self) -> None:
+        c = corpora(scale=0.001)
+        self.assertEqual(
+            [
+                "small_files",
+                "huge_file",
+                "wide_section",
+                "multiline_values",
+                "hypothesis",
+            ],
+            list(c),
+        )
+        # Deterministic, and all of them roundtrip
+        self.assertEqual(c, corpora(scale=0.001))
+        for texts in c.values():
+            for text in texts:
+                self.assertEqual(text, parse_string(text).text)
+
+    def test_run(self) -> None:
+        results = run(scale=0.001, repeat=1, only="huge_file")
+        self.assertEqual(
+            [
+                "huge_file/parse",
+                "huge_file/parse_lines",
+                "huge_file/parse_spans",
+                "huge_file/build",
+                "huge_file/build_spans",
+                "huge_file/edit_build",
+                "huge_file/edit_build_spans",
+                "huge_file/lookup",
+                "huge_file/to_dict",
+                "huge_file/set_value",
+            ],
+            list(results),
+        )
+        self.assertGreater(results["huge_file/parse"].peak_bytes, 0)
+
+    def test_compare(self) -> None:
+        baseline = {
+            "a": Measurement(1.0, 10_000_000),
+            "b": Measurement(0.001, 1000),
+            "gone": Measurement(1.0, 1000),
+        }
+        current = {
+            "a": Measurement(2.0, 20_000_000),
+            # Worse by ratio, but under the noise floor
+            "b": Measurement(0.002, 2000),
+            "new": Measurement(1.0, 1000),
+        }
+        self.assertEqual(
+            [
+                Regression("a", "seconds", 1.0, 2.0),
+                Regression("a", "peak_bytes", 10_000_000, 20_000_000),
+            ],
+            compare(baseline, current),
+        )
+        self.assertEqual([], compare(baseline, current, 1.5, 1.5))
+
+    def test_main(self) -> None:
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "baseline.json")
+            args = ["--scale", "0.001", "--repeat", "1", "--only", "wide"]
+            buf = io.StringIO()
+            with contextlib.redirect_stdout(buf):
+                self.assertEqual(0, main(args + ["--baseline", path, "--save", path]))
+                self.assertIn("No baseline", buf.getvalue())
+                with open(path) as f:
+                    self.assertIn("wide_section/parse", json.load(f)["results"])
+
+                # Made up, rather than timed, so that it's the same every run
+                with open(path, "w") as f:
+                    json.dump(
+                        {
+                            "scale": 0.001,
+                            "results": {
+                                "wide_section/parse": asdict(Measurement(1.0, 1000)),
+                                "wide_section/build": asdict(Measurement(0.0, 0)),
+                                "wide_section/lookup": asdict(Measurement(1.0, 0)),
+                            },
+                        },
+                        f,
+                    )
+                current = {
+                    "wide_section/parse": Measurement(2.0, 1000),
+                    "wide_section/build": Measurement(1.0, 0),
+                    "wide_section/lookup": Measurement(1.0, 0),
+                }
+                buf.seek(0)
+                buf.truncate()
+                with patch.object(benchmarks_main, "run", return_value=current):
+                    self.assertEqual(1, main(args + ["--baseline", path]))
+                    self.assertEqual(
+                        [
+                            "REGRESSION wide_section/parse seconds: 1 -> 2 (2.00x)",
+                            "REGRESSION wide_section/build seconds: 0 -> 1",
+                        ],
+                        buf.getvalue().splitlines(),
+                    )
+                    self.assertEqual(
+                        0, main(["--scale", "0.002"] + args[2:] + ["--baseline", path])
+                    )
+                self.assertIn("not comparing", buf.getvalue())
@@ -0,0 +1,130 @@
+import codecs
+import io
+import os
+import tempfile
+import unittest
+from typing import Any, Dict, List
+
+from parameterized import parameterized
+
+import imperfect
+
+EXAMPLE = "# c\r\n[s]\na = 1\r\n  2\rx\n\n[t]\r\nb=\xe9\n"
+
+
+class BinaryTest(unittest.TestCase):
+    @parameterized.expand(  # type: ignore
+        [
+            ("utf-8", b"", "utf-8"),
+            ("utf-8", codecs.BOM_UTF8, "utf-8"),
+            ("utf-8-sig", codecs.BOM_UTF8, "utf-8"),
+            ("utf-8-sig", b"", "utf-8"),
+            ("latin-1", b"", "latin-1"),
+            ("utf-16", codecs.BOM_UTF16_LE, "utf-16-le"),
+            ("utf-16", codecs.BOM_UTF16_BE, "utf-16-be"),
+            ("utf-32", codecs.BOM_UTF32_BE, "utf-32-be"),
+        ]
+    )
+    def test_roundtrip(self, encoding: str, bom: bytes, codec: str) -> None:
+        data = bom + EXAMPLE.encode(codec)
+        conf = imperfect.parse_bytes(data, encoding=encoding)
+        self.assertEqual(["s", "t"], conf.keys())
+        self.assertEqual(imperfect.parse_string(EXAMPLE)["s"]["a"], conf["s"]["a"])
+        self.assertEqual("\xe9", conf["t"]["b"])
+        self.assertEqual(bom, conf.bom)
+        self.assertEqual(codec, conf.encoding)
+        self.assertEqual(data, conf.data)
+
+    def test_same_tree_as_text(self) -> None:
+        data = EXAMPLE.encode()
+        self.assertEqual(imperfect.parse_string(EXAMPLE), imperfect.parse_bytes(data))
+        self.assertEqual(
+            imperfect.parse_string(EXAMPLE, spans=True),
+            imperfect.parse_bytes(bytearray(data), spans=True),
+        )
+
+    def test_undecodable(self) -> None:
+        data = b"[s]\na = \xff\xfe\r\n"
+        conf = imperfect.parse_bytes(memoryview(data))
+        self.assertEqual("\udcff\udcfe", conf["s"]["a"])
+        self.assertEqual(data, conf.data)
+
+    @parameterized.expand(  # type: ignore
+        [
+            ("utf-16", codecs.BOM_UTF16_LE + b"a\x00b", "byte 4: truncated data"),
+            ("utf-16-be", b"\x00a\xd8\x00\x00a", "byte 2: illegal UTF-16 surrogate"),
+            ("utf-32-le", b"a\x00\x00\x00\x00\xd8\x00\x00", "byte 4: code point in"),
+        ]
+    )
+    def test_undecodable_wide(self, encoding: str, data: bytes, message: str) -> None:
+        with self.assertRaisesRegex(imperfect.ParseError, message):
+            imperfect.parse_bytes(data, encoding=encoding)
+
+    def test_without_bom(self) -> None:
+        # Native byte order, like the codec
+        data = EXAMPLE.encode("utf-16")[2:]
+        conf = imperfect.parse_bytes(data, encoding="utf-16")
+        self.assertEqual(b"", conf.bom)
+        self.assertEqual(data, conf.data)
+
+    def test_edit(self) -> None:
+        data = codecs.BOM_UTF8 + EXAMPLE.encode()
+        conf = imperfect.parse_bytes(data, spans=True)
+        conf.set_value("t", "b", "☃")
+        expected = data.replace("\xe9".encode(), "☃".encode())
+        self.assertEqual(expected, conf.data)
+
+        buf = io.BytesIO()
+        conf.build_bytes(buf)
+        self.assertFalse(buf.closed)
+        self.assertEqual(expected, buf.getvalue())
+
+    def test_parse_path(self) -> None:
+        data = codecs.BOM_UTF8 + EXAMPLE.encode()
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "a.ini")
+            with open(path, "wb") as f:
+                f.write(data)
+            options: List[Dict[str, Any]] = [{}, {"lazy": True}, {"spans": True}]
+            for kwargs in options:
+                conf = imperfect.parse_path(path, mode="binary", **kwargs)
+                self.assertEqual(["s", "t"], conf.keys())
+                self.assertEqual(data, conf.data)
+
+            with open(path, "wb"):
+                pass
+            conf = imperfect.parse_path(path, mode="binary")
+            self.assertEqual([], conf.sections)
+            self.assertEqual(b"", conf.data)
+
+            with self.assertRaisesRegex(ValueError, "Unknown mode 'rb'"):
+                imperfect.parse_path(path, mode="rb")
+
+    def test_save_unchanged(self) -> None:
+        files = [
+            ("latin-1", EXAMPLE.encode("latin-1")),
+            ("utf-8", codecs.BOM_UTF8 + EXAMPLE.encode()),
+            ("utf-8-sig", codecs.BOM_UTF8 + EXAMPLE.encode()),
+            ("utf-16", codecs.BOM_UTF16_BE + EXAMPLE.encode("utf-16-be")),
+        ]
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "a.ini")
+            for encoding, data in files:
+                for mode in ("text", "binary"):
+                    with self.subTest(encoding=encoding, mode=mode):
+                        with open(path, "wb") as f:
+                            f.write(data)
+                        conf = imperfect.parse_path(path, encoding, mode)
+                        self.assertEqual(EXAMPLE, conf.text)
+                        self.assertFalse(conf.save(path))
+
+                        conf.set_value("t", "b", "\xe8")
+                        self.assertTrue(conf.save(path))
+                        with open(path, "rb") as f:
+                            saved = f.read()
+                        # Same BOM and encoding
+                        self.assertEqual(data[:2], saved[:2])
+                        self.assertEqual(
+                            data.decode(encoding).replace("\xe9", "\xe8"),
+                            saved.decode(encoding),
+                        )
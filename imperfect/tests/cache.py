@@ -0,0 +1,189 @@
+import codecs
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+from unittest.mock import patch
+
+import imperfect
+from imperfect import cache
+from imperfect.cache import default_directory, ParseCache
+from imperfect.stats import ParseStats
+from imperfect.types import SpanSection
+
+EXAMPLE = "# c\n[s]\na = 1\r\n  2\n\n[t]\nb=\xe9\n# end\n"
+
+
+def _parse_in_process(directory: str) -> str:
+    return ParseCache(directory).parse_string(EXAMPLE).text
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.dir = os.path.join(self._tmp.name, "cache")
+        self.cache = ParseCache(self.dir)
+
+    def files(self) -> List[str]:
+        return sorted(os.listdir(self.dir))
+
+    def test_hit(self) -> None:
+        first = self.cache.parse_string(EXAMPLE)
+        second = self.cache.parse_string(EXAMPLE)
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+        self.assertEqual(imperfect.parse_string(EXAMPLE), second)
+        self.assertEqual(EXAMPLE, second.text)
+        self.assertIsInstance(second.sections[0], SpanSection)
+
+        # Separate trees
+        second.set_value("s", "a", "x")
+        self.assertEqual(EXAMPLE, first.text)
+        self.assertEqual(EXAMPLE, self.cache.parse_string(EXAMPLE).text)
+
+    def test_keys(self) -> None:
+        self.cache.parse_string(EXAMPLE)
+        self.cache.parse_string(EXAMPLE, lazy=True, spans=False)
+        self.assertEqual(1, len(self.files()))
+        self.cache.parse_string(EXAMPLE, empty_lines_in_values=False)
+        self.cache.parse_string(EXAMPLE + "c=1\n")
+        self.assertEqual(3, len(self.files()))
+
+        # Doesn't change what's parsed
+        stats: List[ParseStats] = []
+        self.cache.parse_string(EXAMPLE, observer=stats.append)
+        self.assertEqual(3, len(self.files()))
+        self.assertEqual((2, 3), (self.cache.hits, self.cache.misses))
+        self.assertEqual([], stats)
+
+    def test_not_cached(self) -> None:
+        conf = self.cache.parse_string("[s]\na\n", allow_no_value=True)
+        self.assertEqual(["a"], conf["s"].keys())
+        conf = self.cache.parse_string("# nothing\n")
+        self.assertEqual("# nothing\n", conf.text)
+        self.assertFalse(os.path.exists(self.dir))
+
+    def test_bytes(self) -> None:
+        data = codecs.BOM_UTF8 + EXAMPLE.encode()
+        for _ in range(2):
+            conf = self.cache.parse_bytes(data)
+            self.assertEqual(data, conf.data)
+            self.assertEqual(codecs.BOM_UTF8, conf.bom)
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+
+    def test_parse_path(self) -> None:
+        path = os.path.join(self._tmp.name, "a.ini")
+        with open(path, "w", encoding="utf-8-sig", newline="") as f:
+            f.write(EXAMPLE)
+        for mode in ("text", "binary", "text", "binary"):
+            conf = self.cache.parse_path(path, mode=mode)
+            self.assertEqual(EXAMPLE, conf.text)
+            self.assertEqual(codecs.BOM_UTF8, conf.bom)
+            self.assertFalse(conf.save(path))
+        self.assertEqual((2, 2), (self.cache.hits, self.cache.misses))
+        with self.assertRaisesRegex(ValueError, "Unknown mode"):
+            self.cache.parse_path(path, mode="rb")
+
+    def test_bad_entries(self) -> None:
+        self.cache.parse_string(EXAMPLE)
+        (name,) = self.files()
+        path = os.path.join(self.dir, name)
+        with open(path, "rb") as f:
+            good = f.read()
+
+        for bad in (b"", good[:10], b"x" + good[1:], good[:-1], good[:-1] + b"!"):
+            with open(path, "wb") as f:
+                f.write(bad)
+            self.assertEqual(EXAMPLE, self.cache.parse_string(EXAMPLE).text)
+            # Rewritten
+            with open(path, "rb") as f:
+                self.assertEqual(good, f.read())
+        self.assertEqual((0, 6), (self.cache.hits, self.cache.misses))
+
+    def test_evict_by_size(self) -> None:
+        self.cache.parse_string(EXAMPLE)
+        (name,) = self.files()
+        # Room for one of them
+        self.cache.max_bytes = 2 * os.path.getsize(os.path.join(self.dir, name))
+        os.utime(os.path.join(self.dir, name), (1, 1))
+        self.cache.parse_string(EXAMPLE + "c=1\n")
+        self.assertEqual(1, len(self.files()))
+        self.assertNotIn(name, self.files())
+
+    def test_prune_rarely(self) -> None:
+        with patch("imperfect.cache.os.scandir", wraps=os.scandir) as scandir:
+            for i in range(10):
+                self.cache.parse_string(EXAMPLE + f"c={i}\n")
+            # Only the first write, while it's under the limit
+            self.assertEqual(1, scandir.call_count)
+            self.assertEqual(10, len(self.files()))
+
+            size = os.path.getsize(os.path.join(self.dir, self.files()[0]))
+            self.cache.max_bytes = 11 * size
+            self.cache.parse_string(EXAMPLE + "c=10\n")
+            self.cache.parse_string(EXAMPLE + "c=11\n")
+            self.assertEqual(2, scandir.call_count)
+            self.assertEqual(11, len(self.files()))
+
+            with patch.object(cache, "PRUNE_INTERVAL", 0):
+                self.cache.max_bytes = 12 * size
+                self.cache.parse_string(EXAMPLE + "c=12\n")
+            self.assertEqual(3, scandir.call_count)
+
+    def test_evict_by_age(self) -> None:
+        self.cache.parse_string(EXAMPLE)
+        (name,) = self.files()
+        # Leftover from a writer that died, and one in progress
+        open(os.path.join(self.dir, "old.tmp"), "w").close()
+        open(os.path.join(self.dir, "new.tmp"), "w").close()
+        old = time.time() - cache.TEMP_AGE - 10
+        os.utime(os.path.join(self.dir, "old.tmp"), (old, old))
+
+        self.cache.prune()
+        self.assertEqual(sorted(["new.tmp", name]), self.files())
+
+        self.cache.max_age = 60
+        os.utime(os.path.join(self.dir, name), (old, old))
+        self.cache.prune()
+        self.assertEqual(["new.tmp"], self.files())
+
+    def test_clear(self) -> None:
+        self.cache.parse_string(EXAMPLE)
+        self.cache.clear()
+        self.assertEqual([], self.files())
+        # Nothing to clear
+        ParseCache(os.path.join(self.dir, "missing")).clear()
+
+    def test_unwritable(self) -> None:
+        with open(self.dir, "w"):
+            pass
+        for _ in range(2):
+            self.assertEqual(EXAMPLE, self.cache.parse_string(EXAMPLE).text)
+        self.assertEqual((0, 2), (self.cache.hits, self.cache.misses))
+
+        os.remove(self.dir)
+        with patch("imperfect.cache.os.replace", side_effect=OSError):
+            self.cache.parse_string(EXAMPLE)
+        self.assertEqual([], self.files())
+
+    def test_races(self) -> None:
+        # Another process evicting entries as they're used
+        self.cache.parse_string(EXAMPLE)
+        with patch("imperfect.cache.os.utime", side_effect=FileNotFoundError):
+            self.assertEqual(EXAMPLE, self.cache.parse_string(EXAMPLE).text)
+        with patch("imperfect.cache.os.remove", side_effect=FileNotFoundError):
+            self.cache.clear()
+        self.assertEqual(1, self.cache.hits)
+
+    def test_processes(self) -> None:
+        with ProcessPoolExecutor(4) as executor:
+            results = list(executor.map(_parse_in_process, [self.dir] * 16))
+        self.assertEqual([EXAMPLE] * 16, results)
+        self.assertEqual(1, len(self.files()))
+
+    def test_default_directory(self) -> None:
+        with patch.dict(os.environ, {"XDG_CACHE_HOME": self.dir}):
+            self.assertEqual(os.path.join(self.dir, "imperfect"), default_directory())
+            self.assertEqual(default_directory(), ParseCache().directory)
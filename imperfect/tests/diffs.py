@@ -0,0 +1,245 @@
+import unittest
+from typing import Any, Dict
+
+from parameterized import parameterized
+
+import imperfect
+from imperfect.diffs import (
+    AddEntry,
+    AddSection,
+    apply_diff,
+    ChangeComments,
+    ChangeEntry,
+    ChangeSection,
+    Conflict,
+    DeleteEntry,
+    DeleteSection,
+    diff,
+    keys,
+    merge,
+    MoveEntry,
+    MoveSection,
+)
+
+A = """\
+[a]
+x = 1
+y = 2
+# about z
+z = 3
+
+[b]
+k = v
+
+[c]
+"""
+
+B = """\
+[b]
+k = v
+new = 1
+
+[a]
+y = 2
+# about z
+z = 3
+x = 10
+
+[C] # renamed
+[d]
+m = n
+# the end
+"""
+
+KWARGS = [({},), ({"spans": True},), ({"lazy": True},)]
+
+
+class DiffsTest(unittest.TestCase):
+    def test_diff(self) -> None:
+        a = imperfect.parse_string(A)
+        b = imperfect.parse_string(B)
+        changes = diff(a, b)
+        self.assertEqual(
+            [
+                ChangeComments(("", ""), ("", "# the end\n")),
+                MoveSection(("b", 0), None),
+                # The blank line before it
+                ChangeSection(("b", 0), a["b"], b["b"]),
+                AddEntry(("b", 0), ("new", 0), b["b"].entries[1], ("k", 0)),
+                ChangeSection(("a", 0), a["a"], b["a"]),
+                MoveEntry(("a", 0), ("x", 0), ("z", 0)),
+                ChangeEntry(("a", 0), ("x", 0), a["a"].entries[0], b["a"].entries[2]),
+                ChangeSection(("c", 0), a["c"], b["c"]),
+                AddSection(("d", 0), b["d"], ("c", 0)),
+            ],
+            changes,
+        )
+        self.assertEqual([], apply_diff(changes, a))
+        self.assertEqual(B, a.text)
+        self.assertEqual([], diff(a, b))
+
+        changes = diff(b, imperfect.parse_string(A))
+        self.assertIn(DeleteSection(("d", 0), b["d"]), changes)
+        self.assertIn(DeleteEntry(("b", 0), ("new", 0), b["b"].entries[1]), changes)
+
+    @parameterized.expand(KWARGS)  # type: ignore
+    def test_roundtrip(self, kwargs: Dict[str, Any]) -> None:
+        texts = [
+            A,
+            B,
+            "",
+            "# only a comment\n",
+            "[a]\nx=1\n[a]\nx=2\nX=3\n",
+            "[A]\nX=3\n[a]\nx=1\n",
+            "[c]\n[b]\n[a]\nz=1\ny=2\nx =\n  3\n",
+        ]
+        for t1 in texts:
+            for t2 in texts:
+                a = imperfect.parse_string(t1, **kwargs)
+                b = imperfect.parse_string(t2, **kwargs)
+                self.assertEqual([], apply_diff(diff(a, b), a))
+                self.assertEqual(t2, a.text)
+                # Copies, so changing one doesn't change the other
+                a.set_value("new", "k", "v")
+                self.assertEqual(t2, b.text)
+
+    def test_duplicates(self) -> None:
+        self.assertEqual([("a", 0), ("b", 0), ("a", 1)], keys(["a", "b", "A"]))
+        a = imperfect.parse_string("[s]\nk=1\nk=2\n")
+        b = imperfect.parse_string("[s]\nk=1\nk=3\n")
+        self.assertEqual(
+            [ChangeEntry(("s", 0), ("k", 1), a["s"].entries[1], b["s"].entries[1])],
+            diff(a, b),
+        )
+
+    def test_apply_elsewhere(self) -> None:
+        changes = diff(imperfect.parse_string(A), imperfect.parse_string(B))
+        # Has its own changes, none of which overlap
+        other = imperfect.parse_string(A.replace("k = v", "k = w") + "[e]\n")
+        self.assertEqual([], apply_diff(changes, other))
+        self.assertEqual(
+            B.replace("k = v", "k = w").replace("# the end", "[e]\n# the end"),
+            other.text,
+        )
+        # Which is now the way the changes leave it
+        self.assertEqual([], apply_diff(changes, other))
+
+    def test_conflicts(self) -> None:
+        a = imperfect.parse_string(A)
+        changes = diff(a, imperfect.parse_string(B))
+        text = "# top\n[a]\nx = 5\ny = 2\n[d]\n[b]\n[c] # other\n"
+        other = imperfect.parse_string(text)
+        conflicts = apply_diff(changes, other)
+        self.assertEqual(
+            [
+                Conflict(changes[4], "section header changed"),
+                Conflict(changes[6], "key changed"),
+                Conflict(changes[7], "section header changed"),
+                Conflict(changes[8], "section already exists"),
+            ],
+            conflicts,
+        )
+        self.assertEqual(text, other.text)
+
+        # What's left to go after isn't there, so those go at the end
+        self.assertEqual(conflicts, apply_diff(changes, other, partial=True))
+        self.assertEqual(
+            "[b]\nnew = 1\n# top\n[a]\ny = 2\nx = 5\n[d]\n[c] # other\n# the end\n",
+            other.text,
+        )
+
+    def test_deleted(self) -> None:
+        changes = diff(
+            imperfect.parse_string(A), imperfect.parse_string("[a]\nx = 1\n")
+        )
+        other = imperfect.parse_string("[a]\nx = 1\n[b]\nk = changed\n")
+        self.assertEqual(
+            [Conflict(changes[0], "section changed")], apply_diff(changes, other)
+        )
+        # Already gone
+        other = imperfect.parse_string("[a]\nx = 1\n# about z\nz = 3\n")
+        self.assertEqual([], apply_diff(changes, other))
+        self.assertEqual("[a]\nx = 1\n", other.text)
+
+    def test_missing(self) -> None:
+        a = imperfect.parse_string("[a]\nx = 1\ny = 2\n# end\n")
+        b = imperfect.parse_string("[a]\ny = 3\n# other end\n")
+        changes = diff(a, b)
+        other = imperfect.parse_string("[b]\n# changed\n")
+        self.assertEqual(
+            [
+                Conflict(changes[0], "comments changed"),
+                Conflict(changes[2], "missing section"),
+            ],
+            apply_diff(changes, other, partial=True),
+        )
+        # Deleting x from a section that isn't there is fine
+        self.assertEqual("[b]\n# changed\n", other.text)
+
+        other = imperfect.parse_string("[a]\nx = 2\n# end\n")
+        self.assertEqual(
+            [
+                Conflict(changes[1], "key changed"),
+                Conflict(changes[2], "missing key"),
+            ],
+            apply_diff(changes, other),
+        )
+        changes = diff(b, a)
+        self.assertEqual(
+            [
+                Conflict(changes[1], "key already exists"),
+                Conflict(changes[2], "missing key"),
+            ],
+            apply_diff(changes, other),
+        )
+
+    def test_spans(self) -> None:
+        text = "[a]\nx = 1\n[b]\ny = 2\n"
+        a = imperfect.parse_string(text, spans=True)
+        b = imperfect.parse_string(text, spans=True)
+        self.assertEqual([], diff(a, b))
+        self.assertEqual([], diff(a, a))
+        b["b"].entries[0].value[0].text = "3"
+        self.assertEqual(
+            [ChangeEntry(("b", 0), ("y", 0), a["b"].entries[0], b["b"].entries[0])],
+            diff(a, b),
+        )
+        a["b"].entries[:] = []
+        self.assertEqual(
+            [AddEntry(("b", 0), ("y", 0), b["b"].entries[0], None)], diff(a, b)
+        )
+
+    @parameterized.expand(KWARGS)  # type: ignore
+    def test_merge(self, kwargs: Dict[str, Any]) -> None:
+        base = "[a]\nx = 1\ny = 2\n\n[b]\nk = v\n"
+        ours = "[a]\n# ours\nx = 1\ny = 3\n\n[b]\nk = v\n"
+        theirs = "[a]\nx = 1\ny = 2\nz = 4\n\n[b]\nk =   w ; theirs\n[c]\n"
+        conf = imperfect.parse_string(ours, **kwargs)
+        conflicts = merge(
+            imperfect.parse_string(base, **kwargs),
+            conf,
+            imperfect.parse_string(theirs, **kwargs),
+        )
+        self.assertEqual([], conflicts)
+        self.assertEqual(
+            "[a]\n# ours\nx = 1\ny = 3\nz = 4\n\n[b]\nk =   w ; theirs\n[c]\n",
+            conf.text,
+        )
+
+    def test_merge_conflicts(self) -> None:
+        base = imperfect.parse_string("[a]\nx = 1\ny = 2\n[b]\nk = v\n")
+        ours = imperfect.parse_string("[a]\nx = 10\ny = 2\nn = 1\n[b]\nk = ours\n")
+        theirs = imperfect.parse_string("[a]\nx = 10\ny = 20\nn = 2\n")
+        conflicts = merge(base, ours, theirs)
+        self.assertEqual(
+            [
+                Conflict(DeleteSection(("b", 0), base["b"]), "section changed"),
+                Conflict(
+                    AddEntry(("a", 0), ("n", 0), theirs["a"].entries[2], ("y", 0)),
+                    "key already exists",
+                ),
+            ],
+            conflicts,
+        )
+        # Both made the same change to x
+        self.assertEqual("[a]\nx = 10\ny = 20\nn = 1\n[b]\nk = ours\n", ours.text)
@@ -1,6 +1,22 @@
+import copy
+import pickle
 import unittest
+from typing import cast, List
 
-from .. import parse_string
+from .. import (
+    Batch,
+    ConfigEntry,
+    ConfigFile,
+    ConfigSection,
+    Conflict,
+    Delete,
+    Edit,
+    InsertBefore,
+    parse_string,
+    SetValue,
+    ValueLine,
+)
+from ..types import EntryList, ValueList
 
 
 class EditingTest(unittest.TestCase):
@@ -76,3 +92,295 @@ class EditingTest(unittest.TestCase):
         self.assertEqual("[a]\na=1\n[b]\nb=2\n", conf.text)
         with self.assertRaises(KeyError):
             del conf["a"]["z"]
+
+    def test_set_value_case_insensitive(self) -> None:
+        conf = parse_string("[a]\nb = 1\n")
+        conf.set_value("A", "B", "2")
+        self.assertEqual("[a]\nb = 2\n", conf.text)
+
+    def test_index_first_match(self) -> None:
+        conf = parse_string("[a]\nb=1\nB=2\n[A]\n")
+        self.assertEqual(0, conf.index("A"))
+        self.assertEqual(0, conf["a"].index("b"))
+        self.assertEqual(1, conf["a"].index("B", case_sensitive=True))
+        self.assertEqual(1, conf.index("A", case_sensitive=True))
+
+    def test_index_after_direct_edits(self) -> None:
+        conf = parse_string("[a]\nb=1\nc=2\n")
+        section = conf["a"]
+        self.assertEqual(1, section.index("c"))
+        section.entries.insert(0, ConfigEntry(key="c", equals="=", value=[]))
+        self.assertEqual(0, section.index("c"))
+        del section.entries[0]
+        section.entries.append(ConfigEntry(key="d", equals="=", value=[]))
+        self.assertEqual(2, section.index("d"))
+        section.entries[1].key = "e"
+        self.assertEqual(1, section.index("e"))
+        self.assertFalse("c" in section)
+        section.entries[1].key = "f"
+        self.assertFalse("e" in section)
+
+        # A plain list still works, without the index
+        section.entries = list(section.entries)
+        self.assertEqual(2, section.index("d"))
+
+    def test_index_after_rename(self) -> None:
+        for kwargs in ({}, {"spans": True}, {"lazy": True}):
+            conf = parse_string("[a]\nx = 1\nz = 2\n[q]\n[r]\n", **kwargs)
+            section = conf["a"]
+            self.assertEqual(0, section.index("x"))
+            self.assertEqual(0, conf.index("a"))
+            section.entries[0].key = "z"
+            conf.sections[1].name = "p"
+            conf.sections[2].name = "Q"
+
+            conf.set_value("a", "z", "9")
+            conf.set_value("q", "k", "v")
+            self.assertEqual("[a]\nz = 9\nz = 2\n[p]\n[Q]\nk = v\n", conf.text)
+            self.assertFalse("x" in section)
+
+    def test_index_rename_elsewhere(self) -> None:
+        conf = parse_string("[a]\nx = 1\n[b]\n")
+        other = parse_string("[a]\nx = 1\n[b]\n")
+        self.assertEqual(0, conf["a"].index("x"))
+        self.assertEqual(1, conf.index("b"))
+        positions = conf.sections._positions  # type: ignore
+        entry_positions = conf["a"].entries._positions  # type: ignore
+
+        other.sections[1].name = "c"
+        other["a"].entries[0].key = "y"
+        self.assertIs(positions, conf.sections._positions)  # type: ignore
+        self.assertIs(entry_positions, conf["a"].entries._positions)  # type: ignore
+
+    def test_index_rename_shared(self) -> None:
+        section = parse_string("[a]\nx = 1\ny = 2\n")["a"]
+        entries = cast(EntryList, section.entries)
+        copied = copy.copy(entries)
+        again = EntryList(entries)
+        copied.append(entries[0])
+        for lst in (entries, copied, again):
+            self.assertEqual(0, lst.find("x"))
+
+        entries[0].key = "z"
+        for lst in (entries, copied, again):
+            self.assertEqual(-1, lst.find("x"))
+            self.assertEqual(0, lst.find("z"))
+
+        # Lists that are gone don't matter
+        del again, lst
+        entries[0].key = "x"
+        self.assertEqual(0, copied.find("x"))
+        # Nor does a node that's in none
+        ConfigEntry("a", "=").key = "b"
+
+    def test_constructed_with_plain_lists(self) -> None:
+        section = ConfigSection(
+            leading_whitespace="",
+            leading_square_bracket="[",
+            name="a",
+            trailing_square_bracket="]",
+            trailing_whitespace="",
+            newline="\n",
+            entries=[ConfigEntry(key="b", equals="=", value=[])],
+        )
+        conf = ConfigFile(sections=[section])
+        self.assertIs(section, conf["A"])
+        self.assertTrue("b" in conf["a"])
+
+    def test_index_list_operations(self) -> None:
+        conf = parse_string("[a]\n[b]\n[c]\n")
+        sections = conf.sections
+        a, b, c = sections
+
+        def check() -> None:
+            for i, s in enumerate(sections):
+                if s.name not in [t.name for t in sections[:i]]:
+                    self.assertEqual(i, conf.index(s.name))
+
+        check()
+        sections.reverse()
+        check()
+        sections.sort(key=lambda s: s.name)
+        check()
+        sections.extend([c])
+        check()
+        sections += [b]
+        check()
+        sections.remove(a)
+        check()
+        self.assertIs(b, sections.pop(0))
+        check()
+        sections[0] = a
+        check()
+        sections *= 2
+        check()
+        sections.clear()
+        self.assertFalse("a" in conf)
+
+    def test_index_copy(self) -> None:
+        conf = parse_string("[a]\nb=1\n")
+        self.assertEqual(0, conf.index("a"))
+        conf2 = copy.deepcopy(conf)
+        conf2.set_value("b", "c", "2")
+        self.assertEqual(conf.text, "[a]\nb=1\n")
+        self.assertEqual(1, conf2.index("b"))
+        self.assertFalse("b" in conf)
+
+    def test_interpret_value_cached(self) -> None:
+        for spans in (False, True):
+            conf = parse_string("[a]\nb = 1\n  2\n", spans=spans)
+            section = conf["a"]
+            entry = section.entries[0]
+            self.assertEqual("1\n2", section["b"])
+            value = entry.value
+            self.assertIsInstance(value, ValueList)
+            self.assertEqual("1\n2", section["b"])
+            self.assertEqual("1\n2", value._interpreted)  # type: ignore
+
+            value.append(ValueLine("  ", "3", "", "\n"))
+            self.assertEqual("1\n2\n3", section["b"])
+            value[0] = ValueLine("", "0", "", "\n")
+            self.assertEqual("0\n2\n3", section["b"])
+            del value[1:]
+            self.assertEqual("0", section["b"])
+            value += [ValueLine("  ", "4", "", "\n")]
+            self.assertEqual("0\n4", section["b"])
+
+            # In place, too
+            value[0].text = "5"
+            self.assertEqual("5\n4", section["b"])
+            value[0].newline = "\r\n"
+            self.assertEqual("5\r\n4", section["b"])
+            value[-1].text = "6"
+            self.assertEqual("5\r\n6", entry.interpret_value())
+            # But not by lines being made
+            ValueLine("", "x", "", "\n")
+            self.assertIs(section["b"], section["b"])
+
+            conf.set_value("a", "b", "6")
+            self.assertEqual("6", section["b"])
+            entry.value = [ValueLine("", "7", "", "\n")]
+            self.assertEqual("7", section["b"])
+            self.assertEqual("[a]\nb = 7\n", conf.text)
+
+    def test_interpret_value_edit_elsewhere(self) -> None:
+        conf = parse_string("[a]\nb = 1\n")
+        other = parse_string("[a]\nb = 1\n")
+        value = conf["a"].entries[0].value
+        self.assertEqual("1", conf["a"]["b"])
+        interpreted = value._interpreted  # type: ignore
+
+        other["a"].entries[0].value[0].text = "2"
+        self.assertEqual("2", other["a"]["b"])
+        self.assertIs(interpreted, value._interpreted)  # type: ignore
+
+    def test_interpret_value_copy(self) -> None:
+        entry = parse_string("[a]\nb = 1\n  2\n")["a"].entries[0]
+        self.assertEqual("1\n2", entry.interpret_value())
+        for other in (copy.deepcopy(entry), pickle.loads(pickle.dumps(entry))):
+            self.assertIsInstance(other.value, ValueList)
+            other.value[1].text = "3"
+            self.assertEqual("1\n3", other.interpret_value())
+        self.assertEqual("1\n2", entry.interpret_value())
+
+        entry = ConfigEntry(key="b", equals="=", value=[ValueLine("", "1", "", "")])
+        self.assertIsInstance(entry.value, ValueList)
+        self.assertEqual("1", entry.interpret_value())
+
+
+class BatchTest(unittest.TestCase):
+    def test_apply(self) -> None:
+        conf = parse_string("[a]\nb = 1\nc = 2\n[d]\ne = 3\n[f]\n")
+        batch = Batch()
+        batch.set_value("a", "b", "10")
+        batch.set_value("A", "new", "x")
+        batch.insert_before("a", "first", "y", before="B")
+        batch.insert_before("a", "last", "z", before="missing")
+        batch.delete("a", "c")
+        batch.delete("f")
+        batch.set_value("g", "h", "\n1\n2")
+        batch.set_value("d", "e", "")
+        self.assertEqual([], batch.apply(conf))
+        self.assertEqual(
+            "[a]\nfirst = y\nb = 10\nnew = x\nlast = z\n[d]\ne =\n\n[g]\nh =\n  1\n  2\n",
+            conf.text,
+        )
+
+    def test_same_as_set_value(self) -> None:
+        text = "[a]\nb=1\nc =\n"
+        conf = parse_string(text)
+        conf.set_value("a", "b", "")
+        conf.set_value("a", "c", "3")
+        conf.set_value("z", "d", "4")
+
+        conf2 = parse_string(text)
+        Batch(
+            [SetValue("a", "b", ""), SetValue("a", "c", "3"), SetValue("z", "d", "4")]
+        ).apply(conf2)
+        self.assertEqual(conf.text, conf2.text)
+
+    def test_first_match_only(self) -> None:
+        conf = parse_string("[a]\nb=1\nb=2\n[a]\nb=3\n")
+        Batch([SetValue("a", "b", "x")]).apply(conf)
+        self.assertEqual("[a]\nb=x\nb=2\n[a]\nb=3\n", conf.text)
+        Batch([Delete("a", "b")]).apply(conf)
+        self.assertEqual("[a]\nb=2\n[a]\nb=3\n", conf.text)
+
+    def test_conflicts(self) -> None:
+        text = "[a]\nb=1\nc=2\n"
+        conf = parse_string(text)
+        set1 = SetValue("a", "b", "1")
+        set2 = SetValue("a", "B", "2")
+        delete_section = Delete("a")
+        edits: List[Edit] = [
+            set1,
+            set1,
+            set2,
+            delete_section,
+            Delete("a", "missing"),
+            Delete("missing"),
+            InsertBefore("a", "c", "1", "b"),
+            SetValue("z", "y", "1"),
+            Delete("z", "y"),
+            Delete("x"),
+        ]
+        batch = Batch(edits)
+        conflicts = batch.apply(conf)
+        self.assertEqual(
+            [
+                Conflict(set2, "key is already edited", set1),
+                Conflict(delete_section, "section is also edited", set1),
+                Conflict(Delete("a", "missing"), "missing key"),
+                Conflict(Delete("missing"), "missing section"),
+                Conflict(InsertBefore("a", "c", "1", "b"), "key already exists"),
+                Conflict(Delete("z", "y"), "key is already edited", edits[7]),
+                Conflict(Delete("x"), "missing section"),
+            ],
+            conflicts,
+        )
+        self.assertEqual(conflicts, batch.conflicts(conf))
+        # Nothing was changed
+        self.assertEqual(text, conf.text)
+
+        batch.apply(conf, partial=True)
+        self.assertEqual("[a]\nb=1\nc=2\n\n[z]\ny = 1\n", conf.text)
+
+    def test_delete_section_conflicts(self) -> None:
+        conf = parse_string("[a]\nb=1\n")
+        delete_section = Delete("a")
+        batch = Batch()
+        batch.delete("a", "missing")
+        batch.edits += [delete_section, delete_section, SetValue("a", "c", "1")]
+        self.assertEqual(
+            [
+                Conflict(Delete("a", "missing"), "missing key"),
+                Conflict(SetValue("a", "c", "1"), "section is deleted", delete_section),
+            ],
+            batch.apply(conf, partial=True),
+        )
+        self.assertEqual("", conf.text)
+
+        # A partial apply doesn't create empty sections
+        conf = parse_string("[a]\nb=1\n")
+        Batch([Delete("z", "y")]).apply(conf, partial=True)
+        self.assertEqual("[a]\nb=1\n", conf.text)
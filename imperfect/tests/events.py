@@ -0,0 +1,67 @@
+import unittest
+
+from parameterized import parameterized
+
+import imperfect
+from imperfect import EndEvent, EntryEvent, SectionEvent, ValueEvent, WhitespaceEvent
+
+
+class EventsTest(unittest.TestCase):
+    def test_events(self) -> None:
+        events = list(imperfect.iter_events("#c\n[s]\na = 1\n  2\n\n#end"))
+        self.assertEqual(
+            [
+                WhitespaceEvent("#c\n"),
+                SectionEvent("[", "s", "]", "", "\n"),
+                EntryEvent("a", " ", "=", " "),
+                ValueEvent("", "1", "", "\n"),
+                ValueEvent("  ", "2", "", "\n"),
+                WhitespaceEvent("\n#end"),
+                EndEvent(),
+            ],
+            events,
+        )
+
+    def test_events_roundtrip(self) -> None:
+        example = "#c\n[s]\na = 1\n\n  2\n  #c2\nb:\n[t]  \r\n x=y\n\n"
+        events = imperfect.iter_events(example)
+        self.assertEqual(example, "".join("".join(e) for e in events))
+
+    def test_events_from_lines(self) -> None:
+        example = "[s]\na = 1\n  2\n"
+        self.assertEqual(
+            list(imperfect.iter_events(example)),
+            list(imperfect.iter_events(example.splitlines(True))),
+        )
+
+    @parameterized.expand(  # type: ignore
+        [
+            ("#c\n[s]\na = 1\n\n  2\n  #c2\nb:\n[t]  \r\n x=y\n\n",),
+            ("[s]\n a=1\n  \n\n\t2\n#c\n  3\n\n",),
+            ("[s]\na\t:\x0c1\x0b \r\n\x0b[t]\n ;x\n\n",),
+            ("\n\n[ s ] ; c\nb=\n[t]\n",),
+            ("[s]\na=1\n\n[t]\n\n\n",),
+        ]
+    )
+    def test_scan_matches_lines(self, example: str) -> None:
+        # Strings are scanned in one pass, lines go through the older loop
+        lines = list(imperfect.iter_lines(example))
+        for kwargs in ({}, {"empty_lines_in_values": False}):
+            parser = imperfect.Parser(**kwargs)  # type: ignore
+            self.assertEqual(
+                list(parser.iter_events(lines)), list(parser.iter_events(example))
+            )
+            self.assertEqual(parser.parse_lines(lines), parser.parse_string(example))
+
+    def test_events_stop_early(self) -> None:
+        lines = iter(["[s]\n", "a=1\n", "b=2\n"])
+        for event in imperfect.iter_events(lines):
+            if isinstance(event, EntryEvent):
+                break
+        self.assertEqual(["b=2\n"], list(lines))
+
+    def test_events_entry_outside_section(self) -> None:
+        with self.assertRaises(imperfect.ParseError):
+            list(imperfect.iter_events("#c\na=1\n"))
+        with self.assertRaises(imperfect.ParseError):
+            list(imperfect.iter_events(["#c\n", "a=1\n"]))
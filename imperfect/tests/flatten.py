@@ -0,0 +1,71 @@
+import unittest
+from typing import Dict
+
+import imperfect
+from imperfect import Table, to_dict, to_table
+
+EXAMPLE = """\
+[a]
+x = 1
+X = shadowed
+y =
+  two
+  lines
+z =
+
+[b]
+x = 2
+[A]
+x = shadowed
+"""
+
+
+class FlattenTest(unittest.TestCase):
+    def assertMatchesLookups(
+        self, d: Dict[str, Dict[str, str]], conf: imperfect.ConfigFile
+    ) -> None:
+        for section, values in d.items():
+            for key, value in values.items():
+                self.assertEqual(conf[section][key], value)
+
+    def test_to_dict(self) -> None:
+        expected = {"a": {"x": "1", "y": "\ntwo\nlines", "z": ""}, "b": {"x": "2"}}
+        for kwargs in ({}, {"lazy": True}, {"spans": True}):
+            conf = imperfect.parse_string(EXAMPLE, **kwargs)
+            self.assertEqual(expected, to_dict(conf))
+            self.assertMatchesLookups(to_dict(conf), conf)
+
+    def test_spans(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, spans=True)
+        to_dict(conf)
+        # Reading doesn't count as a change
+        self.assertEqual(set(), conf.sections[0]._spans.dirty)  # type: ignore
+
+        conf.set_value("a", "x", "changed")
+        conf["b"].entries[0].key = "renamed"
+        conf.sections[1].entries.append(imperfect.ConfigEntry.create("w", "3"))
+        self.assertEqual(
+            {
+                "a": {"x": "changed", "y": "\ntwo\nlines", "z": ""},
+                "b": {"renamed": "2", "w": "3"},
+            },
+            to_dict(conf),
+        )
+        self.assertMatchesLookups(to_dict(conf), conf)
+
+    def test_to_table(self) -> None:
+        confs = {
+            "one.ini": imperfect.parse_string(EXAMPLE),
+            "two.ini": imperfect.parse_string("[c]\nk = v\n", spans=True),
+        }
+        table = to_table(confs.items())
+        self.assertEqual(5, len(table))
+        self.assertEqual(("one.ini", "a", "y", "\ntwo\nlines"), list(table.rows())[1])
+        self.assertEqual(("two.ini", "c", "k", "v"), list(table.rows())[-1])
+
+        more = to_table([("three.ini", imperfect.parse_string("[d]\nk=1\n"))], table)
+        self.assertIs(table, more)
+        self.assertEqual(6, len(table))
+        self.assertEqual(["three.ini"], table.files[5:])
+
+        self.assertEqual(0, len(Table()))
@@ -0,0 +1,176 @@
+import contextlib
+import io
+import itertools
+import os
+import random
+import re
+import tempfile
+import unittest
+from typing import Any, List, Optional
+from unittest.mock import patch
+
+from .. import fuzz, parse_string, ParseError
+from ..types import ConfigFile
+
+
+def _broken(text: str) -> ConfigFile:
+    raise ValueError(text)
+
+
+def _rejects(text: str) -> ConfigFile:
+    raise ParseError(text)
+
+
+def _control(text: str) -> Optional[str]:
+    # Stands in for a parser bug, or two
+    return "bad" if "\x1c" in text or "\x1d" in text else None
+
+
+class FuzzTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def test_check(self) -> None:
+        for text in fuzz.SEEDS:
+            self.assertIsNone(fuzz.check(text))
+        # Rejected by both
+        self.assertIsNone(fuzz.check("b = 1\n"))
+        # configparser strips every line
+        self.assertIsNone(fuzz.check("[a]\nb = 1\x0c\r\n  2\r\n\n"))
+        # Known differences
+        for text in ("[a]\nb =\n\xa01\n", "\u2028[a]=\n", "[]]\n", "[a]]\nb = 1\n"):
+            self.assertIsNone(fuzz.check(text))
+        with patch.object(fuzz, "_shape", lambda _: []):
+            self.assertIsNone(fuzz.check("[a]]\n"))
+            self.assertEqual("section names", fuzz.check("[a]\nb = ]]\n"))
+
+    def _check_with(self, text: str, **patches: Any) -> Optional[str]:
+        with contextlib.ExitStack() as stack:
+            for name, value in patches.items():
+                stack.enter_context(patch.object(fuzz, name, value))
+            return fuzz.check(text)
+
+    def test_check_paths(self) -> None:
+        text = "[a]\nb = 1\n"
+        with patch.dict(fuzz.PATHS, {"lines": lambda _: parse_string("[a]\n")}):
+            self.assertEqual("lines differs", fuzz.check(text))
+        with patch.dict(fuzz.PATHS, {"bytes": _rejects}):
+            self.assertEqual("bytes disagrees", fuzz.check(text))
+        with patch.dict(fuzz.PATHS, {"spans": _broken}):
+            self.assertEqual("crash ValueError", fuzz.check(text))
+        self.assertEqual(
+            "events", self._check_with(text, iter_events=lambda _: iter([]))
+        )
+        with patch.object(ConfigFile, "build", lambda _, buf: buf.write("")):
+            self.assertEqual("roundtrip", fuzz.check(text))
+
+    def test_check_configparser(self) -> None:
+        text = "[a]\nb = 1\n"
+        self.assertEqual(
+            "rejected",
+            self._check_with(
+                text, _parse=lambda parse, text: None, iter_events=_rejects
+            ),
+        )
+        self.assertEqual("section names", self._check_with(text, _shape=lambda _: []))
+        self.assertEqual(
+            "keys", self._check_with(text, _shape=lambda _: [("a", [("c", "1")])])
+        )
+        self.assertEqual(
+            "values", self._check_with(text, _shape=lambda _: [("a", [("b", "2")])])
+        )
+
+    def test_features(self) -> None:
+        self.assertEqual(
+            {
+                "outcome None",
+                "start -> section '\\n'",
+                "section '\\n' -> entry ''",
+            },
+            fuzz.features("[a]\nb = 1", None),
+        )
+        self.assertEqual(
+            {
+                "outcome bad",
+                "start -> blank indented '\\r\\n'",
+                "blank indented '\\r\\n' -> comment '\\n'",
+                "comment '\\n' -> other indented ''",
+            },
+            fuzz.features(" \r\n# c\n  x", "bad"),
+        )
+
+    def test_mutate(self) -> None:
+        texts = [
+            fuzz.mutate(random.Random(i), "[a]\nb = 1\n", fuzz.SEEDS)
+            for i in range(100)
+        ]
+        self.assertEqual(
+            texts[0], fuzz.mutate(random.Random(0), "[a]\nb = 1\n", fuzz.SEEDS)
+        )
+        self.assertGreater(len(set(texts)), 90)
+
+    def test_minimize(self) -> None:
+        with patch.object(fuzz, "check", _control):
+            self.assertEqual(
+                "\x1c", fuzz.minimize("[a]\nb = 1\n  2\x1c3\n[c]\n", "bad")
+            )
+
+    def test_work_distinct_failures(self) -> None:
+        texts = itertools.cycle(["[a]\n\x1c\n", "[b]\n\x1d\n", "[c]\n\x1c\n"])
+        with patch.object(fuzz, "check", _control), patch.object(
+            fuzz, "mutate", lambda *_: next(texts)
+        ):
+            executions, found = fuzz._work(0, ["[a]\n"], frozenset(), 0.1)
+        self.assertGreater(executions, 3)
+        # Both, though they fail the same way, and each once
+        self.assertEqual(["\x1c", "\x1d"], [f.minimized for f in found if f.failure])
+
+    def test_run(self) -> None:
+        d = self._tmp.name
+        with patch.object(fuzz, "check", _control), patch.object(fuzz, "ROUND", 0.1):
+            reported: List[fuzz.Found] = []
+            result = fuzz.run(d, 0.5, seed=0, report=reported.append)
+            self.assertGreater(result.executions, len(fuzz.SEEDS))
+            self.assertEqual([], result.replayed)
+            self.assertEqual(["\x1c"], [f.minimized for f in result.failures])
+            self.assertEqual(result.failures, reported)
+            self.assertTrue(result.corpus)
+
+            failures = os.path.join(d, "failures")
+            (name,) = os.listdir(failures)
+            with open(os.path.join(failures, name), newline="") as f:
+                self.assertEqual("\x1c", f.read())
+            texts = fuzz.Corpus(d).load()
+            self.assertEqual("\x1c", texts[0])
+            self.assertIn(result.failures[0].text, texts)
+
+            # Replayed first, and not reported again
+            found: List[fuzz.Found] = []
+            result = fuzz.run(d, 0, report=found.append)
+            self.assertEqual(len(set(texts + list(fuzz.SEEDS))), result.executions)
+            self.assertEqual(["\x1c"], [f.minimized for f in result.replayed])
+            self.assertEqual(result.replayed, found)
+            self.assertEqual([], result.failures)
+
+    def test_main(self) -> None:
+        d = os.path.join(self._tmp.name, "corpus")
+        buf = io.StringIO()
+        with contextlib.redirect_stdout(buf):
+            code = fuzz.main(["--corpus", d, "--time", "0.5", "-j", "2"])
+        m = re.search(
+            r"^(\d+) executions, \d+ new inputs, (\d+) failed on replay, (\d+) new "
+            r"failures\n\Z",
+            buf.getvalue(),
+            re.M,
+        )
+        assert m is not None
+        self.assertGreater(int(m.group(1)), len(fuzz.SEEDS))
+        self.assertEqual(int(m.group(2)) + int(m.group(3)) > 0, code == 1)
+        self.assertTrue(os.listdir(d))
+
+        buf = io.StringIO()
+        with contextlib.redirect_stdout(buf), patch.object(fuzz, "check", _control):
+            code = fuzz.main(["--corpus", d, "--time", "0.2", "-j", "1"])
+        self.assertEqual(1, code)
+        self.assertIn("bad: '\\x1c'\n", buf.getvalue())
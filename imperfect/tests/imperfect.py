@@ -1,5 +1,8 @@
 import configparser
+import io
 import itertools
+import os
+import tempfile
 import unittest
 from typing import List, Optional
 
@@ -73,6 +76,10 @@ class ImperfectTests(unittest.TestCase):
         conf = imperfect.parse_string("[s]\na=\n #comment\n b\n")
         self.assertEqual("\nb", conf["s"]["a"])
 
+    def test_multiline_with_unindented_comment(self) -> None:
+        conf = imperfect.parse_string("[s]\na=1\n\n#comment\n b\n")
+        self.assertEqual("1\n\nb", conf["s"]["a"])
+
     def test_allow_no_value(self) -> None:
         conf = imperfect.parse_string("[s]\na=", allow_no_value=True)
         self.assertEqual("", conf["s"]["a"])
@@ -99,6 +106,9 @@ class ImperfectTests(unittest.TestCase):
             ("[s]\n[s2]\na=1",),
             ("[s]\n  a = 1  \n\n",),
             ("#comment\n[s]\na=1\n#comment2",),
+            ("[s]\na=1\n#comment\n  b\n",),
+            ("[s]\na=1\n\r\n;comment\n\n  b\n",),
+            ("[s]\n  junk\n",),
         ],
         name_func=(lambda a, b, c: f"{a.__name__}_{b}"),
     )
@@ -106,6 +116,40 @@ class ImperfectTests(unittest.TestCase):
         conf = imperfect.parse_string(example)
         self.assertEqual(example, conf.text)
 
+    @parameterized.expand(  # type: ignore
+        [
+            ("",),
+            ("[s]\na=1",),
+            ("#comment\n[s]\na=\n  1\n\n  2\n#comment2\n",),
+            ("[s]\r\na = 1\r\n\r\n",),
+            ("[s]\na=1\r\rb=2\n",),
+        ],
+    )
+    def test_parse_file_matches_parse_string(self, example: str) -> None:
+        expected = imperfect.parse_string(example)
+        conf = imperfect.parse_file(io.StringIO(example, newline="\n"))
+        self.assertEqual(expected, conf)
+        self.assertEqual(example, conf.text)
+
+    def test_parse_path(self) -> None:
+        data = "[s]\r\na = 1\r\nb = 2\n"
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "setup.cfg")
+            with open(path, "w", newline="") as f:
+                f.write(data)
+            conf = imperfect.parse_path(path)
+        self.assertEqual(data, conf.text)
+        self.assertEqual("1", conf["s"]["a"])
+        self.assertEqual("2", conf["s"]["b"])
+
+    def test_compact_nodes(self) -> None:
+        conf = imperfect.parse_string("[s]\n  a = 1\r\n  b = 2\r\n")
+        a, b = conf["s"].entries
+        self.assertFalse(hasattr(a, "__dict__"))
+        self.assertFalse(hasattr(a.value[0], "__dict__"))
+        self.assertIs(a.whitespace_before_key, b.whitespace_before_key)
+        self.assertIs(a.value[0].newline, b.value[0].newline)
+
     def test_exhaustive_roundtrip(self) -> None:
         for example in variations("sect", "a", "1"):
             oracle = configparser.RawConfigParser()
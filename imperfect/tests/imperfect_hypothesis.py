@@ -6,7 +6,7 @@ from typing import Any, Callable, List, Union
 import hypothesis.strategies as st
 from hypothesis import example, given, HealthCheck, settings
 
-from .. import parse_string
+from .. import parse_bytes, parse_string
 
 whitespace = (" ", "\t", "\n", "\r")
 line_noise = ("#", ";", "=", ":")
@@ -132,6 +132,9 @@ class ImperfectHypothesisTest(unittest.TestCase):
                     list(rcp[section].keys()),
                 )
 
+        data = text.encode("utf-8", "surrogateescape")
+        self.assertEqual(data, parse_bytes(data).data)
+
     # @given(
     #     st.lists(ini_section() | ini_value() | continued_value(), min_size=2).filter(
     #         configparser_is_ok_with_it(empty_lines_in_values=False)
@@ -0,0 +1,149 @@
+import configparser
+import unittest
+from typing import Any, Dict, Tuple, Type
+
+from parameterized import parameterized
+
+import imperfect
+from imperfect.interpolation import BasicInterpolation, ExtendedInterpolation
+
+BASIC = """\
+[DEFAULT]
+root = /srv
+dir = %(root)s/%(name)s
+
+[app]
+name = app
+log = %(dir)s/log
+pct = 100%%
+missing = %(nope)s
+bad = 5%
+open = %(x
+loop = %(loop)s
+A = %(Name)s
+
+[other]
+name = other
+deep = %(dir)s
+"""
+
+EXTENDED = """\
+[DEFAULT]
+root = /srv
+dir = ${root}/${name}
+
+[app]
+name = app
+log = ${dir}/log
+cost = $$5
+other = ${other:deep}
+missing = ${other:nope}
+nosection = ${nope:x}
+colons = ${a:b:c}
+bad = $x
+open = ${x
+loop = ${app:loop}
+
+[other]
+name = other
+deep = ${dir}
+"""
+
+CASES = [
+    (BASIC, configparser.BasicInterpolation, BasicInterpolation),
+    (EXTENDED, configparser.ExtendedInterpolation, ExtendedInterpolation),
+]
+
+
+def _result(f: Any, section: str, key: str) -> Tuple[str, Any]:
+    try:
+        return ("ok", f(section, key))
+    except configparser.Error as e:
+        return (type(e).__name__, e.args)
+
+
+class InterpolationTest(unittest.TestCase):
+    @parameterized.expand(CASES)  # type: ignore
+    def test_configparser(
+        self, text: str, theirs: Type[configparser.Interpolation], ours: Any
+    ) -> None:
+        cp = configparser.ConfigParser(interpolation=theirs())
+        cp.read_string(text)
+        interp = ours(imperfect.parse_string(text))
+        expected: Dict[Tuple[str, str], Tuple[str, Any]] = {}
+        for section in ["DEFAULT"] + cp.sections():
+            for key in cp[section]:
+                expected[section, key] = _result(cp.get, section, key)
+                self.assertEqual(
+                    expected[section, key], _result(interp.get, section, key)
+                )
+        # Checked up front
+        self.assertEqual(
+            {k: v for k, v in expected.items() if v[0] != "ok"},
+            {
+                (interp._name(s), k): (type(e).__name__, e.args)
+                for (s, k), e in interp.errors.items()
+            },
+        )
+        with self.assertRaises(KeyError):
+            interp.get("app", "nope")
+        with self.assertRaises(KeyError):
+            interp.get("nope", "root")
+
+    def test_cached(self) -> None:
+        conf = imperfect.parse_string(BASIC)
+        interp = BasicInterpolation(conf)
+        self.assertEqual("/srv/app/log", interp.get("app", "log"))
+        self.assertIs(interp.get("app", "log"), interp.get("app", "log"))
+        # Editing the tree directly isn't noticed until invalidated
+        conf.set_value("DEFAULT", "root", "/opt")
+        self.assertEqual("/srv/app/log", interp.get("app", "log"))
+        other = interp.get("other", "deep")
+        interp.invalidate("app", "name")
+        self.assertEqual("/srv/app/log", interp.get("app", "log"))
+        self.assertIs(other, interp.get("other", "deep"))
+
+        interp.invalidate("DEFAULT", "root")
+        self.assertEqual("/opt/app/log", interp.get("app", "log"))
+        self.assertEqual("/opt/other", interp.get("other", "deep"))
+
+        # Fixing a key fixes the keys that refer to it
+        interp.set_value("app", "nope", "yes")
+        interp.set_value("app", "loop", "%(nope)s")
+        self.assertEqual("yes", interp.get("app", "missing"))
+        self.assertEqual(
+            [("app", "bad"), ("app", "open")],
+            [k for k in interp.errors if k[0] == "app"],
+        )
+        interp.set_value("DEFAULT", "new", "%(nope)s")
+        self.assertEqual("yes", interp.get("app", "new"))
+        self.assertIn(("other", "new"), interp.errors)
+
+    def test_sections(self) -> None:
+        conf = imperfect.parse_string(EXTENDED)
+        interp = ExtendedInterpolation(conf)
+        self.assertEqual("/srv/other", interp.get("app", "other"))
+        self.assertIn(("app", "nosection"), interp.errors)
+        interp.set_value("nope", "x", "here")
+        self.assertNotIn(("app", "nosection"), interp.errors)
+        self.assertEqual("here", interp.get("app", "nosection"))
+
+        del conf["other"]
+        interp.invalidate("other")
+        self.assertIn(("app", "other"), interp.errors)
+        del conf["DEFAULT"]
+        interp.invalidate("DEFAULT")
+        self.assertIn(("app", "log"), interp.errors)
+        with self.assertRaises(KeyError):
+            interp.get("app", "dir")
+
+    def test_depth(self) -> None:
+        text = "[s]\nk0 = x\n" + "".join(f"k{i} = %(k{i - 1})s\n" for i in range(1, 12))
+        cp = configparser.ConfigParser()
+        cp.read_string(text)
+        interp = BasicInterpolation(imperfect.parse_string(text))
+        for i in range(12):
+            self.assertEqual(
+                _result(cp.get, "s", f"k{i}"), _result(interp.get, "s", f"k{i}")
+            )
+        self.assertEqual([("s", "k11")], list(interp.errors))
@@ -0,0 +1,112 @@
+import copy
+import dataclasses
+import io
+import pickle
+import unittest
+
+import imperfect
+from imperfect.types import LazySection
+
+EXAMPLE = """\
+# initial
+[a]
+a1 = 1
+  more
+# belongs to b
+
+[b]
+b1 = 2
+[c]
+c1 =
+  3
+# final
+"""
+
+
+class LazyTest(unittest.TestCase):
+    def test_build_untouched(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, lazy=True)
+        self.assertEqual(["a", "b", "c"], conf.keys())
+        self.assertEqual(EXAMPLE, conf.text)
+        self.assertIs(LazySection, type(conf.sections[1]))
+
+    def test_same_tree(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, lazy=True)
+        self.assertEqual("2", conf["b"]["b1"])
+        self.assertEqual(imperfect.parse_string(EXAMPLE), conf)
+        for s in conf.sections:
+            self.assertIs(imperfect.ConfigSection, type(s))
+
+    def test_only_parses_what_is_used(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, lazy=True)
+        conf.set_value("b", "b1", "x")
+        a, b, c = conf.sections
+        self.assertIs(LazySection, type(a))
+        self.assertIs(LazySection, type(b))
+        # b's leading whitespace comes from parsing a
+        self.assertEqual("# belongs to b\n\n", b.leading_whitespace)
+        self.assertIs(imperfect.ConfigSection, type(a))
+        self.assertIs(imperfect.ConfigSection, type(b))
+        # c was parsed up front, being last
+        self.assertEqual("# final\n", conf.final_comment)
+        self.assertEqual(EXAMPLE.replace("b1 = 2", "b1 = x"), conf.text)
+
+    def test_delete_and_reorder(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, lazy=True)
+        eager = imperfect.parse_string(EXAMPLE)
+        del conf["b"]
+        del eager["b"]
+        self.assertEqual(eager.text, conf.text)
+
+        conf = imperfect.parse_string(EXAMPLE, lazy=True)
+        eager = imperfect.parse_string(EXAMPLE)
+        conf.sections.reverse()
+        eager.sections.reverse()
+        self.assertEqual(eager.text, conf.text)
+
+    def test_set_leading_whitespace(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, lazy=True)
+        conf.sections[1].leading_whitespace = ""
+        self.assertEqual(EXAMPLE.replace("# belongs to b\n\n", ""), conf.text)
+
+    def test_set_entries(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, lazy=True)
+        conf.sections[0].entries = []
+        self.assertEqual(EXAMPLE.replace("a1 = 1\n  more\n", ""), conf.text)
+
+    def test_copy(self) -> None:
+        eager = imperfect.parse_string(EXAMPLE)
+        self.assertEqual(
+            eager, copy.deepcopy(imperfect.parse_string(EXAMPLE, lazy=True))
+        )
+        self.assertEqual(
+            eager,
+            pickle.loads(pickle.dumps(imperfect.parse_string(EXAMPLE, lazy=True))),
+        )
+
+    def test_replace(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, lazy=True)
+        section = dataclasses.replace(conf.sections[1], name="z")
+        self.assertIs(imperfect.ConfigSection, type(section))
+        self.assertEqual("z", section.name)
+        self.assertEqual("2", section["b1"])
+        made = LazySection(
+            *[getattr(section, f.name) for f in dataclasses.fields(section)]
+        )
+        self.assertIs(imperfect.ConfigSection, type(made))
+        self.assertEqual(section, made)
+
+    def test_errors_up_front(self) -> None:
+        with self.assertRaises(imperfect.ParseError):
+            imperfect.parse_string("a=1\n[a]\n[b]\n", lazy=True)
+
+    def test_falls_back(self) -> None:
+        # Could be a continuation line, so we have to parse
+        text = "[a]\nb=\n [c]\n[d]\n"
+        conf = imperfect.parse_string(text, lazy=True)
+        self.assertEqual(["a", "d"], conf.keys())
+        self.assertIs(imperfect.ConfigSection, type(conf.sections[0]))
+
+    def test_parse_file(self) -> None:
+        conf = imperfect.Parser(lazy=True).parse_file(io.StringIO(EXAMPLE))
+        self.assertEqual(EXAMPLE, conf.text)
@@ -0,0 +1,111 @@
+import re
+import unittest
+from typing import List, Optional, Tuple
+from unittest.mock import patch
+
+import imperfect
+from imperfect.query import compile, Match, Selector
+
+EXAMPLE = """\
+[env:prod]
+read_timeout = 30
+name = x
+READ_TIMEOUT = 1
+[env:dev]
+connect_timeout = 5
+retries = 3
+[other]
+a_timeout = 1
+[ENV:prod]
+shadowed_timeout = 2
+"""
+
+
+def _names(matches: List[Match]) -> List[Tuple[str, Optional[str]]]:
+    return [(m.section.name, m.entry.key if m.entry else None) for m in matches]
+
+
+class QueryTest(unittest.TestCase):
+    def test_compile(self) -> None:
+        for kwargs in ({}, {"spans": True}, {"lazy": True}):
+            conf = imperfect.parse_string(EXAMPLE, **kwargs)
+            for selector, expected in [
+                ("[env:*]", [("env:prod", None), ("env:dev", None)]),
+                ("[*]", [("env:prod", None), ("env:dev", None), ("other", None)]),
+                ("[OTHER]", [("other", None)]),
+                ("[missing]", []),
+                (
+                    " [env:*] *_timeout ",
+                    [("env:prod", "read_timeout"), ("env:dev", "connect_timeout")],
+                ),
+                ("[env:*] *_timeout = 3?", [("env:prod", "read_timeout")]),
+                ("[env:*] retries=", []),
+                ("[env:[dp]*] retries = 3", [("env:dev", "retries")]),
+                (
+                    "[/env:\\w+/] /.*_(timeout)/ = /\\d/",
+                    [("env:dev", "connect_timeout")],
+                ),
+                ("[/ENV:P.*/] /N=?AME/", [("env:prod", "name")]),
+                ("[*] A_Timeout", [("other", "a_timeout")]),
+            ]:
+                with self.subTest(selector=selector, **kwargs):
+                    self.assertEqual(expected, _names(compile(selector).run(conf)))
+
+    def test_selector(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE)
+        sel = Selector(key=re.compile("r.*"), value=lambda v: int(v) > 10)
+        self.assertEqual([("env:prod", "read_timeout")], _names(sel.run(conf)))
+        self.assertIs(conf, sel.run(conf)[0].conf)
+        with self.assertRaisesRegex(ValueError, "needs a key"):
+            Selector("*", value="1")
+
+    def test_errors(self) -> None:
+        for selector in ["env", "[env", "[/env]", "[env] /key", "[env] /key/ 1"]:
+            with self.subTest(selector=selector):
+                with self.assertRaises(ValueError):
+                    compile(selector)
+
+    def test_edit(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, spans=True)
+        for m in compile("[env:*] *_timeout").run(conf):
+            assert m.entry is not None
+            m.entry.set_value("60")
+        for m in compile("[*] retries").run(conf):
+            assert m.entry is not None
+            m.section.entries.remove(m.entry)
+        self.assertEqual(
+            [("env:prod", "read_timeout"), ("env:dev", "connect_timeout")],
+            _names(compile("[env:*] * = 60").run(conf)),
+        )
+        self.assertEqual([], compile("[*] retries").run(conf))
+
+    def test_stale_index(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE)
+        sel = compile("[*] *_timeout")
+        self.assertEqual(3, len(sel.run(conf)))
+        # Renamed in place, without invalidating
+        conf["other"].entries[0].key = "renamed"
+        conf.sections[0].name = "env:renamed"
+        self.assertEqual(
+            [("env:renamed", None), ("env:dev", None), ("ENV:prod", None)],
+            _names(compile("[env:*]").run(conf)),
+        )
+        self.assertEqual(3, len(sel.run(conf)))
+
+        # Plain lists
+        conf.sections = list(conf.sections)
+        conf.sections[1].entries = list(conf.sections[1].entries)
+        self.assertEqual(3, len(sel.run(conf)))
+        conf.sections.append(imperfect.ConfigSection.create("ENV:DEV"))
+        self.assertEqual([("env:dev", None)], _names(compile("[env:dev]").run(conf)))
+
+    def test_many(self) -> None:
+        confs = [
+            ("a.ini", imperfect.parse_string(EXAMPLE)),
+            ("b.ini", imperfect.parse_string("[env:x]\ny_timeout=1\n")),
+        ]
+        sel = compile("[env:*] *_timeout")
+        with patch("imperfect.query.CACHE_SIZE", 2):
+            results = sel.run_many(confs)
+            self.assertEqual(results, sel.run_many(confs))
+        self.assertEqual(["a.ini", "a.ini", "b.ini"], [name for name, _ in results])
@@ -0,0 +1,185 @@
+import copy
+import dataclasses
+import io
+import pickle
+import unittest
+from typing import cast, List, TextIO
+
+import imperfect
+from imperfect.types import EntryList, SpanEntry, SpanSection
+
+EXAMPLE = """\
+# initial
+[a]
+a1 = 1
+  more
+  # comment
+
+  last
+# belongs to a2
+a2:x\t
+[b]  \r
+b1=
+# final
+"""
+
+
+class Writes:
+    def __init__(self, writes: List[str]) -> None:
+        self.write = writes.append
+
+
+class SpansTest(unittest.TestCase):
+    def test_same_tree(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, spans=True)
+        eager = imperfect.parse_string(EXAMPLE)
+        self.assertEqual(EXAMPLE, conf.text)
+        self.assertIs(SpanSection, type(conf.sections[0]))
+        self.assertIs(SpanEntry, type(conf.sections[0].entries[0]))
+        self.assertEqual(eager, conf)
+        self.assertEqual(conf, eager)
+        self.assertEqual("1\nmore\n\nlast", conf["a"]["a1"])
+        self.assertEqual("x", conf["a"]["a2"])
+        self.assertEqual("", conf["b"]["b1"])
+        self.assertEqual(
+            "# belongs to a2\n", conf["a"].entries[1].whitespace_before_key
+        )
+        self.assertEqual("  ", conf.sections[1].trailing_whitespace)
+        self.assertEqual("\r\n", conf.sections[1].newline)
+        self.assertEqual("# final\n", conf.final_comment)
+
+    def test_empty_lines_in_values(self) -> None:
+        text = "[a]\nb = 1\n\n  2\n"
+        for flag in (True, False):
+            conf = imperfect.parse_string(text, spans=True, empty_lines_in_values=flag)
+            eager = imperfect.parse_string(text, empty_lines_in_values=flag)
+            self.assertEqual(eager, conf)
+            self.assertEqual(eager["a"]["b"], conf["a"]["b"])
+
+    def test_edits(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, spans=True)
+        a, b = conf.sections
+        a1, a2 = a.entries
+
+        # Reading value keeps it, so it can be changed in place
+        a2.value.append(imperfect.ValueLine("  ", "y", "", "\n"))
+        self.assertIs(SpanEntry, type(a2))
+        self.assertEqual("x\ny", conf["a"]["a2"])
+
+        conf.set_value("b", "b1", "2")
+        b.name = "c"
+        self.assertIs(imperfect.ConfigSection, type(b))
+        a1.key = "A1"
+        self.assertIs(imperfect.ConfigEntry, type(a1))
+
+        self.assertEqual(
+            EXAMPLE.replace("a1", "A1")
+            .replace("x\t\n", "x\t\n  y\n")
+            .replace("[b]", "[c]")
+            .replace("b1=", "b1= 2"),
+            conf.text,
+        )
+
+    def test_reorder(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, spans=True)
+        eager = imperfect.parse_string(EXAMPLE)
+        for c in (conf, eager):
+            c.sections[0].entries.reverse()
+        self.assertEqual(eager.text, conf.text)
+
+        # Entries can be moved to other sections, and built alone
+        entry = conf.sections[0].entries.pop()
+        conf.sections[1].entries.append(entry)
+        buf = io.StringIO()
+        entry.build(buf)
+        self.assertEqual("a1 = 1\n  more\n  # comment\n\n  last\n", buf.getvalue())
+        self.assertTrue(conf.text.endswith("b1=\n" + buf.getvalue() + "# final\n"))
+
+    def test_not_equal(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, spans=True)
+        self.assertNotEqual(conf.sections[0], conf.sections[1])
+        self.assertNotEqual(conf.sections[0], "a")
+        self.assertNotEqual(conf.sections[0].entries[0], "a1")
+
+    def test_changed_sections(self) -> None:
+        text = EXAMPLE + "[c]\nc1 = 3\n"
+        conf = imperfect.parse_string(text, spans=True)
+        a, b, c = cast(List[SpanSection], conf.sections)
+        dirty = a._spans.dirty
+        self.assertEqual(imperfect.parse_string(text), conf)
+        self.assertEqual(set(), dirty)
+        writes: List[str] = []
+        conf.build(cast(TextIO, Writes(writes)))
+        # initial_comment, the whole text, final_comment
+        self.assertEqual(["", text, ""], writes)
+
+        conf.set_value("b", "b1", "x")
+        self.assertEqual({b._span}, dirty)
+        conf.sections[2].entries.append(imperfect.ConfigEntry.create("c2", "4"))
+        self.assertEqual({b._span, c._span}, dirty)
+        a.entries[0].value
+        self.assertEqual({a._span, b._span, c._span}, dirty)
+
+    def test_changed_entry_lists(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, spans=True)
+        a, b = cast(List[SpanSection], conf.sections)
+        a.entries.reverse()
+        a.entries.reverse()
+        # Changed, but it's back to the original
+        self.assertEqual({a._span}, a._spans.dirty)
+        writes: List[str] = []
+        conf.build(cast(TextIO, Writes(writes)))
+        self.assertEqual(3, len(writes))
+
+        # Swapped, so neither matches its record
+        eager = imperfect.parse_string(EXAMPLE)
+        for c in (conf, eager):
+            x, y = c.sections
+            x.entries, y.entries = y.entries, x.entries
+        self.assertEqual({a._span}, a._spans.dirty)
+        self.assertEqual(eager.text, conf.text)
+
+        # Copies don't belong to a section
+        entries = copy.copy(b.entries)
+        self.assertIs(EntryList, type(entries))
+        self.assertEqual(b.entries, entries)
+
+    def test_set_whitespace_after_value(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, spans=True)
+        conf["b"].entries[0].whitespace_after_value = "\n"
+        self.assertEqual(EXAMPLE.replace("b1=\n", "b1=\n\n"), conf.text)
+
+    def test_copy(self) -> None:
+        eager = imperfect.parse_string(EXAMPLE)
+        conf = imperfect.parse_string(EXAMPLE, spans=True)
+        self.assertEqual(eager, copy.deepcopy(conf))
+        self.assertEqual(eager, pickle.loads(pickle.dumps(conf)))
+        section = copy.copy(conf.sections[0])
+        self.assertIs(imperfect.ConfigSection, type(section))
+        self.assertIs(conf.sections[0].entries, section.entries)
+
+    def test_replace(self) -> None:
+        conf = imperfect.parse_string(EXAMPLE, spans=True)
+        entry = dataclasses.replace(conf["a"].entries[0], key="z")
+        self.assertIs(imperfect.ConfigEntry, type(entry))
+        self.assertEqual("z", entry.key)
+        self.assertEqual("1\nmore\n\nlast", entry.interpret_value())
+        section = dataclasses.replace(conf.sections[1], name="z")
+        self.assertIs(imperfect.ConfigSection, type(section))
+        self.assertEqual("z", section.name)
+
+    def test_errors(self) -> None:
+        with self.assertRaises(imperfect.ParseError):
+            imperfect.parse_string("a=1\n[a]\n", spans=True)
+
+    def test_with_lazy(self) -> None:
+        text = EXAMPLE + "[c]\nc1 = 3\n"
+        conf = imperfect.parse_string(text, spans=True, lazy=True)
+        self.assertEqual(text, conf.text)
+        self.assertEqual("3", conf["c"]["c1"])
+        self.assertEqual(imperfect.parse_string(text), conf)
+
+    def test_parse_file(self) -> None:
+        conf = imperfect.Parser(spans=True).parse_file(io.StringIO(EXAMPLE))
+        self.assertIs(SpanSection, type(conf.sections[0]))
+        self.assertEqual(EXAMPLE, conf.text)
@@ -0,0 +1,94 @@
+import io
+import tracemalloc
+import unittest
+from typing import List
+
+import imperfect
+from imperfect import ParseStats
+
+EXAMPLE = """\
+# top
+[a]
+b = 1
+  two
+  ; not a comment here
+c = 3
+[d]
+; end
+"""
+
+
+class StatsTest(unittest.TestCase):
+    def parse(self, method: str, *args: object, **kwargs: object) -> ParseStats:
+        seen: List[ParseStats] = []
+        parser = imperfect.Parser(observer=seen.append, **kwargs)  # type: ignore
+        conf = getattr(parser, method)(*args)
+        self.assertEqual(1, len(seen))
+        if method == "parse_bytes":
+            self.assertEqual(args[0], conf.data)
+        elif method == "parse_string":
+            self.assertEqual(args[0], conf.text)
+        return seen[0]
+
+    def test_counts(self) -> None:
+        expected = ParseStats(
+            chars=len(EXAMPLE),
+            lines=8,
+            sections=2,
+            entries=2,
+            continuation_lines=2,
+            comment_lines=3,
+            nodes=8,
+        )
+        for method, args, kwargs in [
+            ("parse_string", (EXAMPLE,), {}),
+            ("parse_string", (EXAMPLE,), {"allow_no_value": True}),
+            ("parse_lines", (imperfect.iter_lines(EXAMPLE),), {}),
+            ("parse_file", (io.StringIO(EXAMPLE, newline=""),), {}),
+        ]:
+            with self.subTest(method=method, **kwargs):
+                stats = self.parse(method, *args, **kwargs)
+                self.assertGreater(stats.scan_time, 0)
+                self.assertGreater(stats.build_time, 0)
+                stats.scan_time = stats.build_time = 0
+                self.assertEqual(expected, stats)
+
+    def test_kinds(self) -> None:
+        stats = self.parse("parse_string", EXAMPLE, spans=True)
+        self.assertEqual(
+            (2, 2, 2, 4),
+            (stats.sections, stats.entries, stats.continuation_lines, stats.nodes),
+        )
+        # Only the headers, with either entry syntax
+        for allow_no_value in (False, True):
+            with self.subTest(allow_no_value=allow_no_value):
+                stats = self.parse(
+                    "parse_string", EXAMPLE, lazy=True, allow_no_value=allow_no_value
+                )
+                self.assertEqual(
+                    (2, 0, 0, 2),
+                    (
+                        stats.sections,
+                        stats.entries,
+                        stats.continuation_lines,
+                        stats.nodes,
+                    ),
+                )
+
+        stats = self.parse("parse_string", EXAMPLE, comment_prefixes=())
+        self.assertEqual(0, stats.comment_lines)
+
+    def test_bytes(self) -> None:
+        data = EXAMPLE.encode("utf-16")
+        stats = self.parse("parse_bytes", data, "utf-16")
+        self.assertEqual((len(data), len(EXAMPLE)), (stats.bytes, stats.chars))
+        self.assertGreater(stats.decode_time, 0)
+
+    def test_allocated(self) -> None:
+        self.assertIsNone(self.parse("parse_string", EXAMPLE).allocated)
+        tracemalloc.start()
+        try:
+            stats = self.parse("parse_string", EXAMPLE * 100)
+        finally:
+            tracemalloc.stop()
+        self.assertGreater(stats.allocated or 0, 0)
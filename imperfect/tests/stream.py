@@ -0,0 +1,145 @@
+import io
+import itertools
+import unittest
+from typing import List, Tuple
+
+from parameterized import parameterized
+
+from .. import Batch, Conflict, Delete, Edit, InsertBefore, parse_string, SetValue
+from ..stream import rewrite
+
+TEXT = """\
+# top
+[a]
+x = 1
+# about y
+y =
+  2
+  3
+
+[b] ; b
+k=v
+
+[A]
+x = dup
+# the end
+"""
+
+EDITS: List[Edit] = [
+    SetValue("a", "x", "10"),
+    SetValue("a", "y", ""),
+    SetValue("a", "new", "n"),
+    Delete("a", "y"),
+    Delete("b"),
+    Delete("a"),
+    Delete("b", "k"),
+    InsertBefore("a", "w", "0", "x"),
+    InsertBefore("b", "j", "i", "k"),
+    InsertBefore("a", "z", "", "missing"),
+    SetValue("c", "k", "v\nw"),
+    Delete("c", "k"),
+    InsertBefore("a", "y", "again", "x"),
+]
+
+
+class StreamTest(unittest.TestCase):
+    def rewrite(self, text: str, batch: Batch) -> Tuple[str, List[Conflict]]:
+        out = io.StringIO()
+        conflicts = rewrite(batch, io.StringIO(text), out)
+        return out.getvalue(), conflicts
+
+    def test_basic(self) -> None:
+        batch = Batch()
+        batch.set_value("a", "x", "10")
+        batch.set_value("A", "Y", "\n4")
+        batch.set_value("a", "new", "n")
+        batch.delete("b")
+        batch.set_value("c", "k", "v")
+        text, conflicts = self.rewrite(TEXT, batch)
+        self.assertEqual([], conflicts)
+        self.assertEqual(
+            """\
+# top
+[a]
+x = 10
+# about y
+y =
+  4
+new = n
+
+[A]
+x = dup
+
+[c]
+k = v
+# the end
+""",
+            text,
+        )
+
+    def test_conflicts(self) -> None:
+        batch = Batch(
+            [
+                Delete("a", "missing"),
+                InsertBefore("a", "y", "2", "x"),
+                Delete("gone"),
+                Delete("gone", "k"),
+                SetValue("b", "k", "1"),
+                SetValue("b", "k", "2"),
+                InsertBefore("a", "x", "2", "y"),
+            ]
+        )
+        text, conflicts = self.rewrite(TEXT, batch)
+        self.assertEqual(
+            [
+                Conflict(batch.edits[0], "missing key"),
+                # Only turns up after x, so it was held back
+                Conflict(batch.edits[1], "key already exists"),
+                Conflict(batch.edits[2], "missing section"),
+                Conflict(batch.edits[3], "section is deleted", batch.edits[2]),
+                Conflict(batch.edits[5], "key is already edited", batch.edits[4]),
+                Conflict(batch.edits[6], "key already exists"),
+            ],
+            conflicts,
+        )
+        self.assertEqual(TEXT.replace("k=v", "k=1"), text)
+
+    def test_empty(self) -> None:
+        self.assertEqual(("", []), self.rewrite("", Batch()))
+        self.assertEqual(
+            ("[a]\nb = 1\n", []), self.rewrite("", Batch([SetValue("a", "b", "1")]))
+        )
+        # Blank line before, like set_value, even though the only section went
+        self.assertEqual(
+            ("\n[b]\nc =\n", []),
+            self.rewrite("[a]\n", Batch([Delete("a"), SetValue("b", "c", "")])),
+        )
+
+    @parameterized.expand(  # type: ignore
+        [(TEXT,), ("",), ("[a]\nx = 1",), ("[b]\n[a]\ny=1\nX=2\nx=3\n\n\n",)]
+    )
+    def test_same_as_batch(self, text: str) -> None:
+        # Pairs that don't conflict with each other, which would depend on which
+        # exist for a stream
+        for edits in itertools.permutations(EDITS, 2):
+            batch = Batch(list(edits))
+            if batch._plan(None)[1]:
+                continue
+            conf = parse_string(text)
+            conflicts = batch.apply(conf, partial=True)
+            self.assertEqual((conf.text, conflicts), self.rewrite(text, batch))
+
+    @parameterized.expand(  # type: ignore
+        [
+            (Delete("a", "missing"),),
+            (Delete("gone"),),
+            (Delete("gone", "k"),),
+            (InsertBefore("a", "x", "2", "y"),),
+        ]
+    )
+    def test_repeated_conflict_same_as_batch(self, edit: Edit) -> None:
+        batch = Batch([edit, edit])
+        conf = parse_string(TEXT)
+        conflicts = batch.apply(conf, partial=True)
+        self.assertEqual(1, len(conflicts))
+        self.assertEqual((conf.text, conflicts), self.rewrite(TEXT, batch))
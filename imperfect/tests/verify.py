@@ -0,0 +1,120 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from typing import Dict, List
+from unittest.mock import patch
+
+from .. import parse_string, verify
+from ..types import ConfigFile
+
+
+class VerifyTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def _write(self, files: Dict[str, str]) -> List[str]:
+        names = []
+        for name, data in files.items():
+            path = os.path.join(self._tmp.name, name)
+            with open(path, "w") as f:
+                f.write(data)
+            names.append(path)
+        return names
+
+    def test_statuses(self) -> None:
+        names = self._write(
+            {
+                "ok.ini": "[a]\nb = 1\n",
+                "empty.ini": "[a]\n",
+                "parse.ini": "b = 1\n",
+                "configparser.ini": "[a]\nb = 1\n[a]\n",
+            }
+        )
+        results = [verify.check(name) for name in names]
+        self.assertEqual(
+            [verify.OK, verify.FAIL_EMPTY, verify.FAIL_PARSE, verify.FAIL_CONFIGPARSER],
+            [r.status for r in results],
+        )
+        self.assertEqual(f"{names[0]} OK", results[0].text())
+        self.assertEqual(
+            f"{names[2]} FAIL TO PARSE Entry outside a section", results[2].text()
+        )
+
+    def test_unreadable(self) -> None:
+        missing = os.path.join(self._tmp.name, "missing.ini")
+        (name,) = self._write({"ok.ini": "[a]\nb = 1\n"})
+        results = list(verify.check_all([missing, name]))
+        self.assertEqual([verify.FAIL_READ, verify.OK], [r.status for r in results])
+        self.assertIn("No such file", results[0].text())
+
+        # Not in the locale's encoding
+        error = UnicodeDecodeError("utf-8", b"\xff", 0, 1, "invalid start byte")
+        with patch("imperfect.verify.open", side_effect=error, create=True):
+            result = verify.check(name)
+        self.assertEqual(verify.FAIL_READ, result.status)
+        self.assertIn("can't decode byte 0xff", result.text())
+
+    def _check_parsed_as(
+        self, data: str, parsed: str, roundtrip: bool = True
+    ) -> verify.Result:
+        # Stands in for a parser bug that reads `data` as if it were `parsed`
+        (name,) = self._write({"x.ini": data})
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(
+                patch.object(verify, "parse_string", lambda _: parse_string(parsed))
+            )
+            if roundtrip:
+                stack.enter_context(
+                    patch.object(ConfigFile, "build", lambda _, buf: buf.write(data))
+                )
+            return verify.check(name)
+
+    def test_disagreements(self) -> None:
+        result = self._check_parsed_as("[a]\nb = 1\n", "[x]\n", roundtrip=False)
+        self.assertEqual(verify.FAIL_ROUND_TRIP, result.status)
+
+        result = self._check_parsed_as("[a]\nb = 1\n", "[a]\nb = 2\n")
+        self.assertEqual(verify.FAIL_COMPARE, result.status)
+        self.assertEqual(
+            f"{result.name} a b FAIL COMPARE\nconfigpar: '1'\nimperfect: '2'",
+            result.text(),
+        )
+
+        result = self._check_parsed_as("[a]\nb = 1\n", "[a]\nc = 2\n")
+        self.assertEqual(verify.FAIL, result.status)
+        self.assertEqual(("a", "b"), (result.section, result.key))
+
+    def test_main_json(self) -> None:
+        names = self._write({"ok.ini": "[a]\nb = 1\n", "empty.ini": "[a]\n"})
+        buf = io.StringIO()
+        with contextlib.redirect_stdout(buf):
+            code = verify.main(["--json", "--jobs", "2"] + names)
+        self.assertEqual(1, code)
+        lines = [json.loads(line) for line in buf.getvalue().splitlines()]
+        self.assertEqual([names[0], names[1]], [line["name"] for line in lines[:2]])
+        self.assertEqual(["OK", "FAIL EMPTY"], [line["status"] for line in lines[:2]])
+        self.assertGreater(lines[0]["imperfect_time"], 0)
+        self.assertGreater(lines[0]["configparser_time"], 0)
+        summary = lines[2]["summary"]
+        self.assertEqual(2, summary["total"])
+        self.assertEqual(1, summary["failed"])
+        self.assertEqual({"OK": 1, "FAIL EMPTY": 1}, summary["statuses"])
+
+    def test_main_text(self) -> None:
+        names = self._write({"a.ini": "[a]\nb = 1\n", "b.ini": "[a]\nc = 1\n"})
+        buf = io.StringIO()
+        with contextlib.redirect_stdout(buf):
+            code = verify.main(names)
+        self.assertEqual(0, code)
+        self.assertEqual(
+            f"{names[0]} OK\n{names[1]} OK\n2 files, 0 failed\n", buf.getvalue()
+        )
+
+        buf = io.StringIO()
+        with contextlib.redirect_stdout(buf):
+            verify.verify(names[0])
+        self.assertEqual(f"{names[0]} OK\n", buf.getvalue())
@@ -0,0 +1,179 @@
+import os
+import tempfile
+import unittest
+from typing import Any, Dict, List
+
+from parameterized import parameterized
+
+from imperfect.cache import ParseCache
+from imperfect.types import LazySection
+from imperfect.workspace import Workspace
+
+SETUP = "[metadata]\nname = a\n\n[options]\npython_requires = >=3.7\n"
+
+
+class WorkspaceTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.root = self._tmp.name
+
+    def write(self, path: str, text: str) -> None:
+        full = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w") as f:
+            f.write(text)
+
+    @parameterized.expand([({},), ({"spans": True},), ({"lazy": True},)])  # type: ignore
+    def test_index(self, kwargs: Dict[str, Any]) -> None:
+        self.write("a/setup.cfg", SETUP)
+        self.write("b/setup.cfg", SETUP.replace("python_requires", "Python_Requires"))
+        self.write(
+            "c/tox.ini",
+            "[tox]\nenvlist = py3\n[OPTIONS]\nzip_safe = 1\nZip_Safe = 0\n"
+            # Hidden by the first, like in conf["options"]
+            "[options]\npython_requires = 2\n",
+        )
+        self.write("c/README", "[options]\npython_requires = 2\n")
+        ws = Workspace(self.root, **kwargs)
+
+        a = os.path.join("a", "setup.cfg")
+        b = os.path.join("b", "setup.cfg")
+        c = os.path.join("c", "tox.ini")
+        self.assertEqual([a, b, c], sorted(ws.files))
+        self.assertEqual([a, b], ws.paths("options", "python_requires"))
+        self.assertEqual([c], ws.paths("options", "zip_safe"))
+        self.assertEqual([a, b, c], ws.paths("Options"))
+        self.assertEqual([], ws.paths("options", "missing"))
+        found = ws.find("options", "PYTHON_REQUIRES")
+        self.assertEqual([a, b], [p for p, m in found])
+        self.assertEqual(">=3.7", found[1][1].entry.interpret_value())  # type: ignore
+        self.assertIs(ws.files[b], found[1][1].conf)
+        self.assertEqual("OPTIONS", ws.find("options")[2][1].section.name)
+        # Round trip
+        self.assertEqual(SETUP, ws.files[a].text)
+
+    def test_shared(self) -> None:
+        self.write("a.ini", "[s]\n" + "".join(f"key{i} = {i}\n" for i in range(3)))
+        self.write("b.ini", "[s]\n" + "".join(f"key{i} = x\n" for i in range(3)))
+        ws = Workspace(self.root)
+        a, b = ws.files["a.ini"], ws.files["b.ini"]
+        self.assertIs(a.sections[0].name, b.sections[0].name)
+        for ea, eb in zip(a["s"].entries, b["s"].entries):
+            self.assertIs(ea.key, eb.key)
+
+    def test_lazy(self) -> None:
+        self.write("a.ini", "[s]\nk = 1\n[t]\nj = 2\n[u]\n")
+        self.write("b.ini", "[t]\nj = 3\n[s]\nk = 4\n")
+        ws = Workspace(self.root, lazy=True)
+
+        def loaded() -> List[str]:
+            return [
+                f"{p}:{s.name}"
+                for p, conf in sorted(ws.files.items())
+                for s in conf.sections
+                if type(s) is not LazySection or s._entries_loaded()
+            ]
+
+        # Sections are indexed without parsing them (but the last one in a file
+        # always is)
+        self.assertEqual(["a.ini", "b.ini"], ws.paths("s"))
+        self.assertEqual(["a.ini:u", "b.ini:s"], loaded())
+        # Until a key in one is looked for
+        self.assertEqual(["a.ini", "b.ini"], ws.paths("t", "j"))
+        self.assertEqual(["a.ini:t", "a.ini:u", "b.ini:t", "b.ini:s"], loaded())
+        self.assertEqual(["a.ini", "b.ini"], ws.paths("t", "j"))
+        self.assertEqual(
+            "3", ws.find("T", "J")[1][1].entry.interpret_value()  # type: ignore
+        )
+        a = ws.files["a.ini"]
+        self.assertIs(a["t"].entries[0].key, ws.files["b.ini"]["t"].entries[0].key)
+
+        os.unlink(os.path.join(self.root, "a.ini"))
+        ws.refresh()
+        self.assertEqual(["b.ini"], ws.paths("s", "k"))
+        self.assertEqual({}, ws._pending)
+
+        self.write("c.ini", "[v]\nk = 1\n[w]\n")
+        ws.refresh()
+        del ws.files["c.ini"]["v"]
+        self.assertEqual([], ws.paths("v", "k"))
+
+    def test_names_dropped(self) -> None:
+        self.write("a.ini", "[s]\nshared = 1\nonly_a = 1\n")
+        self.write("b.ini", "[S]\nshared = 2\n")
+        ws = Workspace(self.root)
+        self.assertIn("only_a", ws._names)
+
+        self.write("a.ini", "[s]\nshared = 1\nnow_a = 22\n")
+        ws.refresh()
+        self.assertIn("now_a", ws._names)
+        self.assertNotIn("only_a", ws._names)
+
+        os.unlink(os.path.join(self.root, "a.ini"))
+        ws.refresh()
+        self.assertEqual({"S", "s", "shared"}, set(ws._names))
+        os.unlink(os.path.join(self.root, "b.ini"))
+        ws.refresh()
+        self.assertEqual({}, ws._names)
+        self.assertEqual({}, ws._uses)
+
+    def test_refresh(self) -> None:
+        self.write("a.ini", "[s]\nk = 1\n")
+        self.write("b.ini", "[s]\nk = 1\n")
+        ws = Workspace(self.root)
+        b = ws.files["b.ini"]
+        self.assertEqual([], ws.refresh())
+
+        # A different size, since the mtime might not have moved
+        self.write("a.ini", "[s]\nother = 1\n")
+        self.write("c.ini", "[s]\nk = 1\n")
+        os.unlink(os.path.join(self.root, "b.ini"))
+        self.write("d.ini", "k = outside\n")
+        self.assertEqual(["a.ini", "c.ini", "d.ini", "b.ini"], ws.refresh())
+        self.assertEqual(["c.ini"], ws.paths("s", "k"))
+        self.assertEqual(["a.ini"], ws.paths("s", "other"))
+        self.assertNotIn("b.ini", ws.files)
+        self.assertIn("d.ini", ws.errors)
+        self.assertNotIn("d.ini", ws.files)
+
+        # Fixed
+        self.write("d.ini", "[s]\n")
+        self.assertEqual(["d.ini"], ws.refresh())
+        self.assertEqual({}, ws.errors)
+        self.assertEqual(["a.ini", "c.ini", "d.ini"], ws.paths("s"))
+        self.assertIsNot(b, ws.files.get("b.ini"))
+
+    def test_edit(self) -> None:
+        self.write("a.ini", "[s]\nk = 1\n")
+        ws = Workspace(self.root)
+        conf = ws.files["a.ini"]
+        del conf["s"]["k"]
+        # Not reindexed yet, but nothing stale comes back
+        self.assertEqual(["a.ini"], ws.paths("s", "k"))
+        self.assertEqual([], ws.find("s", "k"))
+        conf.set_value("t", "j", "2")
+        self.assertEqual([], ws.paths("t", "j"))
+
+        self.assertTrue(ws.save("a.ini"))
+        self.assertEqual([], ws.paths("s", "k"))
+        self.assertEqual(["a.ini"], ws.paths("t", "j"))
+        self.assertEqual([], ws.refresh())
+        self.assertIs(conf, ws.files["a.ini"])
+        with open(os.path.join(self.root, "a.ini")) as f:
+            self.assertEqual(conf.text, f.read())
+
+        del conf["t"]
+        ws.reindex("a.ini")
+        self.assertEqual([], ws.find("t"))
+        self.assertEqual(["a.ini"], ws.paths("s"))
+
+    def test_cache(self) -> None:
+        self.write("a.ini", SETUP)
+        with tempfile.TemporaryDirectory() as d:
+            cache = ParseCache(d)
+            Workspace(self.root, cache=cache)
+            ws = Workspace(self.root, cache=cache)
+            self.assertEqual(1, cache.hits)
+            self.assertEqual(["a.ini"], ws.paths("metadata", "name"))
+            self.assertEqual(SETUP, ws.files["a.ini"].text)
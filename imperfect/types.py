@@ -1,23 +1,283 @@
 import io
-from dataclasses import dataclass, field
-from typing import List, TextIO
+from abc import ABCMeta, abstractmethod
+from array import array
+from dataclasses import dataclass, field, fields
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    ClassVar,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    SupportsIndex,
+    TextIO,
+    Tuple,
+    TypeVar,
+    Union,
+)
+from weakref import ref
+
+from .files import Path, write_if_changed
+
+T = TypeVar("T")
 
 
 class ParseError(Exception):
     pass
 
 
-@dataclass
+_setattr = object.__setattr__
+
+
+class _Owned:
+    """
+    A node kept in a `_WatchedList`, whose `_owner` is told when one of the
+    `_watched` fields changes.  That's the list, once it keeps something made
+    from its items (an index, or an interpreted value), or weak references to
+    each of them if there's more than one (e.g. after `copy.copy` of a list).
+    """
+
+    __slots__ = ("_owner",)
+    _owner: Union[None, "_WatchedList[Any]", Tuple["ref[_WatchedList[Any]]", ...]]
+    _watched: ClassVar[FrozenSet[str]] = frozenset()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name not in self._watched:
+            _setattr(self, name, value)
+            return
+        changed = getattr(self, name) != value
+        _setattr(self, name, value)
+        if not changed:
+            return
+        owner = self._owner
+        if type(owner) is tuple:
+            for r in owner:
+                o = r()
+                if o is not None:
+                    o._changed()
+        elif owner is not None:
+            owner._changed()  # type: ignore[union-attr]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Not the owner, which a copy isn't in
+        return {f.name: getattr(self, f.name) for f in fields(self)}  # type: ignore[arg-type]
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        _set_owner(self, None)
+        for name, value in state.items():
+            _setattr(self, name, value)
+
+
+_set_owner: Callable[[Any, Any], None] = _Owned.__dict__["_owner"].__set__
+
+
+def _adopt(item: Any, owner: "_WatchedList[Any]") -> None:
+    # Done by a list as it starts keeping something that depends on `item`
+    prev = item._owner
+    if prev is None:
+        _set_owner(item, owner)
+    elif prev is not owner:
+        # Maybe still in another list, which has to hear about changes too
+        refs = prev if type(prev) is tuple else (ref(prev),)
+        lists = [r() for r in refs]
+        if all(x is not owner for x in lists):
+            _set_owner(
+                item,
+                tuple(r for r, x in zip(refs, lists) if x is not None) + (ref(owner),),
+            )
+
+
+def _slot_setters(cls: type) -> Tuple[Callable[[Any, Any], None], ...]:
+    """
+    The setters of the slots behind each field of `cls`, in order.  `__init__`
+    uses these, to skip `_Owned.__setattr__`; a node being made isn't watched.
+    """
+    return tuple(cls.__dict__[f.name].__set__ for f in fields(cls))
+
+
+class _WatchedList(List[T], metaclass=ABCMeta):
+    """
+    A list that calls `_changed` after anything changes it, or one of the
+    `_watched` fields of an item it has adopted.
+    """
+
+    __slots__ = ("__weakref__",)
+
+    @abstractmethod
+    def _changed(self) -> None:  # pragma: no cover
+        ...
+
+    def append(self, item: T) -> None:
+        super().append(item)
+        self._changed()
+
+    def extend(self, items: Iterable[T]) -> None:
+        super().extend(items)
+        self._changed()
+
+    def insert(self, i: SupportsIndex, item: T) -> None:
+        super().insert(i, item)
+        self._changed()
+
+    def remove(self, item: T) -> None:
+        super().remove(item)
+        self._changed()
+
+    def pop(self, i: SupportsIndex = -1) -> T:
+        self._changed()
+        return super().pop(i)
+
+    def clear(self) -> None:
+        super().clear()
+        self._changed()
+
+    def sort(self, *args: Any, **kwargs: Any) -> None:
+        super().sort(*args, **kwargs)
+        self._changed()
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._changed()
+
+    def __setitem__(self, i: Any, item: Any) -> None:
+        super().__setitem__(i, item)
+        self._changed()
+
+    def __delitem__(self, i: Any) -> None:
+        super().__delitem__(i)
+        self._changed()
+
+    def __iadd__(self, items: Iterable[T]) -> "_WatchedList[T]":  # type: ignore[override,misc]
+        self.extend(items)
+        return self
+
+    def __imul__(self, n: SupportsIndex) -> "_WatchedList[T]":
+        super().__imul__(n)
+        self._changed()
+        return self
+
+
+class IndexedList(_WatchedList[T]):
+    """
+    A list that can find items by case-insensitive name without a scan.
+
+    The lowercase name -> first position mapping is built on the first lookup,
+    kept up to date by `append`, and thrown away by any other change to the list,
+    including renaming an item in it.
+    """
+
+    __slots__ = ("_positions",)
+    _positions: Optional[Dict[str, int]]
+
+    def __new__(cls, *args: Any, **kwargs: Any) -> "IndexedList[T]":
+        self = super().__new__(cls)
+        self._positions = None
+        return self
+
+    def __getstate__(self) -> None:
+        # Copies and pickles rebuild their own index
+        return None
+
+    @staticmethod
+    @abstractmethod
+    def _name(item: Any) -> str:  # pragma: no cover
+        ...
+
+    def find(self, name: str) -> int:
+        """
+        Returns the position of the first item named `name`, or -1.
+        """
+        return self._index().get(name.lower(), -1)
+
+    def _index(self) -> Dict[str, int]:
+        positions = self._positions
+        if positions is None:
+            positions = {}
+            for i, item in enumerate(self):
+                _adopt(item, self)
+                positions.setdefault(self._name(item).lower(), i)
+            self._positions = positions
+        return positions
+
+    def invalidate(self) -> None:
+        self._positions = None
+
+    def _changed(self) -> None:
+        # Called by everything but `append`, which updates the index instead
+        self._positions = None
+
+    def append(self, item: T) -> None:
+        list.append(self, item)
+        if self._positions is not None:
+            _adopt(item, self)
+            self._positions.setdefault(self._name(item).lower(), len(self) - 1)
+
+
+class SectionList(IndexedList["ConfigSection"]):
+    __slots__ = ()
+
+    @staticmethod
+    def _name(item: "ConfigSection") -> str:
+        return item.name
+
+
+class EntryList(IndexedList["ConfigEntry"]):
+    __slots__ = ()
+
+    @staticmethod
+    def _name(item: "ConfigEntry") -> str:
+        return item.key
+
+
+class ValueList(_WatchedList["ValueLine"]):
+    """
+    The lines of an entry's value, which keeps `ConfigEntry.interpret_value`
+    until the list changes, or the text or newline of a line in it.
+    """
+
+    # Unset until interpret_value, None after a change
+    __slots__ = ("_interpreted",)
+    _interpreted: Optional[str]
+
+    def __getstate__(self) -> None:
+        return None
+
+    def invalidate(self) -> None:
+        self._interpreted = None
+
+    def _changed(self) -> None:
+        self._interpreted = None
+
+
+@dataclass(slots=True)
 class ConfigFile:
-    sections: List["ConfigSection"] = field(default_factory=list)
+    sections: List["ConfigSection"] = field(default_factory=SectionList)
     # The naming of these comes from configobj
     initial_comment: str = ""
     final_comment: str = ""
+    # How `build_bytes` encodes the text.  `parse_bytes` keeps any byte order
+    # mark separately, so this is always a codec that doesn't write one.
+    encoding: str = "utf-8"
+    bom: bytes = b""
+
+    def __post_init__(self) -> None:
+        if not isinstance(self.sections, SectionList):
+            self.sections = SectionList(self.sections)
 
     def keys(self) -> List[str]:
         return [s.name for s in self.sections]
 
     def index(self, name: str, case_sensitive: bool = False) -> int:
+        if not case_sensitive and isinstance(self.sections, SectionList):
+            i = self.sections.find(name)
+            if i < 0:
+                raise KeyError(f"Missing section {name}")
+            return i
         for i, s in enumerate(self.sections):
             if (case_sensitive and s.name == name) or (
                 not case_sensitive and s.name.lower() == name.lower()
@@ -40,8 +300,26 @@ class ConfigFile:
 
     def build(self, buf: TextIO) -> None:
         buf.write(self.initial_comment)
-        for s in self.sections:
-            s.build(buf)
+        sections = self.sections
+        spans: Optional[_SpanWriter] = None
+        for i, s in enumerate(sections):
+            if type(s) is SpanSection:
+                if spans is None:
+                    spans = _SpanWriter(buf)
+                if spans.add(s):
+                    continue
+            elif spans is not None:
+                spans.flush()
+            if type(s) is LazySection:
+                s._build_lazy(
+                    buf,
+                    sections[i - 1] if i else None,
+                    sections[i + 1] if i + 1 < len(sections) else None,
+                )
+            else:
+                s.build(buf)
+        if spans is not None:
+            spans.flush()
         buf.write(self.final_comment)
 
     @property
@@ -50,31 +328,103 @@ class ConfigFile:
         self.build(buf)
         return buf.getvalue()
 
+    def build_bytes(self, buf: BinaryIO) -> None:
+        """
+        Like `build`, but encoded, after the BOM.  Newlines aren't translated, and
+        bytes that didn't decode in `parse_bytes` are written back unchanged.
+        """
+        buf.write(self.bom)
+        wrapper = io.TextIOWrapper(
+            buf, encoding=self.encoding, errors="surrogateescape", newline=""
+        )
+        try:
+            self.build(wrapper)
+            wrapper.flush()
+        finally:
+            # Leave `buf` open
+            wrapper.detach()
+
+    @property
+    def data(self) -> bytes:
+        buf = io.BytesIO()
+        self.build_bytes(buf)
+        return buf.getvalue()
+
+    def save(self, path: Path, patch: bool = False) -> bool:
+        """
+        Writes `data` to `path` unless that's what it already holds, returning
+        whether it wrote.  The file is replaced atomically.
+
+        With `patch`, a few small changes are written in place instead, which is
+        less I/O for a big file, but a crash or full disk part way through
+        leaves it torn, readers can see it half written, and it writes through
+        hard links to the same file.
+        """
+        return write_if_changed(path, self.data, patch=patch)
+
     def set_value(self, section: str, key: str, value: str) -> None:
         try:
             s = self[section]
         except KeyError:
-            s = ConfigSection(
-                leading_square_bracket="[",
-                name=section,
-                trailing_square_bracket="]",
-                newline="\n",
-                leading_whitespace="\n" if len(self.sections) else "",
-                trailing_whitespace="",
-            )
+            s = ConfigSection.create(section, first=not self.sections)
             self.sections.append(s)
         s.set_value(key, value)
 
 
-@dataclass
-class ConfigSection:
+class _Spanned(_Owned):
+    # Storage for SpanSection and SpanEntry, for the same reason as _LazyState
+    __slots__ = ("_spans", "_span")
+
+
+class _LazyState(_Spanned):
+    # Storage for LazySection, which has to live here so that a LazySection can
+    # turn into a plain ConfigSection once it's fully parsed.
+    __slots__ = ("_lazy", "_lazy_index")
+
+
+_set_spans: Callable[[Any, Any], None] = _Spanned.__dict__["_spans"].__set__
+_set_span: Callable[[Any, Any], None] = _Spanned.__dict__["_span"].__set__
+_set_lazy: Callable[[Any, Any], None] = _LazyState.__dict__["_lazy"].__set__
+_set_lazy_index: Callable[[Any, Any], None] = _LazyState.__dict__["_lazy_index"].__set__
+
+
+@dataclass(slots=True)
+class ConfigSection(_LazyState):
+    _watched: ClassVar[FrozenSet[str]] = frozenset({"name"})
+
     leading_whitespace: str
     leading_square_bracket: str
     name: str
     trailing_square_bracket: str
     trailing_whitespace: str
     newline: str
-    entries: List["ConfigEntry"] = field(default_factory=list)
+    entries: List["ConfigEntry"] = field(default_factory=EntryList)
+
+    def __init__(
+        self,
+        leading_whitespace: str,
+        leading_square_bracket: str,
+        name: str,
+        trailing_square_bracket: str,
+        trailing_whitespace: str,
+        newline: str,
+        entries: Optional[List["ConfigEntry"]] = None,
+    ) -> None:
+        # By hand, to go straight to the slots
+        _set_owner(self, None)
+        ws, lsb, n, tsb, tws, nl, e = _SECTION_SLOTS
+        ws(self, leading_whitespace)
+        lsb(self, leading_square_bracket)
+        n(self, name)
+        tsb(self, trailing_square_bracket)
+        tws(self, trailing_whitespace)
+        nl(self, newline)
+        if entries is None:
+            e(self, EntryList())
+        elif not isinstance(entries, EntryList):
+            e(self, EntryList(entries))
+        else:
+            e(self, entries)
 
     def build(self, buf: TextIO) -> None:
         buf.write(
@@ -85,13 +435,17 @@ class ConfigSection:
             + self.trailing_whitespace
             + self.newline
         )
-        for e in self.entries:
-            e.build(buf)
+        _build_entries(buf, self.entries)
 
     def keys(self) -> List[str]:
         return [e.key.lower() for e in self.entries]
 
     def index(self, name: str, case_sensitive: bool = False) -> int:
+        if not case_sensitive and isinstance(self.entries, EntryList):
+            i = self.entries.find(name)
+            if i < 0:
+                raise KeyError(name)
+            return i
         for i, e in enumerate(self.entries):
             if (case_sensitive and e.key == name) or (
                 not case_sensitive and e.key.lower() == name.lower()
@@ -113,63 +467,297 @@ class ConfigSection:
         del self.entries[self.index(name)]
 
     def set_value(self, key: str, value: str) -> None:
-        valuelines = [
-            ValueLine(
-                text=line,
-                newline="\n",
-                whitespace_before_text="  " if i > 0 else "",
-                whitespace_after_text="",
-            )
-            for i, line in enumerate(value.splitlines(False) if value else [""])
-        ]
+        try:
+            e = self.entries[self.index(key)]
+        except KeyError:
+            self.entries.append(ConfigEntry.create(key, value))
+        else:
+            e.set_value(value)
+
+    @classmethod
+    def create(cls, name: str, first: bool = False) -> "ConfigSection":
+        """
+        Makes a new, empty section in the style `set_value` uses.
+
+        All but the `first` section in a file get a blank line before.
+        """
+        return cls(
+            leading_square_bracket="[",
+            name=name,
+            trailing_square_bracket="]",
+            newline="\n",
+            leading_whitespace="" if first else "\n",
+            trailing_whitespace="",
+        )
+
+
+# The slots themselves, which LazySection hides behind properties
+_LEADING_WHITESPACE: Any = ConfigSection.__dict__["leading_whitespace"]
+_ENTRIES: Any = ConfigSection.__dict__["entries"]
+_SECTION_SLOTS = _slot_setters(ConfigSection)
+
+
+def _is_set(slot: Any, obj: object) -> bool:
+    try:
+        slot.__get__(obj)
+        return True
+    except AttributeError:
+        return False
+
+
+class LazyText:
+    """
+    The original text of a lazily parsed file, shared by its sections.
+
+    Section `i` owns ``text[starts[i]:starts[i + 1]]``, which is its header line,
+    its entries, and then the comments and whitespace that are the next
+    section's `leading_whitespace`.  Knowing where that last part begins takes a
+    real parse, so parsing section `i` also fills in the leading whitespace of
+    section `i + 1`.
+    """
+
+    __slots__ = ("text", "parse", "sections", "starts", "body_starts")
+
+    def __init__(self, text: str, parse: Callable[[str], "ConfigFile"]) -> None:
+        self.text = text
+        self.parse = parse
+        self.sections: List[LazySection] = []
+        self.starts: List[int] = []
+        self.body_starts: List[int] = []
+
+    def add(self, start: int, body_start: int, header: Sequence[str]) -> None:
+        """
+        Adds a section whose header line is ``text[start:body_start]``.
+        """
+        self.sections.append(LazySection._create(self, len(self.sections), *header))
+        self.starts.append(start)
+        self.body_starts.append(body_start)
+
+    def finish(self, root: "ConfigFile") -> None:
+        self.starts.append(len(self.text))
+        # Whatever comes before the first section, and after the last, is parsed
+        # right away; there's only one of each and this gets any errors early.
+        preamble = self.parse(self.text[: self.starts[0]])
+        _LEADING_WHITESPACE.__set__(self.sections[0], preamble.final_comment)
+        root.sections.extend(self.sections)
+        root.final_comment = self.load(len(self.sections) - 1)
+
+    def load(self, i: int) -> str:
+        """
+        Parses the entries of section `i`, returning the whitespace that follows.
+        """
+        tmp = self.parse(self.text[self.starts[i] : self.starts[i + 1]])
+        section = self.sections[i]
+        _ENTRIES.__set__(section, tmp.sections[0].entries)
+        section._lazy_loaded()
+        if i + 1 < len(self.sections):
+            following = self.sections[i + 1]
+            _LEADING_WHITESPACE.__set__(following, tmp.final_comment)
+            following._lazy_loaded()
+        return tmp.final_comment
+
+
+class LazySection(ConfigSection):
+    """
+    A section whose entries (and leading whitespace) aren't parsed until used.
+
+    The header fields are always available.  Once everything has been parsed
+    this turns into a plain `ConfigSection`.
+    """
+
+    __slots__ = ()
+    _lazy: LazyText
+    _lazy_index: int
+
+    @classmethod
+    def _create(
+        cls,
+        lazy: LazyText,
+        index: int,
+        leading_square_bracket: str,
+        name: str,
+        trailing_square_bracket: str,
+        trailing_whitespace: str,
+        newline: str,
+    ) -> "LazySection":
+        self = cls.__new__(cls)
+        _set_owner(self, None)
+        _set_lazy(self, lazy)
+        _set_lazy_index(self, index)
+        _, lsb, n, tsb, tws, nl, _ = _SECTION_SLOTS
+        lsb(self, leading_square_bracket)
+        n(self, name)
+        tsb(self, trailing_square_bracket)
+        tws(self, trailing_whitespace)
+        nl(self, newline)
+        return self
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        # Made with every field (e.g. by `dataclasses.replace`), so nothing's lazy
+        self.__class__ = ConfigSection  # type: ignore[assignment]
+        ConfigSection.__init__(self, *args, **kwargs)
+
+    def _load_leading_whitespace(self) -> None:
+        if not _is_set(_LEADING_WHITESPACE, self):
+            self._lazy.load(self._lazy_index - 1)
+
+    def _load_entries(self) -> None:
+        if not _is_set(_ENTRIES, self):
+            self._lazy.load(self._lazy_index)
+
+    def _entries_loaded(self) -> bool:
+        return _is_set(_ENTRIES, self)
+
+    @property
+    def leading_whitespace(self) -> str:
+        self._load_leading_whitespace()
+        return _LEADING_WHITESPACE.__get__(self)  # type: ignore[no-any-return]
 
-        for e in self.entries:
-            if e.key.lower() == key:
-                had_value = e.value and bool(e.value[0].text)
-
-                e.value = valuelines
-                if e.whitespace_before_value and not valuelines[0].text:
-                    # Now has a trailing space, remove
-                    e.whitespace_before_value = ""
-                elif (
-                    not e.whitespace_before_value
-                    and not had_value
-                    and valuelines[0].text
-                ):
-                    # Add it back
-                    e.whitespace_before_value = " "
-                break
+    @leading_whitespace.setter
+    def leading_whitespace(self, value: str) -> None:
+        # The previous section's text still has the old value in it
+        self._load_leading_whitespace()
+        _LEADING_WHITESPACE.__set__(self, value)
+
+    @property
+    def entries(self) -> List["ConfigEntry"]:
+        self._load_entries()
+        return _ENTRIES.__get__(self)  # type: ignore[no-any-return]
+
+    @entries.setter
+    def entries(self, value: List["ConfigEntry"]) -> None:
+        # Parse anyway, to find the next section's leading_whitespace
+        self._load_entries()
+        _ENTRIES.__set__(self, value)
+
+    def _lazy_loaded(self) -> None:
+        if _is_set(_LEADING_WHITESPACE, self) and _is_set(_ENTRIES, self):
+            del self._lazy
+            self.__class__ = ConfigSection  # type: ignore[assignment]
+
+    def _load(self) -> None:
+        # Either of these can finish parsing and change our class
+        LazySection._load_leading_whitespace(self)
+        LazySection._load_entries(self)
+
+    def __eq__(self, other: object) -> bool:
+        self._load()
+        return self == other
+
+    def __reduce_ex__(self, protocol: SupportsIndex) -> Any:
+        # Copies and pickles get a fully parsed section
+        self._load()
+        return self.__reduce_ex__(protocol)
+
+    def _build_lazy(
+        self,
+        buf: TextIO,
+        prev: Optional[ConfigSection],
+        next: Optional[ConfigSection],
+    ) -> None:
+        lazy = self._lazy
+        i = self._lazy_index
+        if _is_set(_LEADING_WHITESPACE, self) or prev is not lazy.sections[i - 1]:
+            # Otherwise the previous section wrote it verbatim as part of its text
+            buf.write(self.leading_whitespace)
+        buf.write(
+            self.leading_square_bracket
+            + self.name
+            + self.trailing_square_bracket
+            + self.trailing_whitespace
+            + self.newline
+        )
+        if not _is_set(_ENTRIES, self) and next is lazy.sections[i + 1]:
+            # Unparsed, and followed by the section that this text leads into
+            buf.write(lazy.text[lazy.body_starts[i] : lazy.starts[i + 1]])
         else:
-            self.entries.append(
-                ConfigEntry(
-                    key=key,
-                    equals="=",
-                    value=valuelines,
-                    whitespace_before_equals=" ",
-                    whitespace_before_value=" " if valuelines[0].text else "",
-                )
-            )
+            _build_entries(buf, self.entries)
 
 
-@dataclass
-class ConfigEntry:
+@dataclass(slots=True)
+class ConfigEntry(_Spanned):
+    _watched: ClassVar[FrozenSet[str]] = frozenset({"key"})
+
     key: str
     equals: str
-    value: List["ValueLine"] = field(default_factory=list)
+    value: List["ValueLine"] = field(default_factory=ValueList)
 
     whitespace_before_key: str = ""
     whitespace_before_equals: str = ""
     whitespace_before_value: str = ""
     whitespace_after_value: str = ""  # The final (though optional) newline
 
-    def interpret_value(self) -> str:
-        return "".join(
-            [
-                v.text + (v.newline if i < (len(self.value) - 1) else "")
-                for i, v in enumerate(self.value)
-            ]
+    def __init__(
+        self,
+        key: str,
+        equals: str,
+        value: Optional[List["ValueLine"]] = None,
+        whitespace_before_key: str = "",
+        whitespace_before_equals: str = "",
+        whitespace_before_value: str = "",
+        whitespace_after_value: str = "",
+    ) -> None:
+        # By hand, like ConfigSection's
+        _set_owner(self, None)
+        k, eq, v, wbk, wbe, wbv, wav = _ENTRY_SLOTS
+        k(self, key)
+        eq(self, equals)
+        if value is None:
+            v(self, ValueList())
+        elif not isinstance(value, ValueList):
+            v(self, ValueList(value))
+        else:
+            v(self, value)
+        wbk(self, whitespace_before_key)
+        wbe(self, whitespace_before_equals)
+        wbv(self, whitespace_before_value)
+        wav(self, whitespace_after_value)
+
+    @classmethod
+    def create(cls, key: str, value: str) -> "ConfigEntry":
+        """
+        Makes a new entry in the style `ConfigSection.set_value` uses.
+        """
+        valuelines = _value_lines(value)
+        return cls(
+            key=key,
+            equals="=",
+            value=valuelines,
+            whitespace_before_equals=" ",
+            whitespace_before_value=" " if valuelines[0].text else "",
         )
 
+    def set_value(self, value: str) -> None:
+        """
+        Replaces the value, keeping the whitespace around the delimiter unless
+        it needs to change for the value to be empty (or not).
+        """
+        valuelines = _value_lines(value)
+        had_value = self.value and bool(self.value[0].text)
+
+        self.value = valuelines
+        if self.whitespace_before_value and not valuelines[0].text:
+            # Now has a trailing space, remove
+            self.whitespace_before_value = ""
+        elif not self.whitespace_before_value and not had_value and valuelines[0].text:
+            # Add it back
+            self.whitespace_before_value = " "
+
+    def interpret_value(self) -> str:
+        value = self.value
+        if type(value) is not ValueList:
+            # Assigned a plain list
+            return _interpret(value)
+        try:
+            text = value._interpreted
+        except AttributeError:
+            text = None
+        if text is None:
+            text = value._interpreted = _interpret(value)
+            for line in value:
+                _adopt(line, value)
+        return text
+
     def build(self, buf: TextIO) -> None:
         buf.write(
             self.whitespace_before_key
@@ -183,13 +771,30 @@ class ConfigEntry:
         buf.write(self.whitespace_after_value)
 
 
-@dataclass
-class ValueLine:
+@dataclass(slots=True)
+class ValueLine(_Owned):
+    _watched: ClassVar[FrozenSet[str]] = frozenset({"text", "newline"})
+
     whitespace_before_text: str
     text: str
     whitespace_after_text: str
     newline: str
 
+    def __init__(
+        self,
+        whitespace_before_text: str,
+        text: str,
+        whitespace_after_text: str,
+        newline: str,
+    ) -> None:
+        # By hand, like ConfigSection's
+        _set_owner(self, None)
+        wbt, t, wat, nl = _VALUE_LINE_SLOTS
+        wbt(self, whitespace_before_text)
+        t(self, text)
+        wat(self, whitespace_after_text)
+        nl(self, newline)
+
     def build(self, buf: TextIO) -> None:
         buf.write(
             self.whitespace_before_text
@@ -197,3 +802,390 @@ class ValueLine:
             + self.whitespace_after_text
             + self.newline
         )
+
+
+_ENTRY_SLOTS = _slot_setters(ConfigEntry)
+_VALUE_LINE_SLOTS = _slot_setters(ValueLine)
+
+
+class SpanText:
+    """
+    The original text of a file parsed with ``spans=True``, and where each node
+    and field in it starts and ends.
+
+    Node fields are contiguous slices of the text, in order, so a node needs
+    only the position of its record in `offsets`.  A section's record is 7
+    boundaries, one for each of its 6 string fields plus the end of the header,
+    then the end of its last entry.  An entry's is its number of value lines,
+    the position of its section's record, 6 boundaries for the fields up to the
+    start of the value, then 4 for each value line (its text, whitespace after,
+    and newline starts, and its end).
+
+    `dirty` holds the sections (by the position of their record) whose entries
+    have changed, or might have, since parsing.  The others can be written as
+    one slice.
+    """
+
+    __slots__ = ("text", "offsets", "dirty")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.offsets = array("q")
+        self.dirty: Set[int] = set()
+
+    def tree(self, counts: Iterable[int]) -> "ConfigFile":
+        """
+        Makes the nodes for `offsets` as the parser left them, given the number of
+        entries in each section, without looking at the text.
+        """
+        o = self.offsets
+        root = ConfigFile()
+        section = -1
+        pos = 0
+        for n in counts:
+            section = pos
+            entries = SpanEntryList._create(self, section)
+            root.sections.append(SpanSection._create(self, section, entries))
+            pos += 8
+            for _ in range(n):
+                list.append(entries, SpanEntry._create(self, pos))
+                pos += 8 + 4 * o[pos]
+        end = o[section + 7] if section >= 0 else 0
+        if end < len(self.text):
+            root.final_comment = self.text[end:]
+        return root
+
+
+class SpanEntryList(EntryList):
+    """
+    The entries of a `SpanSection`, which notes any change in `SpanText.dirty`.
+    """
+
+    __slots__ = ("_spans", "_section")
+    _spans: SpanText
+    _section: int
+
+    @classmethod
+    def _create(cls, spans: SpanText, section: int) -> "SpanEntryList":
+        self = cls()
+        self._spans = spans
+        self._section = section
+        return self
+
+    def _changed(self) -> None:
+        super()._changed()
+        self._spans.dirty.add(self._section)
+
+    def append(self, item: "ConfigEntry") -> None:
+        super().append(item)
+        self._spans.dirty.add(self._section)
+
+    def __reduce_ex__(self, protocol: SupportsIndex) -> Any:
+        # Copies aren't part of any section
+        return EntryList, (list(self),)
+
+
+def _span_field(i: int, name: str) -> Any:
+    def get(self: Union["SpanSection", "SpanEntry"]) -> str:
+        o = self._spans.offsets
+        return self._spans.text[o[self._span + i] : o[self._span + i + 1]]
+
+    def set(self: Union["SpanSection", "SpanEntry"], value: str) -> None:
+        self._materialize()
+        setattr(self, name, value)
+
+    return property(get, set)
+
+
+class SpanSection(ConfigSection):
+    """
+    A section whose header fields are slices of the source text, made on access.
+
+    Setting any of them turns this into a plain `ConfigSection`.  The entries
+    are a normal list, but if neither it nor any entry in it has changed, the
+    whole section is written as one slice.
+    """
+
+    __slots__ = ()
+    _spans: SpanText
+    _span: int
+
+    leading_whitespace = _span_field(0, "leading_whitespace")
+    leading_square_bracket = _span_field(1, "leading_square_bracket")
+    name = _span_field(2, "name")
+    trailing_square_bracket = _span_field(3, "trailing_square_bracket")
+    trailing_whitespace = _span_field(4, "trailing_whitespace")
+    newline = _span_field(5, "newline")
+
+    @classmethod
+    def _create(
+        cls, spans: SpanText, span: int, entries: List["ConfigEntry"]
+    ) -> "SpanSection":
+        self = cls.__new__(cls)
+        _set_owner(self, None)
+        _set_spans(self, spans)
+        _set_span(self, span)
+        _ENTRIES.__set__(self, entries)
+        return self
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        # Made with every field (e.g. by `dataclasses.replace`), so no spans
+        self.__class__ = ConfigSection  # type: ignore[assignment]
+        ConfigSection.__init__(self, *args, **kwargs)
+
+    def _materialize(self) -> None:
+        values = [getattr(self, f.name) for f in fields(ConfigSection)]
+        del self._spans, self._span
+        self.__class__ = ConfigSection  # type: ignore[assignment]
+        # The same values, which doesn't change anything the owner keeps
+        for setter, v in zip(_SECTION_SLOTS, values):
+            setter(self, v)
+
+    def _span_range(self) -> Optional[Tuple[SpanText, int, int]]:
+        spans = self._spans
+        o = spans.offsets
+        s = self._span
+        entries = _ENTRIES.__get__(self)
+        if (
+            s not in spans.dirty
+            and type(entries) is SpanEntryList
+            and entries._section == s
+            and entries._spans is spans
+        ):
+            return spans, o[s], o[s + 7]
+
+        # Changed, but it might have been put back the way it was
+        end = o[s + 6]
+        for e in entries:
+            # SpanEntry._span_range, inlined
+            if type(e) is not SpanEntry or e._spans is not spans:
+                return None
+            i = e._span
+            if o[i + 2] != end or _VALUE.__get__(e) is not None:
+                return None
+            end = o[i + 7 + 4 * o[i]]
+        return spans, o[s], end
+
+    def build(self, buf: TextIO) -> None:
+        o = self._spans.offsets
+        buf.write(self._spans.text[o[self._span] : o[self._span + 6]])
+        _build_entries(buf, self.entries)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ConfigSection):
+            return NotImplemented
+        return _values(self) == _values(other)
+
+    def __reduce_ex__(self, protocol: SupportsIndex) -> Any:
+        # Copies and pickles are plain sections, sharing the entries list when
+        # shallow.
+        return ConfigSection, tuple(_values(self))
+
+
+class SpanEntry(ConfigEntry):
+    """
+    An entry whose fields are slices of the source text, made on access.
+
+    Setting a string field turns this into a plain `ConfigEntry`.  Reading
+    `value` makes (and keeps) a list of `ValueLine` so that it can be changed in
+    place; `interpret_value` doesn't need it.
+    """
+
+    __slots__ = ()
+    _spans: SpanText
+    _span: int
+
+    whitespace_before_key = _span_field(2, "whitespace_before_key")
+    key = _span_field(3, "key")
+    whitespace_before_equals = _span_field(4, "whitespace_before_equals")
+    equals = _span_field(5, "equals")
+    whitespace_before_value = _span_field(6, "whitespace_before_value")
+
+    @classmethod
+    def _create(cls, spans: SpanText, span: int) -> "SpanEntry":
+        self = cls.__new__(cls)
+        _set_owner(self, None)
+        _set_spans(self, spans)
+        _set_span(self, span)
+        # Until it's read
+        _VALUE.__set__(self, None)
+        return self
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        # Made with every field (e.g. by `dataclasses.replace`), so no spans
+        self.__class__ = ConfigEntry  # type: ignore[assignment]
+        ConfigEntry.__init__(self, *args, **kwargs)
+
+    def _modified(self) -> None:
+        self._spans.dirty.add(self._spans.offsets[self._span + 1])
+
+    def _value_from_spans(self) -> List["ValueLine"]:
+        text = self._spans.text
+        o = self._spans.offsets
+        start = self._span + 7
+        return ValueList(
+            ValueLine(
+                text[o[i] : o[i + 1]],
+                text[o[i + 1] : o[i + 2]],
+                text[o[i + 2] : o[i + 3]],
+                text[o[i + 3] : o[i + 4]],
+            )
+            for i in range(start, start + 4 * o[self._span], 4)
+        )
+
+    @property
+    def value(self) -> List["ValueLine"]:
+        value = _VALUE.__get__(self)
+        if value is None:
+            # Which can now be changed in place
+            self._modified()
+            value = self._value_from_spans()
+            _VALUE.__set__(self, value)
+        return value  # type: ignore[no-any-return]
+
+    @value.setter
+    def value(self, value: List["ValueLine"]) -> None:
+        self._modified()
+        _VALUE.__set__(self, value)
+
+    @property
+    def whitespace_after_value(self) -> str:
+        # The parser never puts anything here
+        return ""
+
+    @whitespace_after_value.setter
+    def whitespace_after_value(self, value: str) -> None:
+        self._materialize()
+        self.whitespace_after_value = value
+
+    def _materialize(self) -> None:
+        values = _values(self)
+        self._modified()
+        del self._spans, self._span
+        self.__class__ = ConfigEntry  # type: ignore[assignment]
+        # Like SpanSection's
+        for setter, v in zip(_ENTRY_SLOTS, values):
+            setter(self, v)
+
+    def _span_range(self) -> Optional[Tuple[SpanText, int, int]]:
+        if _VALUE.__get__(self) is not None:
+            return None
+        o = self._spans.offsets
+        return self._spans, o[self._span + 2], o[self._span + 7 + 4 * o[self._span]]
+
+    def interpret_value(self) -> str:
+        if _VALUE.__get__(self) is not None:
+            return ConfigEntry.interpret_value(self)
+        text = self._spans.text
+        o = self._spans.offsets
+        i = self._span + 7
+        last = i + 4 * (o[self._span] - 1)
+        # Text, plus the newline for all but the last line
+        parts = [
+            text[o[j + 1] : o[j + 2]] + text[o[j + 3] : o[j + 4]]
+            for j in range(i, last, 4)
+        ]
+        parts.append(text[o[last + 1] : o[last + 2]])
+        return "".join(parts)
+
+    def build(self, buf: TextIO) -> None:
+        r = self._span_range()
+        if r is None:
+            ConfigEntry.build(self, buf)
+        else:
+            buf.write(r[0].text[r[1] : r[2]])
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ConfigEntry):
+            return NotImplemented
+        return _values(self) == _values(other)
+
+    def __reduce_ex__(self, protocol: SupportsIndex) -> Any:
+        # Copies and pickles are plain entries, sharing the value list when
+        # shallow.
+        return ConfigEntry, tuple(_values(self))
+
+
+_VALUE: Any = ConfigEntry.__dict__["value"]
+
+
+def _values(node: Union[ConfigSection, ConfigEntry]) -> List[Any]:
+    if type(node) is SpanEntry and _VALUE.__get__(node) is None:
+        # Without keeping the list, which would mark the section as changed
+        return [
+            node._value_from_spans() if f.name == "value" else getattr(node, f.name)
+            for f in fields(node)
+        ]
+    return [getattr(node, f.name) for f in fields(node)]
+
+
+class _SpanWriter:
+    """
+    Writes runs of unchanged span nodes that are next to each other in the same
+    source text as one slice.
+    """
+
+    __slots__ = ("buf", "spans", "start", "end")
+
+    def __init__(self, buf: TextIO) -> None:
+        self.buf = buf
+        self.spans: Optional[SpanText] = None
+        self.start = self.end = 0
+
+    def add(self, node: Union["SpanSection", "SpanEntry"]) -> bool:
+        """
+        Returns whether `node` was taken, otherwise the caller should build it.
+        """
+        r = node._span_range()
+        if r is None:
+            self.flush()
+            return False
+        if r[0] is self.spans and r[1] == self.end:
+            self.end = r[2]
+        else:
+            self.flush()
+            self.spans, self.start, self.end = r
+        return True
+
+    def flush(self) -> None:
+        if self.spans is not None:
+            self.buf.write(self.spans.text[self.start : self.end])
+            self.spans = None
+
+
+def _build_entries(buf: TextIO, entries: Iterable[ConfigEntry]) -> None:
+    spans: Optional[_SpanWriter] = None
+    for e in entries:
+        if type(e) is SpanEntry:
+            if spans is None:
+                spans = _SpanWriter(buf)
+            if spans.add(e):
+                continue
+        elif spans is not None:
+            spans.flush()
+        e.build(buf)
+    if spans is not None:
+        spans.flush()
+
+
+def _value_lines(value: str) -> ValueList:
+    # Multiline values get a hanging indent
+    return ValueList(
+        ValueLine(
+            text=line,
+            newline="\n",
+            whitespace_before_text="  " if i > 0 else "",
+            whitespace_after_text="",
+        )
+        for i, line in enumerate(value.splitlines(False) if value else [""])
+    )
+
+
+def _interpret(value: List[ValueLine]) -> str:
+    last = len(value) - 1
+    if last == 0:
+        return value[0].text
+    # The text, plus the newline for all but the last line
+    return "".join(
+        [v.text + v.newline if i < last else v.text for i, v in enumerate(value)]
+    )
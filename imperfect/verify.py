@@ -1,48 +1,169 @@
+import argparse
 import configparser
 import io
+import json
 import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Iterator, List, Optional, Sequence
 
 from imperfect import parse_string
 
+OK = "OK"
+FAIL_READ = "FAIL TO READ"
+FAIL_PARSE = "FAIL TO PARSE"
+FAIL_ROUND_TRIP = "FAIL ROUND TRIP"
+FAIL_CONFIGPARSER = "FAIL TO READ IN CONFIGPARSER"
+FAIL_COMPARE = "FAIL COMPARE"
+FAIL = "FAIL"
+FAIL_EMPTY = "FAIL EMPTY"
 
-def verify(name: str) -> None:
-    with open(name) as f:
-        data = f.read()
-    conf = parse_string(data)
+
+@dataclass
+class Result:
+    name: str
+    status: str
+    section: Optional[str] = None
+    key: Optional[str] = None
+    message: Optional[str] = None
+    expected: Optional[str] = None
+    actual: Optional[str] = None
+    # Seconds
+    imperfect_time: float = 0.0
+    configparser_time: float = 0.0
+
+    def text(self) -> str:
+        """
+        The original human-readable output.
+        """
+        parts = [self.name, self.section, self.key, self.status, self.message]
+        line = " ".join(p for p in parts if p is not None)
+        if self.status == FAIL_COMPARE:
+            line += f"\nconfigpar: {self.expected!r}\nimperfect: {self.actual!r}"
+        return line
+
+
+def check(name: str) -> Result:
+    try:
+        with open(name) as f:
+            data = f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        # One bad file shouldn't stop check_all
+        return Result(name, FAIL_READ, message=str(e))
+
+    t0 = time.perf_counter()
+    try:
+        conf = parse_string(data)
+    except Exception as e:
+        return Result(name, FAIL_PARSE, message=str(e))
     buf = io.StringIO()
     conf.build(buf)
+    result = Result(name, OK, imperfect_time=time.perf_counter() - t0)
     if data != buf.getvalue():
-        print(name, "FAIL ROUND TRIP")
-        return
+        result.status = FAIL_ROUND_TRIP
+        return result
 
+    t0 = time.perf_counter()
     try:
         co = configparser.RawConfigParser()
         co.read_string(data)
     except Exception as e:
-        print(name, "FAIL TO READ IN CONFIGPARSER", e)
-        return
+        result.status = FAIL_CONFIGPARSER
+        result.message = str(e)
+        return result
+    finally:
+        result.configparser_time = time.perf_counter() - t0
+
     compares = 0
     for section_name in co:
         for key in co[section_name]:
             compares += 1
             expected_value = co[section_name][key]
             try:
-                if conf[section_name][key] != expected_value:
-                    print(name, section_name, key, "FAIL COMPARE")
-                    print("configpar:", repr(expected_value))
-                    print("imperfect:", repr(conf[section_name][key]))
-                    return
+                actual_value = conf[section_name][key]
             except Exception as e:
-                print(name, section_name, key, "FAIL", str(e))
-                return
+                result.status = FAIL
+                result.section = section_name
+                result.key = key
+                result.message = str(e)
+                return result
+            if actual_value != expected_value:
+                result.status = FAIL_COMPARE
+                result.section = section_name
+                result.key = key
+                result.expected = expected_value
+                result.actual = actual_value
+                return result
 
     if compares == 0:
-        print(name, "FAIL EMPTY")
+        result.status = FAIL_EMPTY
+
+    return result
+
+
+def verify(name: str) -> None:
+    print(check(name).text())
+
+
+def check_all(names: Sequence[str], jobs: int = 1) -> Iterator[Result]:
+    """
+    Yields results in the same order as `names`, using `jobs` processes.
+    """
+    if jobs <= 1:
+        yield from map(check, names)
         return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # Larger chunks amortize the IPC; small files take well under a ms each.
+        chunksize = max(1, min(64, len(names) // (jobs * 4)))
+        yield from executor.map(check, names, chunksize=chunksize)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m imperfect.verify",
+        description="Check that files roundtrip and match RawConfigParser.",
+    )
+    parser.add_argument("files", nargs="+")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes (default 1)",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Write one JSON object per file, then a summary object",
+    )
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    counts: Counter[str] = Counter()
+    for result in check_all(args.files, args.jobs):
+        counts[result.status] += 1
+        if args.json:
+            print(json.dumps(asdict(result)), flush=True)
+        else:
+            print(result.text(), flush=True)
+
+    failed = sum(n for status, n in counts.items() if status != OK)
+    summary = {
+        "total": len(args.files),
+        "failed": failed,
+        "statuses": dict(counts),
+        "elapsed": time.perf_counter() - t0,
+    }
+    if args.json:
+        print(json.dumps({"summary": summary}))
+    elif len(args.files) > 1:
+        print(f"{summary['total']} files, {failed} failed")
 
-    print(name, "OK")
+    # 0 if everything passed, 1 if anything failed (2 is argparse's usage error)
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":  # pragma: no cover
-    for f in sys.argv[1:]:
-        verify(f)
+    sys.exit(main())
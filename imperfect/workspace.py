@@ -0,0 +1,252 @@
+"""
+A directory tree of config files, loaded once and kept up to date.
+
+Every file is parsed with the same options, and section names and keys (which
+repeat from file to file) are shared between the trees rather than each having
+its own copy; the parser already shares whitespace and newlines.  The
+workspace keeps an index from lowercase ``(section, key)`` to the files that
+set it, so finding them doesn't look at any other file.  Like the mapping
+methods, only the first section of a name counts, and the first key of a name
+in it.  With ``lazy=True`` the keys of a section are indexed (and shared) when
+something first looks for one in a section of that name, so only those
+sections get parsed.
+
+`refresh` stats every file and reparses only those that changed.  After editing
+a tree in place, call `reindex` (or `save`, which does) so the index sees it.
+"""
+
+import fnmatch
+import os
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from . import Parser
+from .cache import ParseCache
+from .files import Path
+from .query import Match
+from .types import ConfigEntry, ConfigFile, ConfigSection, LazySection, ParseError
+
+PATTERNS = ("*.ini", "*.cfg")
+
+# (section, key), lowercase; the key is None for the section itself
+IndexKey = Tuple[str, Optional[str]]
+# What a file was when it was parsed
+Stamp = Tuple[int, int, int]
+
+
+def _stamp(st: os.stat_result) -> Stamp:
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class Workspace:
+    """
+    The files under `root` whose names match any of `patterns`, keyed by path
+    relative to `root`.
+
+    Keyword arguments are for the `Parser`.  With `cache`, files are parsed
+    through that `ParseCache` (so trees are span trees).  Files that don't
+    parse or decode are left out of `files`, with the error in `errors`.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        patterns: Sequence[str] = PATTERNS,
+        encoding: str = "utf-8",
+        cache: Optional[ParseCache] = None,
+        **kwargs: Any,
+    ) -> None:
+        self.root = os.fspath(root)
+        self.patterns = tuple(patterns)
+        self.encoding = encoding
+        self.cache = cache
+        self.files: Dict[str, ConfigFile] = {}
+        self.errors: Dict[str, Exception] = {}
+        self._kwargs = kwargs
+        self._parser = Parser(**kwargs)
+        self._stamps: Dict[str, Stamp] = {}
+        self._names: Dict[str, str] = {}
+        # How many files use each of _names, and which each file uses
+        self._uses: Dict[str, int] = {}
+        self._used: Dict[str, Set[str]] = {}
+        self._index: Dict[IndexKey, Dict[str, None]] = {}
+        self._keys: Dict[str, List[IndexKey]] = {}
+        # Lowercase section name -> files where that section's entries aren't
+        # parsed yet, so its keys aren't in the index
+        self._pending: Dict[str, Dict[str, None]] = {}
+        self.refresh()
+
+    def _walk(self) -> Iterable[str]:
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames.sort()
+            for name in sorted(filenames):
+                if any(fnmatch.fnmatch(name, p) for p in self.patterns):
+                    yield os.path.relpath(os.path.join(dirpath, name), self.root)
+
+    def refresh(self) -> List[str]:
+        """
+        Loads new and changed files, and forgets removed ones.  Returns their
+        paths.
+        """
+        changed = []
+        seen = set()
+        for path in self._walk():
+            try:
+                stamp = _stamp(os.stat(os.path.join(self.root, path)))
+            except FileNotFoundError:
+                continue
+            seen.add(path)
+            if self._stamps.get(path) != stamp:
+                self._load(path, stamp)
+                changed.append(path)
+        for path in list(self._stamps):
+            if path not in seen:
+                self._forget(path)
+                changed.append(path)
+        return changed
+
+    def _load(self, path: str, stamp: Stamp) -> None:
+        self._forget(path)
+        self._stamps[path] = stamp
+        full = os.path.join(self.root, path)
+        try:
+            if self.cache is not None:
+                conf = self.cache.parse_path(
+                    full, self.encoding, "binary", **self._kwargs
+                )
+            else:
+                conf = self._parser.parse_path(full, self.encoding, "binary")
+        except (ParseError, UnicodeDecodeError, OSError) as e:
+            self.errors[path] = e
+            return
+        self.files[path] = conf
+        self._add(path, conf)
+
+    def _forget(self, path: str) -> None:
+        self._stamps.pop(path, None)
+        self.errors.pop(path, None)
+        if self.files.pop(path, None) is not None:
+            self._remove(path)
+
+    def _share(self, name: str, used: Set[str]) -> str:
+        shared = self._names.setdefault(name, name)
+        if shared not in used:
+            used.add(shared)
+            self._uses[shared] = self._uses.get(shared, 0) + 1
+        return shared
+
+    def _add(self, path: str, conf: ConfigFile) -> None:
+        used = self._used[path] = set()
+        keys: List[IndexKey] = []
+        seen = set()
+        for s in conf.sections:
+            if type(s) in (ConfigSection, LazySection):
+                s.name = self._share(s.name, used)
+            section = self._share(s.name.lower(), used)
+            if section in seen:
+                continue
+            seen.add(section)
+            keys.append((section, None))
+            if type(s) is LazySection and not s._entries_loaded():
+                self._pending.setdefault(section, {})[path] = None
+            else:
+                self._add_entries(section, s, used, keys)
+        self._index_keys(path, keys)
+        self._keys[path] = keys
+
+    def _add_entries(
+        self, section: str, s: ConfigSection, used: Set[str], keys: List[IndexKey]
+    ) -> None:
+        found = set()
+        for e in s.entries:
+            if type(e) is ConfigEntry:
+                e.key = self._share(e.key, used)
+            key = self._share(e.key.lower(), used)
+            if key not in found:
+                found.add(key)
+                keys.append((section, key))
+
+    def _index_keys(self, path: str, keys: Iterable[IndexKey]) -> None:
+        index = self._index
+        for k in keys:
+            index.setdefault(k, {})[path] = None
+
+    def _load_pending(self, section: str) -> None:
+        # Parses the sections named `section` whose keys aren't indexed yet
+        for path in self._pending.pop(section, ()):
+            conf = self.files[path]
+            try:
+                s = conf.sections[conf.index(section)]
+            except KeyError:
+                # Deleted since it was indexed
+                continue
+            keys: List[IndexKey] = []
+            self._add_entries(section, s, self._used[path], keys)
+            self._index_keys(path, keys)
+            self._keys[path].extend(keys)
+
+    def _remove(self, path: str) -> None:
+        for k in self._keys.pop(path):
+            paths = self._index[k]
+            del paths[path]
+            if not paths:
+                del self._index[k]
+            pending = self._pending.get(k[0]) if k[1] is None else None
+            if pending is not None and path in pending:
+                del pending[path]
+                if not pending:
+                    del self._pending[k[0]]
+        uses = self._uses
+        for name in self._used.pop(path):
+            if uses[name] == 1:
+                del uses[name], self._names[name]
+            else:
+                uses[name] -= 1
+
+    def reindex(self, path: str) -> None:
+        """
+        Updates the index for a tree in `files` that was edited in place.
+        """
+        self._remove(path)
+        self._add(path, self.files[path])
+
+    def save(self, path: str) -> bool:
+        """
+        Writes the tree for `path` back (see `ConfigFile.save`) and reindexes
+        it, without reparsing it on the next `refresh`.  Returns whether it
+        wrote.
+        """
+        full = os.path.join(self.root, path)
+        written = self.files[path].save(full)
+        self._stamps[path] = _stamp(os.stat(full))
+        self.reindex(path)
+        return written
+
+    def paths(self, section: str, key: Optional[str] = None) -> List[str]:
+        """
+        The files that have `section`, or `key` in it, as of the last index, in
+        order.
+        """
+        k = (section.lower(), None if key is None else key.lower())
+        if key is not None and k[0] in self._pending:
+            self._load_pending(k[0])
+        return sorted(self._index.get(k, ()))
+
+    def find(self, section: str, key: Optional[str] = None) -> List[Tuple[str, Match]]:
+        """
+        Like `paths`, with the nodes, as ``(path, match)`` like
+        `Selector.run_many`.  Files edited since they were indexed are looked
+        at as they are now, so there are no stale nodes, but new ones aren't
+        found until `reindex`.
+        """
+        found = []
+        for path in self.paths(section, key):
+            conf = self.files[path]
+            try:
+                s = conf.sections[conf.index(section)]
+                if key is None:
+                    found.append((path, Match(conf, s)))
+                else:
+                    found.append((path, Match(conf, s, s.entries[s.index(key)])))
+            except KeyError:
+                pass
+        return found